@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+bench_patterns.py
+Micro-benchmark: 'matches_any' (fnmatch por patrón) frente a PatternSet.
+
+Uso:
+    python benchmarks/bench_patterns.py
+    python benchmarks/bench_patterns.py --names 200000 --config configs/config_cleaner.json
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from file_cleaner import PatternSet, matches_any  # noqa: E402
+
+EXTENSIONS = [".jpg", ".txt", ".py", ".log", ".tmp", ".pdf", ".part", ".mp4", "", ".bak"]
+
+
+def make_names(count: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    specials = ["Thumbs.db", ".DS_Store", "desktop.ini", "notas~", "backup.log"]
+    names = []
+    for i in range(count):
+        if rnd.random() < 0.05:
+            names.append(rnd.choice(specials))
+        else:
+            names.append(f"file_{i}{rnd.choice(EXTENSIONS)}")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de coincidencia de patrones.")
+    parser.add_argument("--names", type=int, default=100_000, help="Nombres a evaluar")
+    parser.add_argument("--config", type=Path, default=ROOT / "configs" / "config_cleaner.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cfg = json.loads(args.config.read_text(encoding="utf-8"))
+    patterns, exclude = cfg["patterns"], cfg["exclude"]
+    names = make_names(args.names)
+
+    def legacy():
+        return sum(
+            1 for n in names
+            if not matches_any(n, exclude) and matches_any(n, patterns)
+        )
+
+    pat_set, exc_set = PatternSet(patterns), PatternSet(exclude)
+
+    def compiled():
+        return sum(1 for n in names if not exc_set.match(n) and pat_set.match(n))
+
+    assert legacy() == compiled(), "los resultados no coinciden"
+    t_legacy = min(timeit.repeat(legacy, number=1, repeat=args.repeat))
+    t_compiled = min(timeit.repeat(compiled, number=1, repeat=args.repeat))
+    print(json.dumps({
+        "names": args.names,
+        "patterns": len(patterns) + len(exclude),
+        "matches_any_s": round(t_legacy, 4),
+        "pattern_set_s": round(t_compiled, 4),
+        "speedup": round(t_legacy / t_compiled, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
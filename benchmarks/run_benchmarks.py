@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+Benchmarks de los scripts sobre árboles sintéticos (ver treegen.py).
+
+Cada benchmark corre en un proceso nuevo sobre un árbol recién generado
+en tmpfs (/dev/shm) o en el directorio temporal, y reporta tiempo, archivos
+por segundo, llamadas de metadatos y pico de RSS en JSON.
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --files 100000 --only cleaner_scan -o hoy.json
+    python benchmarks/run_benchmarks.py --compare ayer.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from treegen import AGE_DISTS, DEFAULTS, TreeSpec, generate_tree  # noqa: E402
+
+# --------------------------------------------------------------------------- #
+# Contadores de llamadas al sistema de archivos
+# --------------------------------------------------------------------------- #
+class _CountingEntry:
+    """DirEntry que cuenta sus stat(); el resto se delega."""
+    __slots__ = ("_e", "_c")
+
+    def __init__(self, entry, counter: Counter) -> None:
+        self._e = entry
+        self._c = counter
+
+    name = property(lambda self: self._e.name)
+    path = property(lambda self: self._e.path)
+
+    def stat(self, *, follow_symlinks=True):
+        self._c["stat"] += 1
+        return self._e.stat(follow_symlinks=follow_symlinks)
+
+    def is_dir(self, *, follow_symlinks=True):
+        return self._e.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks=True):
+        return self._e.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._e.is_symlink()
+
+    def inode(self):
+        return self._e.inode()
+
+    def __fspath__(self):
+        return self._e.path
+
+
+class _CountingScandir:
+    def __init__(self, it, counter: Counter) -> None:
+        self._it = it
+        self._c = counter
+
+    def __iter__(self):
+        for entry in self._it:
+            yield _CountingEntry(entry, self._c)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def close(self):
+        self._it.close()
+
+
+def install_counters() -> Counter:
+    """Envuelve las funciones de os que tocan metadatos y cuenta sus llamadas.
+
+    No ve los stat implícitos de DirEntry.is_file()/is_dir() en sistemas de
+    archivos sin d_type; en tmpfs/ext4 no ocurren.
+    """
+    counter: Counter = Counter()
+
+    def wrap(name: str, category: str) -> None:
+        original = getattr(os, name)
+
+        def wrapper(*args, **kwargs):
+            counter[category] += 1
+            return original(*args, **kwargs)
+        setattr(os, name, wrapper)
+
+    for name, category in (
+        ("stat", "stat"), ("lstat", "stat"), ("listdir", "listdir"),
+        ("rename", "rename"), ("replace", "rename"), ("unlink", "unlink"),
+        ("remove", "unlink"), ("mkdir", "mkdir"),
+    ):
+        wrap(name, category)
+
+    original_scandir = os.scandir
+
+    def scandir(*args, **kwargs):
+        counter["listdir"] += 1
+        return _CountingScandir(original_scandir(*args, **kwargs), counter)
+    os.scandir = scandir
+    return counter
+
+# --------------------------------------------------------------------------- #
+# Benchmarks
+# --------------------------------------------------------------------------- #
+def bench_cleaner_scan(root: Path, opts: Dict) -> None:
+    from file_cleaner import Cleaner
+    Cleaner(root, workers=opts["workers"]).scan()
+
+
+def bench_organizer_run(root: Path, opts: Dict) -> None:
+    from file_organizer import DEFAULT_MAPPING, Organizer
+    Organizer(root, DEFAULT_MAPPING).run()
+
+
+def _run_cwd_main(module: str, root: Path) -> None:
+    os.chdir(root)
+    sys.argv = [module]
+    __import__(module).main()
+
+
+def bench_renombrar_imagenes(root: Path, opts: Dict) -> None:
+    _run_cwd_main("renombrar_imagenes", root)
+
+
+def bench_organizar_videos(root: Path, opts: Dict) -> None:
+    _run_cwd_main("organizar_videos", root)
+
+
+# nombre -> (función, cambios sobre el TreeSpec base)
+BENCHMARKS: Dict[str, tuple] = {
+    "cleaner_scan": (bench_cleaner_scan, {"mix": "cleaner"}),
+    "organizer_run": (bench_organizer_run, {"mix": "organizer", "depth": 0}),
+    "renombrar_imagenes": (bench_renombrar_imagenes, {"mix": "images", "depth": 0}),
+    "organizar_videos": (bench_organizar_videos, {"mix": "videos", "depth": 0}),
+}
+
+
+def _child(name: str, root: str, home: str, opts: Dict, files: int, out) -> None:
+    """Ejecuta un benchmark en un proceso limpio y devuelve sus métricas.
+
+    HOME apunta a una carpeta propia de la ejecución: los scripts dejan ahí
+    sus logs y cachés (~/.cache/media_dates...) sin tocar los del usuario,
+    y cada ejecución mide el trabajo completo, no aciertos de caché.
+    """
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    sys.path.insert(0, str(SCRIPTS))
+    func: Callable = BENCHMARKS[name][0]
+    sink = io.StringIO()
+    logging.disable(logging.INFO if not opts["verbose"] else logging.NOTSET)
+    counter = install_counters()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink if not opts["verbose"] else sys.stdout):
+        func(Path(root), opts)
+    wall = time.perf_counter() - start
+    # ru_maxrss: KB en Linux, bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    out.put({
+        "name": name,
+        "files": files,
+        "wall_s": round(wall, 4),
+        "files_per_s": round(files / wall, 1) if wall else None,
+        "calls": dict(sorted(counter.items())),
+        "peak_rss_kb": peak,
+    })
+
+
+def run_one(name: str, base_spec: TreeSpec, tmp_base: Path, opts: Dict) -> Dict:
+    spec = base_spec._replace(**BENCHMARKS[name][1])
+    root = Path(tempfile.mkdtemp(prefix=f"bench_{name}_", dir=tmp_base))
+    home = Path(tempfile.mkdtemp(prefix=f"bench_{name}_home_", dir=tmp_base))
+    try:
+        files = generate_tree(root, spec)
+        ctx = multiprocessing.get_context("spawn")
+        out = ctx.Queue()
+        proc = ctx.Process(target=_child, args=(name, str(root), str(home), opts, files, out))
+        proc.start()
+        result = out.get()
+        proc.join()
+        result["tree"] = spec._asdict()
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(home, ignore_errors=True)
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+def default_tmp() -> Path:
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict, previous_path: Path) -> None:
+    previous = {r["name"]: r for r in json.loads(previous_path.read_text())["results"]}
+    for r in current["results"]:
+        old = previous.get(r["name"])
+        if not old:
+            continue
+        ratio = old["wall_s"] / r["wall_s"] if r["wall_s"] else float("inf")
+        print(f"{r['name']:<22} {old['wall_s']:>9.3f}s -> {r['wall_s']:>9.3f}s  "
+              f"({ratio:.2f}x)  rss {old['peak_rss_kb']} -> {r['peak_rss_kb']} KB",
+              file=sys.stderr)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks de PROYECTOS.PY")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Ejecutar solo estos benchmarks (repetible)")
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--depth", type=int, default=DEFAULTS.depth)
+    parser.add_argument("--fanout", type=int, default=DEFAULTS.fanout)
+    parser.add_argument("--max-age-days", type=float, default=DEFAULTS.max_age_days)
+    parser.add_argument("--age-dist", choices=AGE_DISTS, default=DEFAULTS.age_dist)
+    parser.add_argument("--seed", type=int, default=DEFAULTS.seed)
+    parser.add_argument("--workers", type=int, default=4, help="Hilos para el cleaner")
+    parser.add_argument("--tmp", type=Path, default=None,
+                        help="Dónde crear los árboles (default /dev/shm o TMPDIR)")
+    parser.add_argument("-o", "--output", type=Path, help="Guardar el JSON en este archivo")
+    parser.add_argument("--compare", type=Path, help="JSON previo con el que comparar")
+    parser.add_argument("--verbose", action="store_true", help="No silenciar la salida de los scripts")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    spec = TreeSpec(files=args.files, depth=args.depth, fanout=args.fanout,
+                    max_age_days=args.max_age_days, age_dist=args.age_dist, seed=args.seed)
+    opts = {"workers": args.workers, "verbose": args.verbose}
+    tmp_base = args.tmp or default_tmp()
+
+    results = []
+    for name in args.only or list(BENCHMARKS):
+        print(f"» {name} ...", file=sys.stderr)
+        results.append(run_one(name, spec, tmp_base, opts))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "tmp": str(tmp_base),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+treegen.py
+Generador determinista de árboles de archivos sintéticos para benchmarks.
+
+Uso:
+    python benchmarks/treegen.py /dev/shm/arbol --files 50000 --depth 4
+    python benchmarks/treegen.py /tmp/fotos --files 2000 --depth 0 --mix images
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+# Mezclas de extensiones con su peso relativo
+MIXES: Dict[str, Dict[str, int]] = {
+    "cleaner": {
+        ".tmp": 10, ".log": 10, ".bak": 5, ".old": 2, "~": 3, ".txt": 20,
+        ".jpg": 15, ".pdf": 10, ".py": 10, ".mp4": 5, "": 10,
+    },
+    "organizer": {
+        ".pdf": 10, ".docx": 5, ".jpg": 20, ".png": 10, ".mp4": 5, ".mp3": 10,
+        ".zip": 5, ".py": 10, ".txt": 10, ".xyz": 5, "": 10,
+    },
+    "images": {".jpg": 50, ".jpeg": 10, ".png": 25, ".gif": 5, ".webp": 5, ".txt": 5},
+    "videos": {".mp4": 50, ".mov": 20, ".mkv": 15, ".avi": 10, ".txt": 5},
+}
+AGE_DISTS = ("uniform", "recent")
+
+
+class TreeSpec(NamedTuple):
+    files: int = 10_000
+    depth: int = 3
+    fanout: int = 4
+    mix: str = "cleaner"
+    max_age_days: float = 60.0
+    age_dist: str = "uniform"  # "recent": la mayoría de archivos son nuevos
+    max_size: int = 4096
+    seed: int = 1234
+
+
+DEFAULTS = TreeSpec()
+
+
+def generate_tree(root: Path, spec: TreeSpec = DEFAULTS) -> int:
+    """Crea spec.files archivos bajo 'root'; mismo spec → mismo árbol.
+
+    Las carpetas forman un árbol completo de 'fanout' hijos y profundidad
+    'depth' (0 = todo en la raíz). Devuelve el número de archivos creados.
+    """
+    rnd = random.Random(spec.seed)
+    root = Path(root)
+    dirs = [root]
+    level = [root]
+    for _ in range(spec.depth):
+        level = [d / f"d{i}" for d in level for i in range(spec.fanout)]
+        dirs.extend(level)
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+
+    exts = list(MIXES[spec.mix])
+    weights = list(MIXES[spec.mix].values())
+    now = time.time()
+    payload = b"\0" * spec.max_size
+    for i in range(spec.files):
+        d = dirs[rnd.randrange(len(dirs))]
+        ext = rnd.choices(exts, weights)[0]
+        path = d / f"f{i:07d}{ext}"
+        with open(path, "wb") as f:
+            f.write(payload[:rnd.randint(0, spec.max_size)])
+        if spec.age_dist == "recent":
+            age = min(rnd.expovariate(5.0 / spec.max_age_days), spec.max_age_days)
+        else:
+            age = rnd.uniform(0, spec.max_age_days)
+        ts = now - age * 86400
+        os.utime(path, (ts, ts))
+    return spec.files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un árbol de archivos sintético.")
+    parser.add_argument("root", type=Path, help="Carpeta destino")
+    parser.add_argument("--files", type=int, default=DEFAULTS.files)
+    parser.add_argument("--depth", type=int, default=DEFAULTS.depth)
+    parser.add_argument("--fanout", type=int, default=DEFAULTS.fanout)
+    parser.add_argument("--mix", choices=sorted(MIXES), default=DEFAULTS.mix)
+    parser.add_argument("--max-age-days", type=float, default=DEFAULTS.max_age_days)
+    parser.add_argument("--age-dist", choices=AGE_DISTS, default=DEFAULTS.age_dist)
+    parser.add_argument("--max-size", type=int, default=DEFAULTS.max_size)
+    parser.add_argument("--seed", type=int, default=DEFAULTS.seed)
+    args = parser.parse_args()
+    spec = TreeSpec(args.files, args.depth, args.fanout, args.mix,
+                    args.max_age_days, args.age_dist, args.max_size, args.seed)
+    n = generate_tree(args.root, spec)
+    print(f"{n} archivos creados en {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+dest_index.py
+Nombres ya presentes en las carpetas destino, en memoria.
+
+Cada carpeta destino se lista una sola vez (o se crea, si no existía) y
+sus nombres se guardan en un set que se actualiza con cada movimiento
+reservado. Así las colisiones se resuelven sin un exists() por archivo:
+si el nombre está ocupado se prueba 'nombre_1.ext', 'nombre_2.ext', ...
+de forma determinista.
+
+place() añade la comparación por contenido para los renombradores: ante
+una colisión compara tamaño, luego hash de cabeza y cola y por último el
+hash completo, y distingue un duplicado real de otro archivo con el mismo
+nombre. Los hashes de lo ya colocado se guardan por carpeta, así que una
+importación con muchas colisiones no relee los mismos archivos.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Dict, List, Set, Tuple
+
+from duplicates import PARTIAL_BYTES, full_hash, partial_hash
+from run_stats import NULL_STATS
+
+
+def suffixed(name: str, n: int) -> str:
+    """'foto.jpg', 2 -> 'foto_2.jpg'."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_{n}{ext}"
+
+
+class DestinationIndex:
+    def __init__(self, create: bool = True, stats=NULL_STATS) -> None:
+        self.create = create  # False en simulación: no se crean carpetas
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._names: Dict[str, Set[str]] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._missing: Set[str] = set()  # carpetas que aún no existen en disco
+        # carpeta -> nombre -> [tamaño, hash parcial, hash completo] (perezosos)
+        self._content: Dict[str, Dict[str, List]] = {}
+
+    def _load(self, folder: str) -> Set[str]:
+        """Nombres de 'folder' (llamar con el lock tomado)."""
+        names = self._names.get(folder)
+        if names is None:
+            self.stats.count("listdir")
+            try:
+                self._mtimes[folder] = os.stat(folder).st_mtime_ns
+                names = {os.path.normcase(n) for n in os.listdir(folder)}
+            except FileNotFoundError:
+                names = set()
+                self._missing.add(folder)
+            self._names[folder] = names
+        return names
+
+    # ....................................................................... #
+    # Para procesos de larga duración (--watch): detectar cambios ajenos.
+    def revalidate(self) -> None:
+        """Olvida las carpetas que alguien modificó desde la última foto."""
+        with self._lock:
+            for folder in list(self._names):
+                try:
+                    mtime_ns = os.stat(folder).st_mtime_ns
+                except OSError:
+                    mtime_ns = None
+                if mtime_ns is None or mtime_ns != self._mtimes.get(folder):
+                    del self._names[folder]
+                    self._content.pop(folder, None)
+                    self._mtimes.pop(folder, None)
+                    self._missing.discard(folder)
+
+    def snapshot(self) -> None:
+        """Toma como propios los cambios hechos hasta ahora (tras un lote)."""
+        with self._lock:
+            for folder in self._names:
+                try:
+                    self._mtimes[folder] = os.stat(folder).st_mtime_ns
+                except OSError:
+                    self._mtimes.pop(folder, None)
+
+    def reserve(self, folder: str, name: str) -> str:
+        """Ruta libre para 'name' en 'folder', añadiendo un sufijo si hace falta.
+
+        El nombre queda ocupado hasta que se llame a release().
+        """
+        with self._lock:
+            names = self._load(folder)
+            candidate, n = name, 0
+            while os.path.normcase(candidate) in names:
+                n += 1
+                candidate = suffixed(name, n)
+            names.add(os.path.normcase(candidate))
+        if n:
+            logging.debug("Ya existe %s en %s: se usará %s", name, folder, candidate)
+        return os.path.join(folder, candidate)
+
+    def place(self, folder: str, name: str, src: str, size: int) -> Tuple[str, bool]:
+        """Como reserve(), pero distinguiendo duplicados de simples colisiones.
+
+        Devuelve (ruta, duplicado). Si 'src' es idéntico al archivo que ocupa
+        'name' o alguno de sus sufijos, devuelve esa ruta y True y no reserva
+        nada; si no, reserva el primer nombre libre.
+
+        El nombre libre se reserva con el lock tomado y los hashes se
+        calculan después, sin él: una colisión con un archivo grande no
+        frena al resto de hilos.
+        """
+        mine = [size, None, None]
+        with self._lock:
+            names = self._load(folder)
+            content = self._content.setdefault(folder, {})
+            occupied: List[str] = []
+            candidate, n = name, 0
+            while os.path.normcase(candidate) in names:
+                occupied.append(candidate)
+                n += 1
+                candidate = suffixed(name, n)
+            names.add(os.path.normcase(candidate))
+            content[os.path.normcase(candidate)] = mine
+        reserved = os.path.join(folder, candidate)
+        for other in occupied:
+            occupant = os.path.join(folder, other)
+            if self._same_content(content, occupant, src, mine):
+                self.release(reserved)
+                return occupant, True
+        if n:
+            logging.debug("Ya existe %s en %s con otro contenido: se usará %s", name, folder, candidate)
+        return reserved, False
+
+    def _same_content(self, content: Dict[str, List], occupant: str, src: str, mine: List) -> bool:
+        """Compara por etapas; cada hash se calcula una sola vez por archivo.
+
+        Se llama sin el lock: dos hilos pueden llegar a calcular el mismo
+        hash, pero el resultado es el mismo y solo se guarda una vez.
+        """
+        key = os.path.normcase(os.path.basename(occupant))
+        theirs = content.get(key)
+        if theirs is None:
+            try:
+                record = [os.stat(occupant).st_size, None, None]
+            except OSError:
+                return False
+            self.stats.count("stat")
+            with self._lock:
+                theirs = content.setdefault(key, record)
+        if theirs[0] != mine[0]:
+            return False
+        # Hasta 2 * PARTIAL_BYTES el hash parcial ya lee el archivo entero:
+        # es el hash completo y no hace falta una segunda lectura.
+        whole = mine[0] <= 2 * PARTIAL_BYTES
+        for stage in (1, 2):
+            for record, path in ((theirs, occupant), (mine, src)):
+                if record[stage] is not None:
+                    continue
+                if stage == 2 and whole:
+                    record[2] = record[1]
+                else:
+                    record[stage] = partial_hash((path, mine[0])) if stage == 1 else full_hash(path)
+                    self.stats.count("hash")
+            if theirs[stage] is None or theirs[stage] != mine[stage]:
+                return False
+        return True
+
+    def release(self, path: str) -> None:
+        """Libera un nombre reservado cuyo movimiento no llegó a hacerse."""
+        folder, name = os.path.split(path)
+        with self._lock:
+            self._names.get(folder, set()).discard(os.path.normcase(name))
+            self._content.get(folder, {}).pop(os.path.normcase(name), None)
+
+    def ensure_dir(self, folder: str) -> bool:
+        """Crea 'folder' si al listarla no existía; True si se creó ahora."""
+        with self._lock:
+            self._load(folder)
+            if folder not in self._missing or not self.create:
+                return False
+            os.makedirs(folder, exist_ok=True)
+            self._missing.discard(folder)
+        self.stats.count("mkdir")
+        return True
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+dir_watch.py
+Vigilancia de carpetas para el modo --watch de file_organizer.
+
+- En Linux se usa inotify (vía ctypes, sin dependencias): el coste es
+  proporcional a los eventos, no al tamaño de la carpeta.
+- En otros sistemas, o si inotify no está disponible, se sondea el mtime
+  de cada carpeta vigilada y solo se vuelven a listar las que cambiaron.
+- Debouncer retiene cada archivo nuevo hasta que lleva 'settle' segundos
+  sin cambios, y descarta los temporales de descarga (.part, .crdownload...),
+  que llegan con su nombre definitivo al renombrarse.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import stat
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastwalk import FileEntry
+
+DEFAULT_SETTLE = 2.0      # segundos sin cambios antes de mover un archivo
+DEFAULT_POLL_INTERVAL = 5.0
+TEMP_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".opdownload", ".tmp")
+
+Event = Tuple[str, bool]  # (ruta, es_carpeta)
+
+
+def is_temporary(name: str) -> bool:
+    """Archivos a medio escribir por navegadores y gestores de descargas."""
+    return name.lower().endswith(TEMP_SUFFIXES) or name.startswith(".~lock.")
+
+# --------------------------------------------------------------------------- #
+# inotify
+# --------------------------------------------------------------------------- #
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_BYTES = 64 * 1024
+
+
+class InotifyWatcher:
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify no disponible")
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}
+        self.overflowed = False
+
+    def add(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            logging.warning("No se puede vigilar %s: %s", directory, os.strerror(err))
+            return
+        self._dirs[wd] = directory
+
+    def read(self, timeout: Optional[float]) -> List[Event]:
+        """Eventos llegados en 'timeout' segundos (None = esperar indefinidamente)."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, READ_BYTES)
+        except BlockingIOError:
+            return []
+        events: List[Event] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]  # la carpeta se borró o se desmontó
+                continue
+            if name:
+                events.append((os.path.join(directory, os.fsdecode(name)), bool(mask & IN_ISDIR)))
+        return events
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+# --------------------------------------------------------------------------- #
+# Sondeo
+# --------------------------------------------------------------------------- #
+class PollingWatcher:
+    """Alternativa portable: relista solo las carpetas cuyo mtime cambió."""
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.interval = interval
+        self._dirs: Dict[str, Tuple[int, Set[str]]] = {}
+        self.overflowed = False
+
+    @staticmethod
+    def _snapshot(directory: str) -> Optional[Tuple[int, Set[str]]]:
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            return mtime_ns, set(os.listdir(directory))
+        except OSError:
+            return None
+
+    def add(self, directory: str) -> None:
+        snap = self._snapshot(directory)
+        if snap is not None:
+            self._dirs[directory] = snap
+
+    def read(self, timeout: Optional[float]) -> List[Event]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        events: List[Event] = []
+        for directory, (mtime_ns, names) in list(self._dirs.items()):
+            try:
+                if os.stat(directory).st_mtime_ns == mtime_ns:
+                    continue
+            except OSError:
+                del self._dirs[directory]
+                continue
+            snap = self._snapshot(directory)
+            if snap is None:
+                continue
+            self._dirs[directory] = snap
+            for name in snap[1] - names:
+                path = os.path.join(directory, name)
+                events.append((path, os.path.isdir(path)))
+        return events
+
+    def close(self) -> None:
+        self._dirs.clear()
+
+
+def open_watcher(poll: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+    """InotifyWatcher si se puede; si no, PollingWatcher."""
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as exc:
+            logging.info("inotify no disponible (%s): se sondeará cada %.0fs.", exc, interval)
+    return PollingWatcher(interval)
+
+# --------------------------------------------------------------------------- #
+# Debounce
+# --------------------------------------------------------------------------- #
+class Debouncer:
+    """Retiene los archivos hasta que dejan de cambiar durante 'settle' segundos."""
+
+    def __init__(self, settle: float = DEFAULT_SETTLE) -> None:
+        self.settle = settle
+        self._pending: Dict[str, float] = {}  # ruta -> instante del último evento
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, paths: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            if not is_temporary(os.path.basename(path)):
+                self._pending[path] = now
+
+    def next_timeout(self, now: Optional[float] = None) -> Optional[float]:
+        """Segundos hasta que vence el primer archivo pendiente (None si no hay)."""
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self._pending.values()) + self.settle - now)
+
+    def ready(self, now: Optional[float] = None) -> List[FileEntry]:
+        """Archivos estables; los que siguen cambiando vuelven a esperar."""
+        now = time.monotonic() if now is None else now
+        wall = time.time()
+        out: List[FileEntry] = []
+        for path, last in list(self._pending.items()):
+            if now - last < self.settle:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]  # ya no está (borrado o movido)
+                continue
+            if wall - st.st_mtime < self.settle:
+                # Se sigue escribiendo sin que lleguen eventos: esperar otro poco.
+                self._pending[path] = now
+                continue
+            del self._pending[path]
+            if stat.S_ISREG(st.st_mode):
+                out.append(FileEntry(path, os.path.basename(path), st.st_size, st.st_mtime,
+                                     mtime_ns=st.st_mtime_ns))
+        return out
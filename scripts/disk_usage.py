@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+disk_usage.py
+Agregados de uso de disco para 'file_cleaner.py analyze'.
+
+Se alimenta con los DirListing de fastwalk (un listado por carpeta, en
+cualquier orden) y solo guarda contadores: por carpeta, por extensión, por
+tramo de antigüedad y por patrón de limpieza. La memoria crece con el
+número de carpetas y extensiones, no con el de archivos.
+
+Los totales de cada subárbol se calculan al final sumando cada carpeta a
+su padre, de las más profundas a la raíz.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from fastwalk import DirListing
+
+# Límites de los tramos de antigüedad, en días
+AGE_BUCKETS = (7, 30, 90, 365)
+AGE_LABELS = ("< 7 días", "7-30 días", "30-90 días", "90 días-1 año", "> 1 año")
+NO_EXTENSION = "(sin extensión)"
+
+
+class Usage(NamedTuple):
+    key: str
+    files: int
+    bytes: int
+
+
+class PatternUsage(NamedTuple):
+    pattern: str
+    files: int
+    bytes: int
+    old_files: int  # lo que limpiaría 'clean': antigüedad y tamaño máximo
+    old_bytes: int
+
+
+class DiskUsage:
+    """Contadores compactos de un recorrido.
+
+    'match_pattern(nombre)' devuelve el patrón de limpieza que atribuye el
+    archivo (el primero que coincide) o None; 'excluded(nombre)' aplica las
+    exclusiones de la configuración.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        match_pattern: Callable[[str], Optional[str]],
+        excluded: Callable[[str], bool] = lambda name: False,
+        min_days: float = 0,
+        max_bytes: int = 0,
+        now: Optional[float] = None,
+    ) -> None:
+        self.root = root
+        self.match_pattern = match_pattern
+        self.excluded = excluded
+        self.now = time.time() if now is None else now
+        self.cutoff = self.now - min_days * 86400
+        self.max_bytes = max_bytes  # 0 = sin límite, como max_size_kb del limpiador
+        # carpeta -> [bytes propios, archivos propios, bytes subárbol, archivos subárbol]
+        self._dirs: Dict[str, List[int]] = {}
+        self._ext: Dict[str, List[int]] = {}
+        self._age = [[0, 0] for _ in AGE_LABELS]
+        self._patterns: Dict[str, List[int]] = {}
+        self._rolled = False
+        self.files = 0
+        self.bytes = 0
+        self.clean_files = 0  # lo que tomaría 'clean' con estas reglas
+        self.clean_bytes = 0
+
+    def add(self, listing: DirListing) -> None:
+        """Suma los archivos de una carpeta (sin recorrer sus subcarpetas)."""
+        own_bytes = 0
+        ext_counts = self._ext
+        age = self._age
+        for entry in listing.files:
+            size = entry.size
+            own_bytes += size
+            ext = os.path.splitext(entry.name)[1].lower() or NO_EXTENSION
+            counts = ext_counts.get(ext)
+            if counts is None:
+                counts = ext_counts[ext] = [0, 0]
+            counts[0] += 1
+            counts[1] += size
+            bucket = age[bisect_right(AGE_BUCKETS, (self.now - entry.mtime) / 86400)]
+            bucket[0] += 1
+            bucket[1] += size
+            pattern = self.match_pattern(entry.name)
+            if pattern is None and not self.max_bytes:
+                continue
+            if self.excluded(entry.name):
+                continue
+            old = entry.mtime < self.cutoff and not (self.max_bytes and size > self.max_bytes)
+            if old:
+                # Mismo criterio que Cleaner._is_candidate: con tamaño máximo
+                # entra cualquier archivo pequeño, coincida o no con un patrón.
+                self.clean_files += 1
+                self.clean_bytes += size
+            if pattern is not None:
+                counts = self._patterns.get(pattern)
+                if counts is None:
+                    counts = self._patterns[pattern] = [0, 0, 0, 0]
+                counts[0] += 1
+                counts[1] += size
+                if old:
+                    counts[2] += 1
+                    counts[3] += size
+        n = len(listing.files)
+        self._dirs[listing.path] = [own_bytes, n, own_bytes, n]
+        self.files += n
+        self.bytes += own_bytes
+        self._rolled = False
+
+    @property
+    def dirs(self) -> int:
+        return len(self._dirs)
+
+    def _roll_up(self) -> None:
+        """Acumula cada carpeta en su padre, de las más profundas a la raíz."""
+        if self._rolled:
+            return
+        dirs = self._dirs
+        for counts in dirs.values():
+            counts[2], counts[3] = counts[0], counts[1]
+        for path in sorted(dirs, key=lambda p: p.count(os.sep), reverse=True):
+            if path == self.root:
+                continue
+            parent = dirs.get(os.path.dirname(path))
+            if parent is not None:
+                counts = dirs[path]
+                parent[2] += counts[2]
+                parent[3] += counts[3]
+        self._rolled = True
+
+    # ....................................................................... #
+    def top_dirs(self, n: int, max_depth: int = 0) -> List[Usage]:
+        """Los 'n' subárboles más pesados (sin contar la raíz).
+
+        Con max_depth > 0 solo se consideran carpetas hasta esa profundidad
+        bajo la raíz.
+        """
+        self._roll_up()
+        base = self.root.rstrip(os.sep).count(os.sep)
+        candidates = (
+            Usage(path, counts[3], counts[2]) for path, counts in self._dirs.items()
+            if path != self.root and (max_depth <= 0 or path.count(os.sep) - base <= max_depth)
+        )
+        return heapq.nlargest(n, candidates, key=lambda u: u.bytes)
+
+    def by_extension(self, n: int) -> List[Usage]:
+        return heapq.nlargest(n, (Usage(ext, c[0], c[1]) for ext, c in self._ext.items()),
+                              key=lambda u: u.bytes)
+
+    def by_age(self) -> List[Usage]:
+        return [Usage(label, c[0], c[1]) for label, c in zip(AGE_LABELS, self._age)]
+
+    def by_pattern(self) -> List[PatternUsage]:
+        """Espacio por patrón de limpieza, de mayor a menor recuperable."""
+        rows = [PatternUsage(p, *c) for p, c in self._patterns.items()]
+        rows.sort(key=lambda r: (r.old_bytes, r.bytes), reverse=True)
+        return rows
+
+    def report(self, top: int, max_depth: int = 0) -> Dict:
+        """Informe completo como dict (para --json)."""
+        return {
+            "root": self.root,
+            "files": self.files,
+            "bytes": self.bytes,
+            "dirs": self.dirs,
+            "top_dirs": [u._asdict() for u in self.top_dirs(top, max_depth)],
+            "extensions": [u._asdict() for u in self.by_extension(top)],
+            "age": [u._asdict() for u in self.by_age()],
+            "patterns": [p._asdict() for p in self.by_pattern()],
+            "clean": {"files": self.clean_files, "bytes": self.clean_bytes},
+        }
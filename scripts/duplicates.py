@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+duplicates.py
+Detección de archivos duplicados por etapas para file_cleaner.
+
+1. Agrupa por tamaño (gratis: el tamaño ya viene del recorrido) y deja
+   un solo nombre por inodo: los enlaces duros no son copias, borrarlos
+   no libera espacio.
+2. Entre los que coinciden, hash de los primeros y últimos 64 KB.
+3. Solo los que siguen coincidiendo se leen enteros (mmap por tramos).
+
+Las etapas 2 y 3 se reparten en un pool de procesos.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastwalk import FileEntry
+
+PARTIAL_BYTES = 64 * 1024
+CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_PROCS = os.cpu_count() or 1
+
+
+class DuplicateGroup(NamedTuple):
+    size: int
+    files: List[FileEntry]  # el primero es el que se conserva
+
+    @property
+    def reclaimable(self) -> int:
+        return self.size * (len(self.files) - 1)
+
+
+# --------------------------------------------------------------------------- #
+# Hashes (se ejecutan en procesos hijos: funciones de módulo)
+# --------------------------------------------------------------------------- #
+def partial_hash(task: Tuple[str, int]) -> Optional[bytes]:
+    """Hash de cabeza y cola; si el archivo cabe entero, es su hash completo."""
+    path, size = task
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            if size <= 2 * PARTIAL_BYTES:
+                h.update(f.read())
+            else:
+                h.update(f.read(PARTIAL_BYTES))
+                f.seek(-PARTIAL_BYTES, os.SEEK_END)
+                h.update(f.read(PARTIAL_BYTES))
+    except OSError:
+        return None
+    return h.digest()
+
+
+def full_hash(path: str) -> Optional[bytes]:
+    """Hash del archivo completo vía mmap; lectura por bloques si no se puede."""
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    view = memoryview(m)
+                    for off in range(0, len(m), CHUNK_BYTES):
+                        h.update(view[off:off + CHUNK_BYTES])
+                    view.release()
+            except (ValueError, OSError):
+                f.seek(0)
+                for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                    h.update(chunk)
+    except OSError:
+        return None
+    return h.digest()
+
+
+# --------------------------------------------------------------------------- #
+# Pipeline
+# --------------------------------------------------------------------------- #
+def _regroup(groups: List[List[FileEntry]], digests: Iterable[Optional[bytes]]) -> List[List[FileEntry]]:
+    """Subdivide cada grupo según su hash y descarta los que quedan solos."""
+    it = iter(digests)
+    out = []
+    for group in groups:
+        by_hash: Dict[bytes, List[FileEntry]] = defaultdict(list)
+        for entry in group:
+            digest = next(it)
+            if digest is not None:
+                by_hash[digest].append(entry)
+        out.extend(g for g in by_hash.values() if len(g) > 1)
+    return out
+
+
+def _collapse_links(groups: List[List[FileEntry]]) -> Tuple[List[List[FileEntry]], int]:
+    """Un nombre por (dispositivo, inodo) en cada grupo; devuelve también los enlaces quitados.
+
+    Solo se hace stat de los que comparten tamaño con otro archivo.
+    """
+    out = []
+    links = 0
+    for group in groups:
+        by_inode: Dict[Tuple[int, int], FileEntry] = {}
+        for entry in group:
+            try:
+                st = os.stat(entry.path)
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            known = by_inode.get(key)
+            if known is None:
+                by_inode[key] = entry
+                continue
+            links += 1
+            if (len(entry.path), entry.path) < (len(known.path), known.path):
+                by_inode[key] = entry
+        if len(by_inode) > 1:
+            out.append(list(by_inode.values()))
+    return out, links
+
+
+def find_duplicates(
+    entries: Iterable[FileEntry],
+    min_size: int = 1,
+    procs: int = DEFAULT_PROCS,
+) -> List[DuplicateGroup]:
+    """Devuelve los grupos de duplicados, de mayor a menor espacio recuperable."""
+    by_size: Dict[int, List[FileEntry]] = defaultdict(list)
+    for entry in entries:
+        if entry.size >= min_size:
+            by_size[entry.size].append(entry)
+    groups = [g for g in by_size.values() if len(g) > 1]
+    del by_size
+    groups, links = _collapse_links(groups)
+    if links:
+        logging.info("Enlaces duros ignorados: %d (mismo inodo que otro archivo).", links)
+    logging.info("Duplicados por tamaño: %d grupos, %d archivos.",
+                 len(groups), sum(len(g) for g in groups))
+
+    with ProcessPoolExecutor(max_workers=max(1, procs)) as pool:
+        tasks = [(e.path, e.size) for g in groups for e in g]
+        groups = _regroup(groups, pool.map(partial_hash, tasks, chunksize=64))
+        logging.info("Tras hash parcial: %d grupos.", len(groups))
+
+        # Los archivos pequeños ya se leyeron enteros en la etapa anterior.
+        small = [g for g in groups if g[0].size <= 2 * PARTIAL_BYTES]
+        large = [g for g in groups if g[0].size > 2 * PARTIAL_BYTES]
+        paths = [e.path for g in large for e in g]
+        large = _regroup(large, pool.map(full_hash, paths, chunksize=4))
+        logging.info("Tras hash completo: %d grupos.", len(small) + len(large))
+
+    result = [
+        # Se conserva el más antiguo (a igualdad, la ruta más corta).
+        DuplicateGroup(g[0].size, sorted(g, key=lambda e: (e.mtime, len(e.path), e.path)))
+        for g in small + large
+    ]
+    result.sort(key=lambda g: g.reclaimable, reverse=True)
+    return result
@@ -9,14 +9,28 @@ Requisitos: Python ≥3.7  (pip install colorama opcional)
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import logging
 import os
+import queue
+import re
 import shutil
+import stat
 import sys
+import threading
 import time
+from fnmatch import fnmatch, translate
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from disk_usage import DiskUsage
+from duplicates import DEFAULT_PROCS, find_duplicates
+from fastwalk import DEFAULT_WORKERS, FileEntry, iter_files, list_dir, walk
+from log_output import NULL_OUTPUT, add_output_args, start_output
+from quarantine import QUARANTINE_DIRNAME, Quarantine
+from run_stats import NULL_STATS, from_args as stats_from_args
+from scan_index import ScanIndex
 
 try:
     from colorama import Fore, Style, init as colorama_init  # type: ignore
@@ -36,8 +50,12 @@ DEFAULT_PATTERNS = [
     "Thumbs.db", ".DS_Store", ".thumb"
 ]
 DEFAULT_EXCLUDE: List[str] = []
+DEFAULT_SKIP_FOLDERS: List[str] = []
 DEFAULT_MIN_DAYS = 7
 DEFAULT_MAX_SIZE_KB = 0  # 0 = sin límite de tamaño
+DEFAULT_BATCH_SIZE = 256
+PROGRESS_EVERY = 10_000  # archivos entre mensajes de progreso en streaming
+EVICT_KEYS = ("age", "size")
 
 # --------------------------------------------------------------------------- #
 # LOGGING
@@ -66,34 +84,77 @@ def size_in_kb(path: Path) -> float:
     """Devuelve tamaño en KB."""
     return path.stat().st_size / 1024
 
+def parse_size(text: str) -> int:
+    """Convierte '10G', '500M', '1.5T' o '2048' en bytes (base 1024)."""
+    units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)B?\s*", text.upper())
+    if not m:
+        raise argparse.ArgumentTypeError(f"Tamaño no válido: {text!r}")
+    return int(float(m.group(1)) * units[m.group(2)])
+
+def human_size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
 def matches_any(name: str, patterns: List[str]) -> bool:
     """True si 'name' coincide con algún patrón glob."""
-    from fnmatch import fnmatch
     return any(fnmatch(name, pat) for pat in patterns)
 
-def build_restore_script(files: List[Path], base: Path) -> Path:
-    """Genera .sh / .bat para restaurar archivos borrados."""
-    ts = int(time.time())
-    ext = "bat" if os.name == "nt" else "sh"
-    script_path = base / f"restore_{ts}.{ext}"
-
-    lines = []
-    if ext == "sh":
-        lines.append("#!/bin/bash")
-        for f in files:
-            dest = f.parent
-            lines.append(f'mkdir -p "{dest}" && mv "{f}.bak" "{f}"')
-    else:
-        for f in files:
-            dest = f.parent
-            lines.append(f'if not exist "{dest}" mkdir "{dest}"')
-            lines.append(f'move /y "{f}.bak" "{f}"')
+_GLOB_CHARS = frozenset("*?[")
+
+class PatternSet:
+    """Conjunto de patrones glob compilado una sola vez.
+
+    Equivale a 'matches_any' pero resuelve por hash los nombres exactos
+    ("Thumbs.db") y los sufijos literales ("*.log", "*~"); el resto de
+    globs se combina en una única expresión regular.
+    """
 
-    script_path.write_text("\n".join(lines), encoding="utf-8")
-    if ext == "sh":
-        os.chmod(script_path, 0o755)
-    logging.info("Script de restauración: %s", script_path)
-    return script_path
+    def __init__(self, patterns: List[str]) -> None:
+        self.patterns = list(patterns)
+        self._names: set[str] = set()
+        self._suffixes: set[str] = set()
+        globs: List[str] = []
+        for pat in self.patterns:
+            norm = os.path.normcase(pat)
+            if not _GLOB_CHARS.intersection(norm):
+                self._names.add(norm)
+            elif len(norm) > 1 and norm[0] == "*" and not _GLOB_CHARS.intersection(norm[1:]):
+                self._suffixes.add(norm[1:])
+            else:
+                globs.append(norm)
+        self._suffix_lens = sorted({len(s) for s in self._suffixes})
+        self._regex = (
+            re.compile("|".join(translate(g) for g in globs)).match if globs else None
+        )
+
+    def match(self, name: str) -> bool:
+        name = os.path.normcase(name)
+        if name in self._names:
+            return True
+        suffixes = self._suffixes
+        for n in self._suffix_lens:
+            if name[-n:] in suffixes:
+                return True
+        return self._regex is not None and self._regex(name) is not None
+
+def pattern_matcher(patterns: List[str]):
+    """Función nombre -> primer patrón que coincide (o None).
+
+    El PatternSet conjunto descarta de una vez la gran mayoría de nombres;
+    solo los que coinciden se prueban patrón a patrón.
+    """
+    combined = PatternSet(patterns)
+    single = [(pat, PatternSet([pat])) for pat in patterns]
+
+    def match(name: str) -> Optional[str]:
+        if not combined.match(name):
+            return None
+        return next((pat for pat, ps in single if ps.match(name)), None)
+    return match
 
 # --------------------------------------------------------------------------- #
 # CLASE PRINCIPAL
@@ -107,7 +168,18 @@ class Cleaner:
         min_days: int = DEFAULT_MIN_DAYS,
         max_size_kb: float = DEFAULT_MAX_SIZE_KB,
         dry_run: bool = True,
-        interactive: bool = False
+        interactive: bool = False,
+        skip_folders: List[str] = None,
+        workers: int = DEFAULT_WORKERS,
+        index: Optional[ScanIndex] = None,
+        stream: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        target_free: int = 0,
+        target_size: int = 0,
+        evict_by: str = "age",
+        purge_now: bool = False,
+        stats=NULL_STATS,
+        output=NULL_OUTPUT
     ) -> None:
         self.folder = folder.expanduser().resolve()
         self.patterns = patterns or DEFAULT_PATTERNS
@@ -116,28 +188,171 @@ class Cleaner:
         self.max_size_kb = max_size_kb
         self.dry_run = dry_run
         self.interactive = interactive
-        self.to_delete: List[Path] = []
-        self.deleted: List[Path] = []
+        # La cuarentena vive dentro de la carpeta: nunca se escanea.
+        self.skip_folders = list(skip_folders or DEFAULT_SKIP_FOLDERS) + [QUARANTINE_DIRNAME]
+        self.workers = workers
+        self.index = index
+        self.stream = stream
+        self.batch_size = batch_size
+        self.target_free = target_free
+        self.target_size = target_size
+        self.evict_by = evict_by
+        self.purge_now = purge_now
+        self.stats = stats
+        self.output = output
+        self._patterns = PatternSet(self.patterns)
+        self._exclude = PatternSet(self.exclude)
+        self.quarantine = Quarantine(self.folder)
+        self.to_delete: List[FileEntry] = []
+        self.deleted: List[FileEntry] = []
+        self.deleted_count = 0
+        self.deleted_bytes = 0
+        self._stats_lock = threading.Lock()
 
     # ....................................................................... #
     def scan(self) -> None:
         """Llena la lista de archivos a borrar según filtros."""
+        with self.stats.phase("scan"):
+            self.to_delete.extend(self.iter_candidates())
+        # El recorrido paralelo no garantiza orden: se ordena para que la
+        # salida sea la misma con cualquier número de hilos.
+        self.to_delete.sort()
+        logging.info("Archivos a borrar: %d", len(self.to_delete))
+
+    def iter_candidates(self) -> Iterator[FileEntry]:
+        """Genera, sin acumularlos, los archivos que cumplen los filtros."""
+        return (entry for entry, ok in self._iter_classified() if ok)
+
+    def _iter_classified(self) -> Iterator[Tuple[FileEntry, bool]]:
+        """Recorre la carpeta y marca cada archivo como candidato o no."""
         now = time.time()
         cutoff = now - (self.min_days * 86400)
 
-        for item in self.folder.rglob("*"):
-            if not item.is_file():
-                continue
-            if matches_any(item.name, self.exclude):
-                continue
-            if not matches_any(item.name, self.patterns) and self.max_size_kb <= 0:
-                continue
-            if item.stat().st_mtime < cutoff:
-                if self.max_size_kb > 0 and size_in_kb(item) > self.max_size_kb:
+        lister = self.stats.wrap_lister(self.index.lister if self.index else list_dir)
+        timing = self.stats.enabled
+        match_time = 0.0
+        files = 0
+        for entry in iter_files(str(self.folder), self.skip_folders, self.workers, lister):
+            if timing:
+                files += 1
+                t0 = time.perf_counter()
+            named = self._name_matches(entry)
+            if timing:
+                match_time += time.perf_counter() - t0
+            if named and entry.cached:
+                # El tamaño y el mtime del índice pueden estar desfasados en
+                # ambos sentidos (truncar un archivo o atrasar su mtime no
+                # cambia su carpeta): todo lo que pasa los patrones se
+                # confirma con un stat antes de aplicar tamaño y antigüedad.
+                self.stats.count("stat")
+                fresh = self._refresh(entry)
+                if fresh is None:
                     continue
-                self.to_delete.append(item)
+                entry = fresh
+            if timing:
+                t0 = time.perf_counter()
+            ok = named and self._within_limits(entry, cutoff)
+            if timing:
+                match_time += time.perf_counter() - t0
+            yield entry, ok
 
-        logging.info("Archivos a borrar: %d", len(self.to_delete))
+        if self.index:
+            self.index.commit()
+        self.stats.add_time("match", match_time)
+        self.stats.add_files(files)
+
+    # ....................................................................... #
+    def select_target(self) -> List[FileEntry]:
+        """Elige qué borrar para cumplir --target-free / --target-size.
+
+        Ambos modos se reducen a liberar 'need' bytes. Los candidatos pasan
+        por un heap que solo guarda la selección en curso: se desaloja lo
+        que sobra en cuanto el resto cubre 'need', así que el heap nunca
+        suma más de 'need' bytes más un archivo. Se borra primero lo más
+        antiguo (o lo más grande con evict_by="size").
+
+        Con --target-size, 'need' depende de lo que ocupa toda la carpeta:
+        una primera pasada suma candidatos y no candidatos (sin guardar
+        nada) y la segunda hace la selección.
+        """
+        # Prioridad: menor = se borra antes.
+        if self.evict_by == "size":
+            prio = lambda e: -e.size  # noqa: E731
+        else:
+            prio = lambda e: e.mtime  # noqa: E731
+
+        with self.stats.phase("select"):
+            return self._select_target(prio)
+
+    def _select_target(self, prio) -> List[FileEntry]:
+        if self.target_free:
+            need = self.target_free - shutil.disk_usage(self.folder).free
+            if need <= 0:
+                logging.info("Ya hay %s libres: nada que hacer.", human_size(self.target_free - need))
+                return []
+        else:
+            candidates = other = 0
+            for entry, ok in self._iter_classified():
+                if ok:
+                    candidates += entry.size
+                else:
+                    other += entry.size
+            if other > self.target_size:
+                logging.warning("Los archivos no candidatos ya ocupan %s: no se alcanza %s.",
+                                human_size(other), human_size(self.target_size))
+            need = candidates - max(0, self.target_size - other)
+            if need <= 0:
+                logging.info("La carpeta ocupa %s: ya cumple %s.",
+                             human_size(candidates + other), human_size(self.target_size))
+                return []
+
+        # El heap guarda la selección; en la cima está el candidato menos
+        # prioritario, que sobra en cuanto el resto cubre 'need'.
+        heap: List[Tuple[float, int, FileEntry]] = []
+        total = 0
+        for seq, entry in enumerate(self.iter_candidates()):
+            heapq.heappush(heap, (-prio(entry), seq, entry))
+            total += entry.size
+            while total - heap[0][2].size >= need:
+                total -= heapq.heappop(heap)[2].size
+        selected = [item[2] for item in heap]
+        if total < need:
+            logging.warning("Solo se pueden liberar %s de %s.", human_size(total), human_size(need))
+
+        selected.sort(key=prio)
+        logging.info("Archivos a borrar: %d (%s)", len(selected),
+                     human_size(sum(e.size for e in selected)))
+        return selected
+
+    # ....................................................................... #
+    def _is_candidate(self, entry: FileEntry, cutoff: float) -> bool:
+        """Aplica exclusiones, patrones, antigüedad y tamaño a una entrada."""
+        return self._name_matches(entry) and self._within_limits(entry, cutoff)
+
+    def _name_matches(self, entry: FileEntry) -> bool:
+        """Exclusiones y patrones: solo dependen del nombre, no del stat."""
+        if self._exclude.match(entry.name):
+            return False
+        return self.max_size_kb > 0 or self._patterns.match(entry.name)
+
+    def _within_limits(self, entry: FileEntry, cutoff: float) -> bool:
+        """Antigüedad y tamaño: con datos del índice, solo tras un stat."""
+        if entry.mtime >= cutoff:
+            return False
+        return not (self.max_size_kb > 0 and entry.size / 1024 > self.max_size_kb)
+
+    def _refresh(self, entry: FileEntry) -> Optional[FileEntry]:
+        """Vuelve a hacer stat de una entrada cacheada; None si ya no es un archivo."""
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if (st.st_size, st.st_mtime) != (entry.size, entry.mtime):
+            self.index.update_file(entry.path, st.st_size, st.st_mtime)
+        return entry._replace(size=st.st_size, mtime=st.st_mtime, cached=False,
+                              mtime_ns=st.st_mtime_ns)
 
     # ....................................................................... #
     def run(self) -> None:
@@ -145,7 +360,15 @@ class Cleaner:
             logging.error("La carpeta %s no existe.", self.folder)
             return
 
-        self.scan()
+        if self.target_free or self.target_size:
+            # El modo objetivo necesita ver todos los candidatos antes de
+            # decidir: --stream no aplica.
+            self.to_delete = self.select_target()
+        elif self.stream:
+            self.run_stream()
+            return
+        else:
+            self.scan()
         if not self.to_delete:
             logging.info("Nada que borrar.")
             return
@@ -153,34 +376,131 @@ class Cleaner:
         if self.dry_run:
             logging.info("Modo DRY-RUN – no se borra nada.")
             for f in self.to_delete:
-                print(f"{YELLOW}DRY-RUN{RESET} -> {f}")
+                print(f"{YELLOW}DRY-RUN{RESET} -> {f.path}")
             return
 
-        if self.interactive:
-            for f in self.to_delete:
-                if confirm(f"Borrar {f}?"):
-                    self._delete(f)
-        else:
-            if not confirm(f"Borrar {len(self.to_delete)} archivos?"):
-                logging.info("Cancelado por el usuario.")
-                return
-            for f in self.to_delete:
-                self._delete(f)
-
+        try:
+            if self.interactive:
+                for f in self.to_delete:
+                    if confirm(f"Borrar {f.path}?") and self._delete(f):
+                        self.deleted.append(f)
+            else:
+                total = human_size(sum(e.size for e in self.to_delete))
+                if not confirm(f"Borrar {len(self.to_delete)} archivos ({total})?"):
+                    logging.info("Cancelado por el usuario.")
+                    return
+                for f in self.to_delete:
+                    if self._delete(f):
+                        self.deleted.append(f)
+        finally:
+            self.quarantine.close()
         if self.deleted:
-            build_restore_script(self.deleted, self.folder)
+            self._finish()
 
     # ....................................................................... #
-    def _delete(self, file_path: Path) -> None:
-        """Mueve a .bak y luego borra; permite rollback."""
+    def run_stream(self) -> None:
+        """Escanea y borra a la vez con memoria acotada.
+
+        El recorrido alimenta una cola acotada de lotes que consume un pool
+        de hilos; si el borrado va más lento, la cola llena frena el
+        recorrido. El manifiesto de cuarentena y los totales se escriben a
+        medida que avanza, sin listas en memoria.
+        """
+        if self.dry_run:
+            logging.info("Modo DRY-RUN (streaming) – no se borra nada.")
+            count = 0
+            for entry in self.iter_candidates():
+                print(f"{YELLOW}DRY-RUN{RESET} -> {entry.path}")
+                count += 1
+            logging.info("Archivos a borrar: %d", count)
+            return
+
+        if not confirm(f"Borrar en streaming los archivos que cumplan las reglas en {self.folder}?"):
+            logging.info("Cancelado por el usuario.")
+            return
+
+        batches: "queue.Queue[Optional[List[FileEntry]]]" = queue.Queue(maxsize=self.workers * 2)
+
+        def consumer() -> None:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                for entry in batch:
+                    if self._delete(entry):
+                        self._record(entry)
+
+        threads = [
+            threading.Thread(target=consumer, name=f"cleaner-del-{i}", daemon=True)
+            for i in range(max(1, self.workers))
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            t0 = time.perf_counter()
+            batch: List[FileEntry] = []
+            for entry in self.iter_candidates():
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    batches.put(batch)
+                    batch = []
+            if batch:
+                batches.put(batch)
+        finally:
+            for _ in threads:
+                batches.put(None)
+            for t in threads:
+                t.join()
+            self.stats.add_time("stream", time.perf_counter() - t0)
+            self.quarantine.close()
+
+        logging.info("Borrados %d archivos (%.1f MB).",
+                     self.deleted_count, self.deleted_bytes / (1024 * 1024))
+        if self.deleted_count:
+            self._finish()
+
+    def _record(self, entry: FileEntry) -> None:
+        """Actualiza los totales (desde varios hilos)."""
+        with self._stats_lock:
+            self.deleted_count += 1
+            self.deleted_bytes += entry.size
+            if self.deleted_count % PROGRESS_EVERY == 0:
+                logging.info("Progreso: %d archivos borrados (%.1f MB).",
+                             self.deleted_count, self.deleted_bytes / (1024 * 1024))
+
+    # ....................................................................... #
+    def _delete(self, entry: FileEntry) -> bool:
+        """Mueve el archivo a la cuarentena (un rename); permite rollback."""
         try:
-            bak = file_path.with_suffix(file_path.suffix + ".bak")
-            shutil.move(file_path, bak)
-            bak.unlink(missing_ok=True)
-            self.deleted.append(file_path)
-            print(f"{GREEN}Borrado{RESET}: {file_path}")
+            qid = self.quarantine.put(entry.path, entry.size, entry.mtime)
+            self.stats.count("rename")
+            if self.index:
+                self.index.forget_file(entry.path)
+            logging.debug("Borrado: %s", entry.path)
+            self.output.progress.update(bytes=entry.size)
+            self.output.event("quarantined", path=entry.path, size=entry.size, id=qid)
+            return True
         except Exception as e:
-            logging.error("Error al borrar %s: %s", file_path, e)
+            self.stats.error("delete")
+            self.output.progress.update(0, error=True)
+            self.output.event("error", path=entry.path, error=str(e))
+            logging.error("Error al borrar %s: %s", entry.path, e)
+            return False
+
+    def _finish(self) -> None:
+        """Purga la ejecución si se pidió o indica cómo restaurarla."""
+        if self.purge_now:
+            entries = [e for e in self.quarantine.entries() if e.run_id == self.quarantine.run_id]
+            purged = self.quarantine.purge(entries)
+            logging.info("Purgados %d archivos de la cuarentena.", purged)
+            return
+        if self.target_free:
+            logging.warning("El espacio no se libera hasta purgar la cuarentena "
+                            "(use --purge-now o el subcomando purge).")
+        logging.info("Archivos en cuarentena: %s", self.quarantine.root / self.quarantine.run_id)
+        logging.info("Restaurar con: %s restore \"%s\" --id %s",
+                     Path(sys.argv[0]).name, self.folder, self.quarantine.run_id)
 
 # --------------------------------------------------------------------------- #
 # CLI
@@ -193,30 +513,122 @@ def load_config(config_path: Path) -> Dict:
         logging.error("Error leyendo config: %s", e)
         sys.exit(1)
 
-def parse_args():
+COMMANDS = ("clean", "restore", "purge", "dupes", "analyze")
+
+def parse_args(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Compatibilidad: sin subcomando explícito se asume "clean".
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["clean", *argv]
+
     parser = argparse.ArgumentParser(description="Limpia archivos temporales y basura.")
-    parser.add_argument("folder", help="Carpeta a limpiar")
-    parser.add_argument("--dry-run", action="store_true", help="Simular sin borrar")
-    parser.add_argument("--confirm", action="store_true", help="Preguntar antes de borrar")
-    parser.add_argument("--config", type=Path, help="Archivo JSON con reglas")
-    parser.add_argument("--days", type=int, default=DEFAULT_MIN_DAYS,
-                        help="Mínimo días de antigüedad (default 7)")
-    parser.add_argument("--size", type=float, default=DEFAULT_MAX_SIZE_KB,
-                        help="Máximo tamaño KB a borrar (0 = sin límite)")
-    parser.add_argument("--ext", help="Extensiones extra separadas por coma (sin punto)")
-    return parser.parse_args()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    clean = sub.add_parser("clean", help="Buscar y mover a cuarentena (por defecto)")
+    clean.add_argument("folder", help="Carpeta a limpiar")
+    clean.add_argument("--dry-run", action="store_true", help="Simular sin borrar")
+    clean.add_argument("--confirm", action="store_true", help="Preguntar antes de borrar")
+    clean.add_argument("--config", type=Path, help="Archivo JSON con reglas")
+    clean.add_argument("--days", type=int, default=DEFAULT_MIN_DAYS,
+                       help="Mínimo días de antigüedad (default 7)")
+    clean.add_argument("--size", type=float, default=DEFAULT_MAX_SIZE_KB,
+                       help="Máximo tamaño KB a borrar (0 = sin límite)")
+    clean.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                       help=f"Hilos para recorrer carpetas (default {DEFAULT_WORKERS})")
+    clean.add_argument("--index", action="store_true",
+                       help="Usar índice incremental en ~/.cache para acelerar re-escaneos")
+    clean.add_argument("--index-path", type=Path,
+                       help="Ruta del índice SQLite (implica --index)")
+    clean.add_argument("--full-rescan", action="store_true",
+                       help="Vaciar el índice y recorrer todo de nuevo (implica --index)")
+    clean.add_argument("--stream", action="store_true",
+                       help="Escanear y borrar a la vez con memoria acotada "
+                            "(con --confirm pide una sola confirmación global)")
+    clean.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f"Archivos por lote en modo --stream (default {DEFAULT_BATCH_SIZE})")
+    clean.add_argument("--target-free", type=parse_size, default=0, metavar="SIZE",
+                       help="Borrar lo justo para dejar SIZE libres en el volumen (p. ej. 20G)")
+    clean.add_argument("--target-size", type=parse_size, default=0, metavar="SIZE",
+                       help="Borrar lo justo para que la carpeta ocupe menos de SIZE")
+    clean.add_argument("--evict-by", choices=EVICT_KEYS, default="age",
+                       help="Orden de desalojo en modo objetivo: más antiguo o más grande primero")
+    clean.add_argument("--purge-now", action="store_true",
+                       help="Purgar de la cuarentena lo borrado en esta ejecución")
+    clean.add_argument("--profile", action="store_true",
+                       help="Mostrar al final el tiempo por fase y las llamadas al sistema")
+    clean.add_argument("--stats-json", type=Path, metavar="PATH",
+                       help="Guardar el informe de métricas en JSON")
+    add_output_args(clean)
+    clean.add_argument("--ext", help="Extensiones extra separadas por coma (sin punto)")
+
+    restore = sub.add_parser("restore", help="Devolver archivos desde la cuarentena")
+    restore.add_argument("folder", help="Carpeta que se limpió")
+    restore.add_argument("--id", help="Solo esta ejecución (run id) o entrada concreta")
+    restore.add_argument("--dry-run", action="store_true", help="Simular sin mover")
+
+    purge = sub.add_parser("purge", help="Eliminar definitivamente de la cuarentena")
+    purge.add_argument("folder", help="Carpeta que se limpió")
+    purge.add_argument("--older-than", type=float, required=True, metavar="DAYS",
+                       help="Purgar entradas en cuarentena hace más de DAYS días")
+    purge.add_argument("--dry-run", action="store_true", help="Simular sin borrar")
+    purge.add_argument("--yes", action="store_true", help="No pedir confirmación")
+
+    dupes = sub.add_parser("dupes", help="Buscar archivos duplicados")
+    dupes.add_argument("folder", help="Carpeta a analizar")
+    dupes.add_argument("--config", type=Path, help="JSON con exclude / skip_folders")
+    dupes.add_argument("--min-size", type=parse_size, default=1, metavar="SIZE",
+                       help="Ignorar archivos menores que SIZE (default 1 byte)")
+    dupes.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                       help=f"Hilos para recorrer carpetas (default {DEFAULT_WORKERS})")
+    dupes.add_argument("--procs", type=int, default=DEFAULT_PROCS,
+                       help=f"Procesos para calcular hashes (default {DEFAULT_PROCS})")
+    dupes.add_argument("--top", type=int, default=20, help="Grupos a mostrar (default 20)")
+    dupes.add_argument("--quarantine", action="store_true",
+                       help="Mover a cuarentena las copias (se conserva la más antigua)")
+    dupes.add_argument("--yes", action="store_true", help="No pedir confirmación")
+
+    analyze = sub.add_parser("analyze", help="Ver dónde está el espacio (como du, en una pasada)")
+    analyze.add_argument("folder", help="Carpeta a analizar")
+    analyze.add_argument("--config", type=Path, help="JSON con patterns / exclude / skip_folders")
+    analyze.add_argument("--days", type=int, default=DEFAULT_MIN_DAYS,
+                         help="Antigüedad mínima para contar como recuperable (default 7)")
+    analyze.add_argument("--top", type=int, default=15,
+                         help="Carpetas y extensiones a mostrar (default 15)")
+    analyze.add_argument("--depth", type=int, default=0,
+                         help="Solo carpetas hasta esta profundidad en el ranking (0 = todas)")
+    analyze.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                         help=f"Hilos para recorrer carpetas (default {DEFAULT_WORKERS})")
+    analyze.add_argument("--json", type=Path, metavar="PATH", help="Guardar el informe en JSON")
+    analyze.add_argument("--profile", action="store_true",
+                         help="Mostrar al final el tiempo por fase y las llamadas al sistema")
+    analyze.add_argument("--stats-json", type=Path, metavar="PATH",
+                         help="Guardar el informe de métricas en JSON")
+    return parser.parse_args(argv)
 
 # --------------------------------------------------------------------------- #
 # ENTRY-POINT
 # --------------------------------------------------------------------------- #
 def main():
     args = parse_args()
+    if args.command == "restore":
+        restore_main(args)
+    elif args.command == "purge":
+        purge_main(args)
+    elif args.command == "dupes":
+        dupes_main(args)
+    elif args.command == "analyze":
+        analyze_main(args)
+    else:
+        clean_main(args)
+
+def clean_main(args):
     folder = Path(args.folder)
 
     patterns = DEFAULT_PATTERNS.copy()
     exclude = DEFAULT_EXCLUDE.copy()
     min_days = args.days
     max_size = args.size
+    skip_folders = DEFAULT_SKIP_FOLDERS.copy()
 
     if args.config:
         cfg = load_config(args.config)
@@ -224,10 +636,19 @@ def main():
         exclude = cfg.get("exclude", exclude)
         min_days = cfg.get("min_days", min_days)
         max_size = cfg.get("max_size_kb", max_size)
+        skip_folders = cfg.get("skip_folders", skip_folders)
 
     if args.ext:
         patterns.extend(f"*.{ext.strip()}" for ext in args.ext.split(","))
 
+    # Primero las métricas: cronometran los handlers reales, que start_output
+    # pasa al hilo de la cola (si no, solo se mediría el encolado).
+    stats = stats_from_args(args.profile, args.stats_json)
+    output = start_output(verbose=args.verbose, progress=args.progress, events=args.events)
+    index = None
+    if args.index or args.index_path or args.full_rescan:
+        index = ScanIndex(folder.expanduser().resolve(), args.index_path, args.full_rescan)
+
     cleaner = Cleaner(
         folder=folder,
         patterns=patterns,
@@ -235,9 +656,156 @@ def main():
         min_days=min_days,
         max_size_kb=max_size,
         dry_run=not (args.confirm or False),
-        interactive=args.confirm
+        interactive=args.confirm,
+        skip_folders=skip_folders,
+        workers=args.workers,
+        index=index,
+        stream=args.stream,
+        batch_size=args.batch_size,
+        target_free=args.target_free,
+        target_size=args.target_size,
+        evict_by=args.evict_by,
+        purge_now=args.purge_now,
+        stats=stats,
+        output=output
+    )
+    try:
+        cleaner.run()
+    finally:
+        if index:
+            # Cada carpeta visitada con índice cuesta un stat del directorio.
+            stats.count("stat", index.hits + index.misses)
+            index.close()
+        output.close()
+        stats.finish(args.stats_json, args.profile)
+
+def restore_main(args):
+    quarantine = Quarantine(Path(args.folder).expanduser().resolve())
+    entries = quarantine.entries()
+    if args.id:
+        entries = [e for e in entries if e.id == args.id or e.run_id == args.id]
+    if not entries:
+        logging.info("Nada que restaurar.")
+        return
+    # Orden inverso: si un mismo path se borró varias veces, gana la última copia.
+    restored = quarantine.restore(entries[::-1], dry_run=args.dry_run)
+    logging.info("Restaurados %d de %d archivos.", restored, len(entries))
+
+def purge_main(args):
+    quarantine = Quarantine(Path(args.folder).expanduser().resolve())
+    cutoff = time.time() - args.older_than * 86400
+    entries = [e for e in quarantine.entries() if e.ts < cutoff]
+    if not entries:
+        logging.info("Nada que purgar.")
+        return
+    total_mb = sum(e.size for e in entries) / (1024 * 1024)
+    if not (args.dry_run or args.yes or
+            confirm(f"Eliminar definitivamente {len(entries)} archivos ({total_mb:.1f} MB)?")):
+        logging.info("Cancelado por el usuario.")
+        return
+    purged = quarantine.purge(entries, dry_run=args.dry_run)
+    logging.info("Purgados %d archivos (%.1f MB).", purged, total_mb)
+
+def dupes_main(args):
+    folder = Path(args.folder).expanduser().resolve()
+    exclude = DEFAULT_EXCLUDE.copy()
+    skip_folders = DEFAULT_SKIP_FOLDERS.copy()
+    if args.config:
+        cfg = load_config(args.config)
+        exclude = cfg.get("exclude", exclude)
+        skip_folders = cfg.get("skip_folders", skip_folders)
+
+    excluded = PatternSet(exclude)
+    entries = (
+        e for e in iter_files(str(folder), skip_folders + [QUARANTINE_DIRNAME], args.workers)
+        if not excluded.match(e.name)
     )
-    cleaner.run()
+    groups = find_duplicates(entries, min_size=args.min_size, procs=args.procs)
+    if not groups:
+        logging.info("No hay duplicados.")
+        return
+
+    reclaimable = sum(g.reclaimable for g in groups)
+    for g in groups[:args.top]:
+        print(f"{YELLOW}{len(g.files)} x {human_size(g.size)}{RESET} "
+              f"(recuperable {human_size(g.reclaimable)})")
+        print(f"  {GREEN}conservar{RESET} {g.files[0].path}")
+        for e in g.files[1:]:
+            print(f"  {RED}copia{RESET}     {e.path}")
+    logging.info("Duplicados: %d grupos, %d copias, %s recuperables.",
+                 len(groups), sum(len(g.files) - 1 for g in groups), human_size(reclaimable))
+
+    if not args.quarantine:
+        return
+    if not (args.yes or confirm(f"Mover a cuarentena las copias ({human_size(reclaimable)})?")):
+        logging.info("Cancelado por el usuario.")
+        return
+    quarantine = Quarantine(folder)
+    moved = 0
+    try:
+        for g in groups:
+            for e in g.files[1:]:
+                try:
+                    quarantine.put(e.path, e.size, e.mtime)
+                    moved += 1
+                except OSError as exc:
+                    logging.error("Error al mover %s: %s", e.path, exc)
+    finally:
+        quarantine.close()
+    logging.info("Copias en cuarentena: %d. Restaurar con: %s restore \"%s\" --id %s",
+                 moved, Path(sys.argv[0]).name, folder, quarantine.run_id)
+
+def analyze_main(args):
+    folder = Path(args.folder).expanduser().resolve()
+    patterns = DEFAULT_PATTERNS.copy()
+    exclude = DEFAULT_EXCLUDE.copy()
+    min_days = args.days
+    max_size = DEFAULT_MAX_SIZE_KB
+    skip_folders = DEFAULT_SKIP_FOLDERS.copy()
+    if args.config:
+        cfg = load_config(args.config)
+        patterns = cfg.get("patterns", patterns)
+        exclude = cfg.get("exclude", exclude)
+        min_days = cfg.get("min_days", min_days)
+        max_size = cfg.get("max_size_kb", max_size)
+        skip_folders = cfg.get("skip_folders", skip_folders)
+    if not folder.is_dir():
+        logging.error("La carpeta %s no existe.", folder)
+        return
+
+    stats = stats_from_args(args.profile, args.stats_json)
+    usage = DiskUsage(str(folder), pattern_matcher(patterns), PatternSet(exclude).match,
+                      min_days, int(max_size * 1024))
+    lister = stats.wrap_lister(list_dir)
+    with stats.phase("scan"):
+        for listing in walk(str(folder), skip_folders + [QUARANTINE_DIRNAME], args.workers, lister):
+            usage.add(listing)
+    stats.add_files(usage.files)
+
+    logging.info("%s: %d archivos, %s en %d carpetas.",
+                 folder, usage.files, human_size(usage.bytes), usage.dirs)
+    print(f"\n{YELLOW}Carpetas más pesadas{RESET}")
+    for u in usage.top_dirs(args.top, args.depth):
+        print(f"  {human_size(u.bytes):>10}  {u.files:>9} arch.  {os.path.relpath(u.key, folder)}")
+    print(f"\n{YELLOW}Por extensión{RESET}")
+    for u in usage.by_extension(args.top):
+        print(f"  {human_size(u.bytes):>10}  {u.files:>9} arch.  {u.key}")
+    print(f"\n{YELLOW}Por antigüedad{RESET}")
+    for u in usage.by_age():
+        print(f"  {human_size(u.bytes):>10}  {u.files:>9} arch.  {u.key}")
+    rows = usage.by_pattern()
+    print(f"\n{YELLOW}Recuperable por patrón{RESET} (más de {min_days} días)")
+    for r in rows:
+        print(f"  {GREEN}{human_size(r.old_bytes):>10}{RESET}  {r.old_files:>9} arch.  {r.pattern}"
+              f"  (total {human_size(r.bytes)})")
+    logging.info("Recuperable con 'clean': %s en %d archivos.",
+                 human_size(usage.clean_bytes), usage.clean_files)
+
+    if args.json:
+        args.json.write_text(json.dumps(usage.report(args.top, args.depth), indent=2,
+                                        ensure_ascii=False) + "\n", encoding="utf-8")
+        logging.info("Informe guardado en %s", args.json)
+    stats.finish(args.stats_json, args.profile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,15 +7,28 @@ Uso:
     python file_organizer.py ~/Downloads
     python file_organizer.py --dry-run ~/Downloads
     python file_organizer.py --config my_config.json ~/Downloads
+    python file_organizer.py --recursive ~/Archivo
+    python file_organizer.py --undo ~/Archivo
+    python file_organizer.py --watch ~/Downloads
 """
 import argparse
 import json
 import logging
 import os
-import shutil
+import signal
 import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dest_index import DestinationIndex
+from dir_watch import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE, Debouncer, open_watcher
+from fastwalk import DirListing, FileEntry, list_dir, walk
+from filetype_sniff import sniff_file
+from log_output import NULL_OUTPUT, add_output_args, start_output
+from move_executor import DEFAULT_MOVE_WORKERS, MoveExecutor
+from move_journal import MoveJournal
+from quarantine import QUARANTINE_DIRNAME
+from run_stats import NULL_STATS, from_args as stats_from_args
 
 __version__ = "2.0.0"
 
@@ -43,23 +56,65 @@ DEFAULT_MAPPING: Dict[str, List[str]] = {
     ],
 }
 
+FALLBACK_FOLDER = "Others"
+
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 
 # --------------------------------------------------------------------------- #
 # Core
 # --------------------------------------------------------------------------- #
+def build_extension_index(
+    mapping: Dict[str, List[str]]
+) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Invierte el mapeo a extensión -> carpeta.
+
+    Si una extensión aparece en varias carpetas gana la primera (el mismo
+    resultado que recorrer el mapeo en orden); los choques se devuelven
+    aparte para poder avisar de ellos.
+    """
+    index: Dict[str, str] = {}
+    conflicts: Dict[str, List[str]] = {}
+    for folder, exts in mapping.items():
+        for ext in exts:
+            ext = ext.lower()
+            if ext not in index:
+                index[ext] = folder
+            elif index[ext] != folder:
+                conflicts.setdefault(ext, [index[ext]]).append(folder)
+    return index, conflicts
+
+
 class Organizer:
     def __init__(
         self,
         base: Path,
         mapping: Dict[str, List[str]],
-        dry_run: bool = False
+        dry_run: bool = False,
+        sniff: bool = False,
+        workers: int = DEFAULT_MOVE_WORKERS,
+        recursive: bool = False,
+        journal: Optional[MoveJournal] = None,
+        stats=NULL_STATS,
+        output=NULL_OUTPUT
     ) -> None:
         self.base = Path(base).expanduser().resolve()
         self.mapping = {k: [ext.lower() for ext in v] for k, v in mapping.items()}
         self.dry_run = dry_run
-        self._created_dirs: set[Path] = set()
+        self.sniff = sniff
+        self.workers = workers
+        self.recursive = recursive
+        self.journal = journal
+        # En simulación el diario se consulta pero no se escribe.
+        self._wal = None if dry_run else journal
+        self._ext_index, conflicts = build_extension_index(self.mapping)
+        for ext, folders in conflicts.items():
+            logging.warning("Extensión %s en varias carpetas (%s): se usa %s.",
+                            ext, ", ".join(folders), folders[0])
+        self.stats = stats
+        self.output = output
+        self.mover = MoveExecutor(workers, stats=stats)
+        self.dest = DestinationIndex(create=not dry_run, stats=stats)
 
     # ....................................................................... #
     def run(self) -> None:
@@ -68,40 +123,266 @@ class Organizer:
             return
 
         logging.info("Escaneando %s", self.base)
-        files = [p for p in self.base.iterdir() if p.is_file()]
-        logging.info("Archivos encontrados: %d", len(files))
-
-        for file in files:
-            self._process_file(file)
+        done_dirs = self._begin()
+        try:
+            with self.stats.phase("move"):
+                files = self._organize_tree(done_dirs)
+            if self._wal:
+                self._wal.end()
+        finally:
+            self._close()
+        self.stats.add_files(files)
+        self.mover.log_summary()
 
+        if self.recursive:
+            logging.info("Archivos procesados: %d", files)
         logging.info("Proceso finalizado.")
 
+    def _begin(self) -> Dict[str, List[str]]:
+        """Abre el diario; devuelve las carpetas ya terminadas si se reanuda."""
+        resumed = self._wal.begin(self.recursive) if self._wal else None
+        return resumed.done_dirs if resumed else {}
+
+    def _close(self) -> None:
+        self.mover.close()
+        if self._wal:
+            self._wal.close()
+
+    def _organize_tree(self, done_dirs: Dict[str, List[str]],
+                       on_list: Optional[Callable[[str], None]] = None) -> int:
+        """Organiza 'base' (y sus subcarpetas si es recursivo); devuelve cuántos archivos vio.
+
+        'on_list' se llama con cada carpeta justo antes de listarla.
+        """
+        def lister(path: str) -> DirListing:
+            if on_list is not None:
+                on_list(path)
+            # Una carpeta terminada en la ejecución cortada no se vuelve a listar.
+            subdirs = done_dirs.get(path)
+            if subdirs is not None:
+                return DirListing(path, [], subdirs, True)
+            return list_dir(path)
+        lister = self.stats.wrap_lister(lister)
+
+        if not self.recursive:
+            listing = lister(str(self.base))
+            logging.info("Archivos encontrados: %d", len(listing.files))
+            self.output.progress.total = len(listing.files)
+            return self._organize_dir(listing, done_dirs)
+        files = 0
+        for listing in walk(str(self.base), workers=self.workers, lister=lister,
+                            skip_paths=self._walk_skip_paths()):
+            files += self._organize_dir(listing, done_dirs)
+        return files
+
+    def _walk_skip_paths(self) -> List[str]:
+        """Carpetas que el recorrido recursivo no debe tocar."""
+        skip = [str(self.base / name) for name in (*self.mapping, FALLBACK_FOLDER, QUARANTINE_DIRNAME)]
+        if self.journal:
+            skip.append(str(self.journal.path.parent))
+        return skip
+
+    def _organize_dir(self, listing: DirListing, done_dirs: Dict[str, List[str]],
+                      mark_done: bool = True) -> int:
+        """Mueve los archivos de una carpeta; devuelve cuántos había."""
+        if listing.path in done_dirs:
+            return 0
+        # Un grupo por carpeta destino: dentro de cada una se respeta el orden.
+        # El nombre final se reserva aquí, antes de anotarlo en el diario.
+        groups: Dict[str, List[Tuple[Path, str, str]]] = {}
+        for entry in listing.files:
+            file = Path(entry.path)
+            folder = self.target_folder_name(file)
+            target = self.dest.reserve(str(self.base / folder), file.name)
+            groups.setdefault(folder, []).append((file, folder, target))
+
+        if self._wal and listing.files:
+            self._wal.plan((str(file), target) for group in groups.values() for file, _, target in group)
+        self.mover.run_grouped(groups.values(), lambda job: self._process_file(*job))
+        if self._wal and mark_done:
+            self._wal.dir_done(listing.path, listing.subdirs)
+        return len(listing.files)
+
     # ....................................................................... #
-    def _process_file(self, file: Path) -> None:
-        ext = file.suffix.lower()
-        target_folder_name = next(
-            (folder for folder, exts in self.mapping.items() if ext in exts),
-            "Others"
-        )
-        target_folder = self.base / target_folder_name
-        target_path = target_folder / file.name
-
-        if target_path.exists():
-            logging.warning("Conflicto: ya existe %s – se omite.", target_path)
+    def watch(self, settle: float = DEFAULT_SETTLE, poll: bool = False,
+              poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """Organiza lo que ya hay y después solo los archivos que van llegando."""
+        if not self.base.exists():
+            logging.error("La carpeta %s no existe.", self.base)
             return
 
+        watcher = open_watcher(poll, poll_interval)
+        debouncer = Debouncer(settle)
+        skip = {os.path.normcase(p) for p in self._walk_skip_paths()}
+        done_dirs = self._begin()
+        files = 0
+        try:
+            # Cada carpeta se vigila antes de listarla: nada llega sin avisar.
+            files += self._organize_tree(done_dirs, on_list=watcher.add)
+            logging.info("Vigilando %s (Ctrl+C para terminar)", self.base)
+            while True:
+                events = watcher.read(debouncer.next_timeout())
+                new_files = []
+                for path, is_dir in events:
+                    if not is_dir:
+                        new_files.append(path)
+                    elif self.recursive and os.path.normcase(path) not in skip:
+                        new_files.extend(self._watch_subtree(path, watcher))
+                if watcher.overflowed:
+                    logging.warning("Cola de eventos desbordada: se vuelve a listar %s", self.base)
+                    watcher.overflowed = False
+                    new_files.extend(self._watch_subtree(str(self.base), watcher))
+                debouncer.touch(new_files)
+                ready = debouncer.ready()
+                if ready:
+                    files += self._organize_batch(ready)
+        except KeyboardInterrupt:
+            logging.info("Vigilancia detenida.")
+        finally:
+            watcher.close()
+            if self._wal:
+                self._wal.end()
+            self._close()
+            self.stats.add_files(files)
+            self.mover.log_summary()
+        logging.info("Archivos procesados: %d", files)
+
+    def _watch_subtree(self, path: str, watcher) -> List[str]:
+        """Vigila una carpeta (y las suyas si es recursivo) y devuelve sus archivos."""
+        if not self.recursive:
+            watcher.add(path)
+            return [f.path for f in list_dir(path).files]
+        def lister(p: str) -> DirListing:
+            watcher.add(p)
+            return list_dir(p)
+
+        paths: List[str] = []
+        for listing in walk(path, lister=lister, skip_paths=self._walk_skip_paths()):
+            paths.extend(f.path for f in listing.files)
+        return paths
+
+    def _organize_batch(self, entries: List[FileEntry]) -> int:
+        """Mueve un lote de archivos estables, agrupados por carpeta de origen."""
+        by_dir: Dict[str, List[FileEntry]] = {}
+        for entry in entries:
+            by_dir.setdefault(os.path.dirname(entry.path), []).append(entry)
+        # Las carpetas destino pueden haber cambiado desde el lote anterior.
+        self.dest.revalidate()
+        with self.stats.phase("move"):
+            for path, files in by_dir.items():
+                self._organize_dir(DirListing(path, files, []), {}, mark_done=False)
+        self.dest.snapshot()
+        return len(entries)
+
+    # ....................................................................... #
+    def undo(self) -> None:
+        """Deshace la última ejecución anotada en el diario, del final al principio."""
+        state = self.journal.load() if self.journal else None
+        if state is None or state.undone_all:
+            logging.info("No hay ninguna ejecución que deshacer.")
+            return
+        if not self.dry_run:
+            self.journal.recover(state)
+        moves = [m for m in reversed(state.moves) if m not in state.undone]
+        logging.info("Deshaciendo %d movimientos de la ejecución %s", len(moves), state.run_id)
+        self.output.progress.total = len(moves)
+
+        # Agrupados por carpeta de origen: cada una se rellena en orden inverso.
+        groups: Dict[str, List[Tuple[str, str]]] = {}
+        for src, dst in moves:
+            groups.setdefault(os.path.dirname(src), []).append((src, dst))
+        try:
+            with self.stats.phase("undo"):
+                self.mover.run_grouped(groups.values(), lambda m: self._undo_move(*m))
+            if not self.dry_run:
+                self.journal.end("undo_end")
+        finally:
+            self.mover.close()
+            self.journal.close()
+        self.stats.add_files(len(moves))
+
+        if not self.dry_run:
+            for folder in {os.path.dirname(dst) for _, dst in moves}:
+                try:
+                    os.rmdir(folder)  # solo si quedó vacía
+                except OSError:
+                    pass
+        self.mover.log_summary()
+        logging.info("Proceso finalizado.")
+
+    def _undo_move(self, src: str, dst: str) -> None:
+        if os.path.lexists(src):
+            logging.warning("Conflicto: ya existe %s – no se deshace.", src)
+            self.output.progress.update()
+            self.output.event("skipped", src=dst, dst=src)
+            return
+        if not os.path.lexists(dst):
+            logging.warning("Falta %s – no se puede devolver a %s.", dst, src)
+            self.output.progress.update(error=True)
+            self.output.event("error", src=dst, error="missing")
+            return
         if self.dry_run:
-            logging.info("[DRY-RUN] %s -> %s", file, target_path)
+            logging.info("[DRY-RUN] %s -> %s", dst, src)
             return
+        try:
+            os.makedirs(os.path.dirname(src), exist_ok=True)
+            self.mover.move(dst, src)
+            self.journal.undone(src, dst)
+            logging.debug("Devuelto: %s -> %s", dst, src)
+            self.output.progress.update()
+            self.output.event("restored", src=dst, dst=src)
+        except FileExistsError:
+            logging.warning("Conflicto: ya existe %s – no se deshace.", src)
+            self.output.progress.update()
+            self.output.event("skipped", src=dst, dst=src)
+        except Exception as exc:
+            self.stats.error("undo")
+            self.output.progress.update(error=True)
+            self.output.event("error", src=dst, error=str(exc))
+            logging.exception("Error al devolver %s: %s", dst, exc)
 
-        # Crear carpeta destino si hace falta
-        target_folder.mkdir(exist_ok=True)
-        self._created_dirs.add(target_folder)
+    # ....................................................................... #
+    def target_folder_name(self, file: Path) -> str:
+        """Carpeta destino: por extensión y, si no se reconoce, por contenido."""
+        folder = self._ext_index.get(file.suffix.lower())
+        if folder is None and self.sniff:
+            sniffed = sniff_file(str(file))
+            if sniffed:
+                folder = self._ext_index.get(sniffed)
+                if folder:
+                    logging.debug("Detectado %s como %s", file.name, sniffed)
+        return folder or FALLBACK_FOLDER
+
+    def _process_file(self, file: Path, target_folder_name: str, target_path: str) -> None:
+        if self.dry_run:
+            logging.info("[DRY-RUN] %s -> %s", file, target_path)
+            return
 
         try:
-            shutil.move(str(file), str(target_path))
-            logging.info("Movido: %s -> %s", file.name, target_folder_name)
+            # Crear carpeta destino si hace falta (una vez por carpeta)
+            self.dest.ensure_dir(os.path.dirname(target_path))
+            while True:
+                try:
+                    self.mover.move(str(file), target_path)
+                    break
+                except FileExistsError:
+                    # Lo creó otro proceso después de listar la carpeta: no
+                    # se pisa, se reserva el siguiente sufijo y se reanota.
+                    taken = target_path
+                    target_path = self.dest.reserve(os.path.dirname(taken), file.name)
+                    logging.warning("Ya existe %s: se usará %s.", taken, target_path)
+                    if self._wal:
+                        self._wal.plan([(str(file), target_path)])
+            if self._wal:
+                self._wal.done(str(file), target_path)
+            logging.debug("Movido: %s -> %s", file.name, target_folder_name)
+            self.output.progress.update()
+            self.output.event("moved", src=str(file), dst=target_path)
         except Exception as exc:
+            self.dest.release(target_path)
+            self.stats.error("move")
+            self.output.progress.update(error=True)
+            self.output.event("error", src=str(file), error=str(exc))
             logging.exception("Error al mover %s: %s", file, exc)
 
 # --------------------------------------------------------------------------- #
@@ -120,6 +401,66 @@ def parse_args():
         action="store_true",
         help="Simula el movimiento sin tocar archivos",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Muestra al final el tiempo por fase y las llamadas al sistema",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=Path,
+        metavar="PATH",
+        help="Guarda el informe de métricas en JSON",
+    )
+    parser.add_argument(
+        "--sniff",
+        action="store_true",
+        help="Detecta por contenido los archivos sin extensión o con extensión desconocida",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MOVE_WORKERS,
+        help=f"Hilos para mover archivos, uno por carpeta destino (default {DEFAULT_MOVE_WORKERS})",
+    )
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="Organiza también los archivos de las subcarpetas",
+    )
+    parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="Deshace la última ejecución sobre la carpeta (según su diario)",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        metavar="PATH",
+        help="Diario de movimientos (default ~/.cache/file_organizer/journal_<hash>.jsonl)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Se queda vigilando la carpeta y organiza los archivos nuevos según llegan",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE,
+        metavar="SEG",
+        help=f"Con --watch, segundos sin cambios antes de mover un archivo (default {DEFAULT_SETTLE:g})",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        nargs="?",
+        const=DEFAULT_POLL_INTERVAL,
+        metavar="SEG",
+        help=f"Con --watch, sondear cada SEG segundos en lugar de usar inotify "
+             f"(default {DEFAULT_POLL_INTERVAL:g})",
+    )
+    add_output_args(parser)
     parser.add_argument("--version", action="version", version=__version__)
     return parser.parse_args()
 
@@ -140,11 +481,34 @@ def load_mapping(config_path: Path | None) -> Dict[str, List[str]]:
 # --------------------------------------------------------------------------- #
 # Entry-point
 # --------------------------------------------------------------------------- #
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
 def main():
     args = parse_args()
     mapping = load_mapping(args.config)
-    organizer = Organizer(args.folder, mapping, dry_run=args.dry_run)
-    organizer.run()
+    # Primero las métricas: cronometran los handlers reales, que start_output
+    # pasa al hilo de la cola (si no, solo se mediría el encolado).
+    stats = stats_from_args(args.profile, args.stats_json)
+    output = start_output(verbose=args.verbose, progress=args.progress, events=args.events)
+    base = Path(args.folder).expanduser().resolve()
+    organizer = Organizer(base, mapping, dry_run=args.dry_run, sniff=args.sniff,
+                          workers=args.workers, recursive=args.recursive,
+                          journal=MoveJournal(base, args.journal), stats=stats, output=output)
+    try:
+        if args.undo:
+            organizer.undo()
+        elif args.watch:
+            # Un SIGTERM (systemd, docker stop) cierra igual que Ctrl+C.
+            signal.signal(signal.SIGTERM, _raise_interrupt)
+            organizer.watch(args.settle, poll=args.poll is not None,
+                            poll_interval=args.poll or DEFAULT_POLL_INTERVAL)
+        else:
+            organizer.run()
+    finally:
+        output.close()
+        stats.finish(args.stats_json, args.profile)
 
 
 if __name__ == "__main__":
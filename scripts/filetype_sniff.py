@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+filetype_sniff.py
+Detección del tipo de archivo por sus primeros bytes ("magic numbers").
+
+Solo lee una cabecera fija de HEADER_BYTES bytes. Los resultados se
+guardan en una caché LRU acotada con clave (ruta, tamaño, mtime), así que
+un archivo que no cambió no se vuelve a leer.
+"""
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Optional
+
+HEADER_BYTES = 512  # cubre la marca "ustar" de tar (offset 257)
+CACHE_SIZE = 4096
+
+# (offset, firma, extensión): se prueban en orden, la primera que encaja gana.
+SIGNATURES = (
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tiff"),
+    (0, b"MM\x00*", ".tiff"),
+    (0, b"%PDF-", ".pdf"),
+    (0, b"{\\rtf", ".rtf"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", ".doc"),
+    (0, b"PK\x03\x04", ".zip"),
+    (0, b"Rar!\x1a\x07", ".rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".gz"),
+    (0, b"BZh", ".bz2"),
+    (0, b"\xfd7zXZ\x00", ".xz"),
+    (257, b"ustar", ".tar"),
+    (0, b"ID3", ".mp3"),
+    (0, b"fLaC", ".flac"),
+    (0, b"OggS", ".ogg"),
+    (0, b"\x1aE\xdf\xa3", ".mkv"),
+    (0, b"wOFF", ".woff"),
+    (0, b"wOF2", ".woff2"),
+    (0, b"OTTO", ".otf"),
+    (0, b"\x00\x01\x00\x00\x00", ".ttf"),
+    (0, b"%!PS", ".eps"),
+    (0, b"BM", ".bmp"),
+)
+
+# Subtipos de contenedores RIFF (bytes 8-12) e ISO-BMFF (marca en bytes 8-12)
+RIFF_TYPES = {b"WAVE": ".wav", b"AVI ": ".avi", b"WEBP": ".webp"}
+FTYP_BRANDS = {b"qt  ": ".mov", b"M4A ": ".m4a", b"M4V ": ".m4v", b"3gp4": ".3gp"}
+
+
+def sniff_bytes(head: bytes) -> Optional[str]:
+    """Extensión (con punto) que corresponde a la cabecera, o None."""
+    if head[:4] == b"RIFF":
+        return RIFF_TYPES.get(head[8:12])
+    if head[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(head[8:12], ".mp4")
+    if head[:2] == b"#!":
+        first_line = head.split(b"\n", 1)[0]
+        return ".py" if b"python" in first_line else ".sh"
+    if head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return ".mp3"  # trama MPEG sin etiqueta ID3
+    for offset, magic, ext in SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return ext
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _sniff_cached(path: str, size: int, mtime_ns: int) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return sniff_bytes(f.read(HEADER_BYTES))
+    except OSError:
+        return None
+
+
+def sniff_file(path: str, st: Optional[os.stat_result] = None) -> Optional[str]:
+    """Tipo de 'path' según su contenido; 'st' evita un stat si ya se tiene."""
+    if st is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+    if st.st_size == 0:
+        return None
+    return _sniff_cached(path, st.st_size, st.st_mtime_ns)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+health_exporter.py
+Endpoint HTTP local con las métricas de system_health.
+
+- GET /metrics       -> formato de texto de Prometheus
+- GET /metrics.json  -> JSON; con ?history=N añade las N últimas muestras
+
+Las respuestas salen de la última muestra del Sampler y de su buffer
+circular: una petición nunca lee psutil ni espera. El cuerpo se genera
+una vez por muestra y se reutiliza para todos los que pregunten antes de
+la siguiente, así que muchos scrapers a la vez cuestan lo mismo que uno.
+
+El servidor es asyncio en su propio hilo con su propio bucle: las
+conexiones lentas o numerosas no frenan el hilo de muestreo, que solo
+comparte con él el lock del Sampler durante una copia.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from health_rules import RuleEngine
+from health_sampler import Sampler
+
+DEFAULT_HOST = "127.0.0.1"
+MAX_CLIENTS = 256          # conexiones simultáneas; el resto recibe 503
+MAX_HEADER = 16 * 1024     # bytes de petición (línea + cabeceras)
+IDLE_TIMEOUT = 15.0        # segundos de espera de una petición en keep-alive
+PREFIX = "system_health"
+
+PROM_METRICS = (
+    # (campo, nombre, ayuda)
+    ("cpu", "cpu_percent", "CPU usage in percent."),
+    ("memory", "memory_percent", "Memory usage in percent."),
+    ("disk", "disk_percent", "Disk usage of / in percent."),
+    ("disk_read", "disk_read_bytes_per_second", "Disk read throughput since the previous sample."),
+    ("disk_write", "disk_write_bytes_per_second", "Disk write throughput since the previous sample."),
+    ("net_recv", "network_receive_bytes_per_second", "Network bytes received per second."),
+    ("net_sent", "network_transmit_bytes_per_second", "Network bytes sent per second."),
+)
+CONTENT_TYPES = {
+    "text": "text/plain; version=0.0.4; charset=utf-8",
+    "json": "application/json",
+}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value))
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+# --------------------------------------------------------------------------- #
+# Vistas
+# --------------------------------------------------------------------------- #
+def render_prometheus(seq: int, metrics, row: Optional[Tuple[float, ...]],
+                      rules: Optional[RuleEngine] = None) -> str:
+    lines: List[str] = [
+        f"# HELP {PREFIX}_samples_total Samples taken since the monitor started.",
+        f"# TYPE {PREFIX}_samples_total counter",
+        f"{PREFIX}_samples_total {seq}",
+    ]
+    if metrics is not None:
+        lines += [
+            f"# HELP {PREFIX}_last_sample_timestamp_seconds Unix time of the latest sample.",
+            f"# TYPE {PREFIX}_last_sample_timestamp_seconds gauge",
+            f"{PREFIX}_last_sample_timestamp_seconds {_fmt(row[0] if row else 0.0)}",
+        ]
+        for field, name, help_text in PROM_METRICS:
+            lines += [
+                f"# HELP {PREFIX}_{name} {help_text}",
+                f"# TYPE {PREFIX}_{name} gauge",
+                f"{PREFIX}_{name} {_fmt(getattr(metrics, field))}",
+            ]
+        if metrics.mounts:
+            lines += [
+                f"# HELP {PREFIX}_mount_used_percent Usage of each mounted filesystem in percent.",
+                f"# TYPE {PREFIX}_mount_used_percent gauge",
+            ]
+            lines += [f"{PREFIX}_mount_used_percent{_labels(mount=path)} {_fmt(pct)}"
+                      for path, pct in metrics.mounts]
+        if metrics.cores:
+            lines += [
+                f"# HELP {PREFIX}_core_cpu_percent CPU usage per core in percent.",
+                f"# TYPE {PREFIX}_core_cpu_percent gauge",
+            ]
+            lines += [f"{PREFIX}_core_cpu_percent{_labels(core=i)} {_fmt(v)}"
+                      for i, v in enumerate(metrics.cores)]
+    if rules is not None and rules.rules:
+        active = set(map(id, rules.active()))
+        lines += [
+            f"# HELP {PREFIX}_alert_active 1 while the alert rule is firing.",
+            f"# TYPE {PREFIX}_alert_active gauge",
+        ]
+        lines += [f"{PREFIX}_alert_active"
+                  f"{_labels(metric=r.metric, stat=r.stat, window=f'{r.window:g}')} "
+                  f"{int(id(r) in active)}" for r in rules.rules]
+    return "\n".join(lines) + "\n"
+
+
+def render_json(seq: int, metrics, row: Optional[Tuple[float, ...]],
+                rules: Optional[RuleEngine] = None,
+                history: Optional[Tuple[Tuple[str, ...], List[Tuple[float, ...]]]] = None) -> Dict:
+    data: Dict = {"samples": seq, "ts": row[0] if row else None, "metrics": None}
+    if metrics is not None:
+        data["metrics"] = {field: getattr(metrics, field) for field, _, _ in PROM_METRICS}
+        data["metrics"]["mounts"] = dict(metrics.mounts)
+        if metrics.cores:
+            data["metrics"]["cores"] = list(metrics.cores)
+    if rules is not None:
+        data["alerts"] = [r.describe() for r in rules.active()]
+    if history is not None:
+        columns, rows = history
+        data["history"] = {"columns": list(columns), "rows": [list(r) for r in rows]}
+    return data
+
+# --------------------------------------------------------------------------- #
+# Servidor
+# --------------------------------------------------------------------------- #
+class MetricsExporter:
+    """Servidor HTTP en segundo plano; 'port' tiene el puerto real tras start() (admite 0)."""
+
+    def __init__(self, sampler: Sampler, host: str = DEFAULT_HOST, port: int = 0,
+                 rules: Optional[RuleEngine] = None) -> None:
+        self.sampler = sampler
+        self.rules = rules
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._clients = 0
+        self._cache: Dict[str, Tuple[int, bytes]] = {}  # vista -> (seq, cuerpo)
+
+    # ....................................................................... #
+    def start(self) -> "MetricsExporter":
+        """Arranca el hilo y espera a que el puerto esté abierto (OSError si no se pudo)."""
+        self._thread = threading.Thread(target=self._run, name="health-exporter", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        logging.info("Exporter listening on http://%s:%d/metrics", self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                pass  # el bucle ya se cerró
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _run(self) -> None:
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(
+                self._handle, self.host, self.port, limit=MAX_HEADER, backlog=MAX_CLIENTS))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as exc:
+            self._error = exc
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Primero se cortan las conexiones abiertas (keep-alive): desde
+            # Python 3.12 wait_closed() espera a que terminen.
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    # ....................................................................... #
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients += 1
+        try:
+            if self._clients > MAX_CLIENTS:
+                await self._respond(writer, 503, b"Too many clients\n", "text", keep_alive=False)
+                return
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 400, b"Request too large\n", "text", keep_alive=False)
+                    return
+                keep_alive = await self._serve(head, writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients -= 1
+            writer.close()
+
+    async def _serve(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        """Responde a una petición; devuelve si la conexión sigue abierta."""
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split()
+        except ValueError:
+            await self._respond(writer, 400, b"Bad request\n", "text", keep_alive=False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip().lower()
+        connection = headers.get("connection", "")
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        if method not in ("GET", "HEAD"):
+            # Se cierra: un posible cuerpo no leído no debe tomarse por otra petición.
+            await self._respond(writer, 405, b"Only GET and HEAD\n", "text", keep_alive=False,
+                                extra={"Allow": "GET, HEAD"})
+            return False
+        url = urlsplit(target)
+        if url.path == "/metrics":
+            status, body, kind = 200, self._view("text"), "text"
+        elif url.path == "/metrics.json":
+            try:
+                n = int(parse_qs(url.query).get("history", ["0"])[0])
+            except ValueError:
+                n = -1
+            if n < 0:
+                status, body, kind = 400, b"history must be a non-negative integer\n", "text"
+            else:
+                status, body, kind = 200, self._view("json", n), "json"
+        else:
+            status, body, kind = 404, b"Try /metrics or /metrics.json\n", "text"
+        await self._respond(writer, status, body, kind, keep_alive, head_only=method == "HEAD")
+        return keep_alive
+
+    def _view(self, kind: str, history: int = 0) -> bytes:
+        """Cuerpo de la vista; sin histórico se reutiliza mientras no haya muestra nueva.
+
+        Las reglas se evalúan antes de publicar cada muestra, así que el
+        estado de las alertas solo cambia cuando cambia 'seq'.
+        """
+        seq, metrics, row = self.sampler.snapshot()
+        if not history:
+            cached = self._cache.get(kind)
+            if cached is not None and cached[0] == seq:
+                return cached[1]
+        if kind == "text":
+            body = render_prometheus(seq, metrics, row, self.rules).encode("utf-8")
+        else:
+            hist = self.sampler.table(history) if history else None
+            body = json.dumps(render_json(seq, metrics, row, self.rules, hist)).encode("utf-8")
+        if not history:
+            self._cache[kind] = (seq, body)
+        return body
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body: bytes, kind: str,
+                       keep_alive: bool, head_only: bool = False,
+                       extra: Optional[Dict[str, str]] = None) -> None:
+        headers = {
+            "Content-Type": CONTENT_TYPES[kind],
+            "Content-Length": str(len(body)),
+            "Cache-Control": "no-store",
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(extra or {}),
+        }
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1") + (b"" if head_only else body))
+        await writer.drain()
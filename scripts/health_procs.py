@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+health_procs.py
+Procesos que más consumen, para adjuntarlos a las alertas de system_health.
+
+- Una sola pasada por los PID; los atributos de cada proceso se leen con
+  as_dict(attrs=...), que los agrupa en un único oneshot().
+- Los objetos Process se guardan entre pasadas: cpu_percent() y la tasa
+  de E/S se calculan contra la pasada anterior del mismo proceso. Los PID
+  que desaparecen se olvidan; si un PID se reutiliza, psutil lo detecta
+  por la hora de creación y empieza de cero.
+- Las pasadas corren en su propio hilo, una cada 'interval' segundos: con
+  miles de procesos una pasada tarda cientos de ms, y no debe retrasar
+  el muestreo. Las alertas solo leen el último ranking (latest()).
+- Los N primeros salen de heapq.nlargest, sin ordenar la lista.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+DEFAULT_TOP = 5
+DEFAULT_PROC_INTERVAL = 5.0
+ATTRS = ["name", "cpu_percent", "memory_info", "io_counters"]
+
+
+class ProcInfo(NamedTuple):
+    pid: int
+    name: str
+    cpu: float       # % de un núcleo desde la pasada anterior
+    rss: int         # bytes
+    io_rate: float   # bytes/s leídos + escritos desde la pasada anterior
+
+    def describe(self, key: str) -> str:
+        if key == "rss":
+            value = f"{self.rss / (1024 * 1024):.0f} MB"
+        elif key == "io_rate":
+            value = f"{self.io_rate / (1024 * 1024):.1f} MB/s"
+        else:
+            value = f"{self.cpu:.1f}%"
+        return f"{self.name}[{self.pid}] {value}"
+
+
+class TopProcesses(NamedTuple):
+    ts: float
+    cpu: Tuple[ProcInfo, ...]
+    rss: Tuple[ProcInfo, ...]
+    io: Tuple[ProcInfo, ...]
+
+
+# Qué ranking acompaña a la alerta de cada métrica
+METRIC_RANKING = {"cpu": ("cpu", "cpu"), "memory": ("rss", "rss"), "disk": ("io", "io_rate"),
+                  "disk_read": ("io", "io_rate"), "disk_write": ("io", "io_rate")}
+
+
+class ProcessTracker:
+    def __init__(self, n: int = DEFAULT_TOP, interval: float = DEFAULT_PROC_INTERVAL) -> None:
+        self.n = n
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._procs: Dict[int, psutil.Process] = {}  # cpu_percent() compara con la pasada anterior
+        self._io: Dict[int, Tuple[float, int]] = {}  # pid -> (instante, bytes de E/S)
+        self._top: Optional[TopProcesses] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ProcessTracker":
+        self._thread = threading.Thread(target=self._loop, name="health-procs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self) -> None:
+        # La primera pasada es inmediata: ceba cpu_percent() de cada proceso.
+        while True:
+            t0 = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as exc:
+                logging.warning("Process scan failed: %s", exc)
+            if self._stop.wait(max(0.0, self.interval - (time.monotonic() - t0))):
+                return
+
+    def refresh(self) -> TopProcesses:
+        now = time.monotonic()
+        procs: List[ProcInfo] = []
+        cache = self._procs
+        seen: Dict[int, psutil.Process] = {}
+        io_now: Dict[int, Tuple[float, int]] = {}
+        for pid in psutil.pids():
+            p = cache.get(pid)
+            try:
+                # Mismo PID pero otra hora de creación: el PID se reutilizó.
+                if p is None or not p.is_running():
+                    p = psutil.Process(pid)
+                # as_dict lee todos los atributos dentro de un único oneshot().
+                info = p.as_dict(attrs=ATTRS, ad_value=None)
+            except psutil.Error:
+                continue  # terminó entre pids() y la lectura
+            seen[pid] = p
+            mem = info["memory_info"]
+            io = info["io_counters"]
+            io_rate = 0.0
+            if io is not None:
+                total = io.read_bytes + io.write_bytes
+                prev = self._io.get(pid)
+                if prev is not None and now > prev[0] and total >= prev[1]:
+                    io_rate = (total - prev[1]) / (now - prev[0])
+                io_now[pid] = (now, total)
+            procs.append(ProcInfo(pid, info["name"] or "?", info["cpu_percent"] or 0.0,
+                                  mem.rss if mem is not None else 0, io_rate))
+        # Solo se conservan los PID vivos: los procesos cortos no se acumulan.
+        self._procs = seen
+        self._io = io_now
+        top = TopProcesses(
+            time.time(),
+            tuple(heapq.nlargest(self.n, procs, key=lambda p: p.cpu)),
+            tuple(heapq.nlargest(self.n, procs, key=lambda p: p.rss)),
+            tuple(heapq.nlargest(self.n, procs, key=lambda p: p.io_rate)),
+        )
+        with self._lock:
+            self._top = top
+        return top
+
+    def latest(self) -> Optional[TopProcesses]:
+        with self._lock:
+            return self._top
+
+    def for_metric(self, metric: str) -> List[str]:
+        """Los N primeros del ranking de 'metric' en la última pasada, ya formateados."""
+        top = self.latest()
+        # "disk:/data" se atribuye como "disk"; la red no tiene contadores por proceso.
+        ranking = METRIC_RANKING.get(metric.split(":", 1)[0])
+        if top is None or ranking is None:
+            return []
+        ranking, key = ranking
+        return [p.describe(key) for p in getattr(top, ranking) if getattr(p, key) > 0]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+health_rules.py
+Reglas de alerta sobre ventanas deslizantes para system_health.
+
+Cada regla mira un estadístico (media, máximo o p95) de una métrica en
+los últimos N segundos. Los estadísticos se mantienen de forma
+incremental, O(1) por muestra:
+
+- media: suma acumulada de la ventana;
+- máximo: deque monótona decreciente;
+- p95: histograma de 100 tramos de 1 % (las métricas son porcentajes),
+  recorrido en tamaño constante.
+
+La métrica es un campo de la muestra ("cpu", "memory", "disk_read"...) o
+el uso de un punto de montaje concreto ("disk:/data").
+
+Una regla entra en alerta cuando el estadístico supera 'enter' durante
+'for' segundos seguidos y sale cuando baja de 'exit' (histéresis). Tras
+avisar, la misma regla no vuelve a avisar hasta pasado 'cooldown'.
+"""
+from __future__ import annotations
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+STATS = ("mean", "max", "p95")
+HIST_BINS = 100
+DEFAULT_WINDOW = 60.0
+DEFAULT_COOLDOWN = 300.0
+DEFAULT_HYSTERESIS = 5.0  # puntos por debajo de 'enter' para salir, si no se indica
+RELATIVE_HYSTERESIS = 0.2  # fracción de 'enter': tasas y umbrales bajos
+MOUNT_PREFIX = "disk:"
+RATE_METRICS = ("disk_read", "disk_write", "net_recv", "net_sent")  # bytes/s, no porcentajes
+
+# --------------------------------------------------------------------------- #
+# Ventana deslizante
+# --------------------------------------------------------------------------- #
+class RollingWindow:
+    """Valores de los últimos 'seconds' segundos con media, máximo y p95 en O(1)."""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self._values: Deque[Tuple[float, float]] = deque()
+        self._max: Deque[Tuple[float, float]] = deque()  # valores decrecientes
+        self._hist = [0] * HIST_BINS
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _bin(value: float) -> int:
+        return min(max(int(value), 0), HIST_BINS - 1)
+
+    def add(self, ts: float, value: float) -> None:
+        self._values.append((ts, value))
+        self._sum += value
+        self._hist[self._bin(value)] += 1
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((ts, value))
+        self._evict(ts - self.seconds)
+
+    def _evict(self, cutoff: float) -> None:
+        values = self._values
+        while values and values[0][0] <= cutoff:
+            _, value = values.popleft()
+            self._sum -= value
+            self._hist[self._bin(value)] -= 1
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+
+    def mean(self) -> float:
+        return self._sum / len(self._values) if self._values else 0.0
+
+    def max(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+
+    def p95(self) -> float:
+        """Percentil 95 con resolución de 1 % (límite superior del tramo)."""
+        n = len(self._values)
+        if not n:
+            return 0.0
+        rank = 0.95 * n
+        seen = 0
+        for i, count in enumerate(self._hist):
+            seen += count
+            if seen >= rank:
+                return min(float(i + 1), self.max())
+        return self.max()
+
+    def stat(self, name: str) -> float:
+        return getattr(self, name)()
+
+# --------------------------------------------------------------------------- #
+# Reglas
+# --------------------------------------------------------------------------- #
+class Rule(NamedTuple):
+    metric: str
+    stat: str = "mean"
+    window: float = DEFAULT_WINDOW
+    enter: float = 80.0
+    exit: Optional[float] = None   # None = ver exit_level
+    duration: float = 0.0          # "for" en la configuración
+    cooldown: float = DEFAULT_COOLDOWN
+
+    @property
+    def exit_level(self) -> float:
+        """Nivel de salida: 'exit', o por defecto un margen bajo 'enter'.
+
+        Para porcentajes, DEFAULT_HYSTERESIS puntos, pero nunca más de un
+        RELATIVE_HYSTERESIS de 'enter' (con --cpu 1 saldría de -4 y la
+        alerta no se resolvería nunca). Para tasas en bytes/s unos puntos
+        fijos no significan nada: solo el margen relativo.
+        """
+        if self.exit is not None:
+            return self.exit
+        relative = self.enter * (1 - RELATIVE_HYSTERESIS)
+        if self.metric in RATE_METRICS:
+            return relative
+        return max(self.enter - DEFAULT_HYSTERESIS, relative, 0.0)
+
+    def describe(self) -> str:
+        return f"{self.metric} {self.stat} over {self.window:g}s"
+
+
+class AlertEvent(NamedTuple):
+    rule: Rule
+    firing: bool   # True = entra en alerta, False = se resuelve
+    value: float
+    ts: float
+    top: Tuple[str, ...] = ()  # procesos que más consumen (los adjunta el monitor)
+
+
+class _RuleState:
+    __slots__ = ("since", "firing", "last_alert")
+
+    def __init__(self) -> None:
+        self.since: Optional[float] = None   # desde cuándo supera 'enter'
+        self.firing = False
+        self.last_alert = float("-inf")
+
+
+def rule_from_dict(data: Dict) -> Rule:
+    """Regla desde la configuración JSON; ValueError si no es válida."""
+    try:
+        rule = Rule(
+            metric=str(data["metric"]),
+            stat=data.get("stat", "mean"),
+            window=float(data.get("window", DEFAULT_WINDOW)),
+            enter=float(data["enter"]),
+            exit=float(data["exit"]) if data.get("exit") is not None else None,
+            duration=float(data.get("for", 0.0)),
+            cooldown=float(data.get("cooldown", DEFAULT_COOLDOWN)),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid rule {data!r}: {exc}") from None
+    if rule.stat not in STATS:
+        raise ValueError(f"Invalid rule {data!r}: stat must be one of {', '.join(STATS)}")
+    if rule.stat == "p95" and rule.metric in RATE_METRICS:
+        raise ValueError(f"Invalid rule {data!r}: p95 is only available for percentages")
+    if rule.window <= 0:
+        raise ValueError(f"Invalid rule {data!r}: window must be > 0")
+    if rule.exit_level > rule.enter:
+        raise ValueError(f"Invalid rule {data!r}: exit must not be above enter")
+    return rule
+
+
+def load_rules(path: Path) -> List[Rule]:
+    with open(path, encoding="utf-8") as f:
+        cfg = json.load(f)
+    return [rule_from_dict(r) for r in cfg.get("rules", [])]
+
+
+def metric_value(metrics, name: str) -> Optional[float]:
+    """Valor de la métrica 'name' en una muestra; None si no lo tiene."""
+    if name.startswith(MOUNT_PREFIX):
+        path = name[len(MOUNT_PREFIX):]
+        return next((pct for mount, pct in metrics.mounts if mount == path), None)
+    return getattr(metrics, name, None)
+
+
+def default_rules(thresholds: Dict[str, float]) -> List[Rule]:
+    """Una regla por métrica a partir de --cpu/--memory/--disk/--mount."""
+    return [Rule(metric, enter=float(level)) for metric, level in thresholds.items()]
+
+
+class RuleEngine:
+    """Evalúa las reglas con cada muestra; una ventana por (métrica, segundos).
+
+    update() y add() se llaman desde un solo hilo (el de muestreo); las
+    reglas y las activas se publican como objetos nuevos en cada cambio,
+    así que rules y active() se pueden leer desde cualquier hilo.
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules = list(rules)
+        self._windows: Dict[Tuple[str, float], RollingWindow] = {}
+        for rule in self.rules:
+            self._windows.setdefault((rule.metric, rule.window), RollingWindow(rule.window))
+        self._state = [_RuleState() for _ in self.rules]
+        self._active: Tuple[Rule, ...] = ()
+
+    def add(self, rule: Rule) -> None:
+        """Añade una regla (p. ej. para un montaje nuevo) desde el hilo de update()."""
+        self._windows.setdefault((rule.metric, rule.window), RollingWindow(rule.window))
+        self._state.append(_RuleState())
+        self.rules = self.rules + [rule]
+
+    def update(self, ts: float, metrics) -> List[AlertEvent]:
+        """Añade una muestra y devuelve las alertas que empiezan o terminan."""
+        for (metric, _), window in self._windows.items():
+            value = metric_value(metrics, metric)
+            if value is not None:
+                window.add(ts, value)
+        events = []
+        for rule, state in zip(self.rules, self._state):
+            window = self._windows[(rule.metric, rule.window)]
+            if not len(window):
+                continue
+            value = window.stat(rule.stat)
+            if state.firing:
+                if value < rule.exit_level:
+                    state.firing = False
+                    state.since = None
+                    events.append(AlertEvent(rule, False, value, ts))
+                continue
+            if value < rule.enter:
+                state.since = None
+                continue
+            if state.since is None:
+                state.since = ts
+            if ts - state.since >= rule.duration and ts - state.last_alert >= rule.cooldown:
+                state.firing = True
+                state.last_alert = ts
+                events.append(AlertEvent(rule, True, value, ts))
+        if events:
+            self._active = tuple(rule for rule, state in zip(self.rules, self._state) if state.firing)
+        return events
+
+    def active(self) -> Tuple[Rule, ...]:
+        """Reglas en alerta tras la última muestra (una tupla que no cambia después)."""
+        return self._active
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+health_sampler.py
+Muestreo continuo en segundo plano para system_health.
+
+- Un hilo toma una muestra cada 'interval' segundos (admite fracciones).
+  CPU y tasas de E/S son diferencias con la lectura anterior: una lectura
+  descartada al crear el Sampler las ceba y ninguna lectura bloquea.
+- Las muestras se guardan en un buffer circular de tamaño fijo sobre un
+  array('d') plano: memoria constante, sin objetos por muestra.
+- En modo adaptativo el intervalo se acorta a medida que CPU o memoria se
+  acercan a su umbral, hasta 'min_interval'.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+DEFAULT_SAMPLE_INTERVAL = 1.0
+DEFAULT_MIN_INTERVAL = 0.1
+DEFAULT_HISTORY = 3600     # muestras guardadas
+ADAPTIVE_FROM = 0.75       # fracción del umbral a partir de la que se acelera
+ADAPTIVE_KEYS = ("cpu", "memory")  # el disco cambia despacio: no acelera
+BASE_COLUMNS = ("ts", "cpu", "memory", "disk", "disk_read", "disk_write", "net_recv", "net_sent")
+
+# --------------------------------------------------------------------------- #
+# Buffer circular
+# --------------------------------------------------------------------------- #
+class RingBuffer:
+    """Últimas 'capacity' filas de 'width' floats sobre un único array('d')."""
+
+    def __init__(self, capacity: int, width: int) -> None:
+        self.capacity = max(1, capacity)
+        self.width = width
+        self._data = array("d", bytes(8 * self.capacity * width))
+        self._next = 0   # fila que se escribirá a continuación
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row: Sequence[float]) -> None:
+        start = self._next * self.width
+        self._data[start:start + self.width] = array("d", row)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _index(self, i: int) -> int:
+        """Posición en el array de la fila i (0 = la más antigua guardada)."""
+        return ((self._next - self._count + i) % self.capacity) * self.width
+
+    def row(self, i: int) -> Tuple[float, ...]:
+        if not -self._count <= i < self._count:
+            raise IndexError(i)
+        start = self._index(i % self._count)
+        return tuple(self._data[start:start + self.width])
+
+    def rows(self, n: Optional[int] = None) -> List[Tuple[float, ...]]:
+        """Las 'n' filas más recientes (todas si es None), de antigua a reciente."""
+        n = self._count if n is None else min(n, self._count)
+        return [self.row(i) for i in range(self._count - n, self._count)]
+
+    def column(self, col: int, n: Optional[int] = None) -> array:
+        """Una columna de las 'n' filas más recientes, sin copiar filas enteras."""
+        n = self._count if n is None else min(n, self._count)
+        data = self._data
+        return array("d", (data[self._index(i) + col] for i in range(self._count - n, self._count)))
+
+# --------------------------------------------------------------------------- #
+# Muestreo
+# --------------------------------------------------------------------------- #
+class Sampler:
+    """Hilo de muestreo; 'latest()' y 'history()' se pueden llamar desde cualquier hilo.
+
+    'read' es la función que toma una muestra (system_health.read_metrics)
+    y devuelve un objeto con los atributos de BASE_COLUMNS, cores y mounts.
+    Las columnas de 'mounts' ("disk:/data") parten de las indicadas al
+    crearlo; un montaje que aparece después recibe su columna (a 0 en las
+    filas anteriores) y uno ausente en una muestra se guarda como 0.
+    """
+
+    def __init__(
+        self,
+        read,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        history: int = DEFAULT_HISTORY,
+        per_core: bool = False,
+        thresholds: Optional[Dict[str, float]] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        on_sample=None,
+        mounts: Sequence[str] = (),
+    ) -> None:
+        self.read = read
+        self.on_sample = on_sample  # f(ts, muestra), llamada desde el hilo de muestreo
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.thresholds = thresholds  # None = intervalo fijo
+        self.cores = (psutil.cpu_count() or 1) if per_core else 0
+        self.mounts = tuple(mounts)
+        self.columns = self._columns()
+        self.buffer = RingBuffer(history, len(self.columns))
+        # RLock: stop() puede llamarse desde un handler de señal en el hilo
+        # principal mientras ese mismo hilo está dentro de wait().
+        self._lock = threading.RLock()
+        self._new = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._latest = None
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+        try:
+            self.read(per_core=per_core)  # cebar los contadores
+        except Exception as exc:
+            logging.warning("Sampling failed: %s", exc)
+
+    def _columns(self) -> Tuple[str, ...]:
+        return (BASE_COLUMNS + tuple(f"disk:{path}" for path in self.mounts)
+                + tuple(f"cpu{i}" for i in range(self.cores)))
+
+    def _add_mounts(self, paths: Sequence[str]) -> None:
+        """Añade columnas para montajes nuevos (llamar con el lock tomado)."""
+        old = {name: i for i, name in enumerate(self.columns)}
+        self.mounts += tuple(paths)
+        self.columns = self._columns()
+        buffer = RingBuffer(self.buffer.capacity, len(self.columns))
+        index = [old.get(name) for name in self.columns]
+        for row in self.buffer.rows():
+            buffer.append([row[i] if i is not None else 0.0 for i in index])
+        self.buffer = buffer
+        logging.info("New mount(s) sampled: %s", ", ".join(paths))
+
+    # ....................................................................... #
+    def start(self) -> "Sampler":
+        self._thread = threading.Thread(target=self._loop, name="health-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Pide parar y despierta a quien espere en wait() (válido en un handler de señal)."""
+        self._stop.set()
+        with self._new:
+            self._new.notify_all()
+
+    def join(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        # La primera muestra llega tras un intervalo: así la CPU ya tiene base.
+        delay = self.interval
+        while not self._stop.wait(delay):
+            t0 = time.monotonic()
+            try:
+                m = self.read(per_core=bool(self.cores))
+            except Exception as exc:
+                logging.warning("Sampling failed: %s", exc)
+                continue
+            self._store(m)
+            delay = max(0.0, self.next_interval(m) - (time.monotonic() - t0))
+
+    def _store(self, m) -> None:
+        ts = time.time()
+        if self.on_sample is not None:
+            try:
+                self.on_sample(ts, m)
+            except Exception:
+                logging.exception("Sample callback failed")
+        usage = dict(m.mounts)
+        with self._new:
+            new = [path for path in usage if path not in self.mounts]
+            if new:
+                self._add_mounts(new)
+            row = [ts]
+            row.extend(getattr(m, name) for name in BASE_COLUMNS[1:])
+            row.extend(usage.get(path, 0.0) for path in self.mounts)
+            if self.cores:
+                row.extend((list(m.cores) + [0.0] * self.cores)[:self.cores])
+            self.buffer.append(row)
+            self._latest = m
+            self._seq += 1
+            self._new.notify_all()
+
+    def next_interval(self, m) -> float:
+        """Intervalo hasta la próxima muestra según lo cerca que esté cada umbral."""
+        if not self.thresholds:
+            return self.interval
+        ratio = max((getattr(m, k) / self.thresholds[k] for k in ADAPTIVE_KEYS
+                     if self.thresholds.get(k)), default=0.0)
+        if ratio <= ADAPTIVE_FROM:
+            return self.interval
+        if ratio >= 1:
+            return self.min_interval
+        frac = (ratio - ADAPTIVE_FROM) / (1 - ADAPTIVE_FROM)
+        return self.interval - frac * (self.interval - self.min_interval)
+
+    # ....................................................................... #
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def snapshot(self) -> Tuple[int, object, Optional[Tuple[float, ...]]]:
+        """(seq, última muestra, última fila del buffer) leídos de forma consistente."""
+        with self._lock:
+            row = self.buffer.row(-1) if len(self.buffer) else None
+            return self._seq, self._latest, row
+
+    def wait(self, seq: int, timeout: Optional[float]) -> Tuple[int, object]:
+        """Espera una muestra posterior a 'seq'; devuelve (seq, muestra)."""
+        with self._new:
+            self._new.wait_for(lambda: self._seq > seq or self._stop.is_set(), timeout)
+            return self._seq, self._latest
+
+    def history(self, n: Optional[int] = None) -> List[Tuple[float, ...]]:
+        """Últimas 'n' muestras como filas en el orden de 'columns'."""
+        with self._lock:
+            return self.buffer.rows(n)
+
+    def table(self, n: Optional[int] = None) -> Tuple[Tuple[str, ...], List[Tuple[float, ...]]]:
+        """(columns, history(n)) leídos juntos: un montaje nuevo cambia las columnas."""
+        with self._lock:
+            return self.columns, self.buffer.rows(n)
+
+    def series(self, name: str, n: Optional[int] = None) -> array:
+        """Últimos 'n' valores de una columna ('cpu', 'net_recv', 'disk:/data', 'cpu3'...)."""
+        with self._lock:
+            return self.buffer.column(self.columns.index(name), n)
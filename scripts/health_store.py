@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+health_store.py
+Histórico binario de métricas para system_health.
+
+Tres archivos de tamaño fijo en ~/.cache/system_health: las muestras tal
+cual ("raw") y los agregados por minuto ("1m") y por hora ("1h"). Cada
+uno es un buffer circular de registros struct de ancho fijo con una
+cabecera (magic, versión, tamaño de registro, capacidad, siguiente
+posición y número de registros). Al llenarse se sobrescribe lo más
+antiguo, así que el espacio en disco está acotado desde el primer día.
+
+Los archivos se leen y escriben con mmap. Como los registros están en
+orden de tiempo, una consulta por rango hace una búsqueda binaria y solo
+lee los registros que devuelve.
+
+Los agregados se calculan al vuelo: cada muestra se acumula en el minuto
+en curso, y al cambiar de minuto se escribe su registro y se acumula en
+la hora en curso. Al cerrar, el minuto y la hora en curso se guardan como
+registros parciales; al volver a abrir se reconstruyen desde las muestras
+(el minuto) y los minutos (la hora), y esos registros parciales se
+sobrescriben en sitio: un reinicio no parte la hora en dos filas.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+STORE_DIR = Path.home() / ".cache" / "system_health"
+MAGIC = b"SHTS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQQ4x")  # magic, versión, tamaño registro, capacidad, next, count
+
+FIELDS = ("cpu", "memory", "disk")
+RAW = struct.Struct("<dfff")           # ts, cpu, memory, disk
+ROLLUP = struct.Struct("<dIffffff")    # inicio, muestras, (media, máximo) por campo
+
+DEFAULT_MAX_MB = 16                    # tope de los datos sin agregar
+ROLLUP_CAPACITY = {"1m": 60 * 24 * 90, "1h": 24 * 365 * 5}  # 90 días / 5 años
+ROLLUP_SECONDS = {"1m": 60, "1h": 3600}
+LEVELS = ("raw", "1m", "1h")
+
+
+class Sample(NamedTuple):
+    ts: float
+    cpu: float
+    memory: float
+    disk: float
+
+
+class Rollup(NamedTuple):
+    ts: float       # inicio del tramo
+    count: int
+    cpu_mean: float
+    cpu_max: float
+    memory_mean: float
+    memory_max: float
+    disk_mean: float
+    disk_max: float
+
+# --------------------------------------------------------------------------- #
+# Archivo circular
+# --------------------------------------------------------------------------- #
+class RingFile:
+    """Registros de 'record' (struct) en un archivo circular mapeado en memoria."""
+
+    def __init__(self, path: Path, record: struct.Struct, capacity: int,
+                 writable: bool = True) -> None:
+        self.path = Path(path)
+        self.record = record
+        self.writable = writable
+        self._mm: Optional[mmap.mmap] = None
+        self._fd = -1
+        if writable:
+            self._open_rw(max(1, capacity))
+        else:
+            self._open_ro()
+
+    def _open_rw(self, capacity: int) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        old = None
+        if self.path.exists():
+            try:
+                old = RingFile(self.path, self.record, 0, writable=False)
+                if old.capacity == capacity:
+                    old.close()
+                    old = None
+            except ValueError as exc:
+                logging.warning("Discarding %s: %s", self.path, exc)
+                old = None
+                self.path.unlink()
+        if old is not None:
+            # Cambió la capacidad: se reescribe con los registros más recientes.
+            records = list(old.raw_records(max(0, len(old) - capacity), len(old)))
+            old.close()
+            self.path.unlink()
+        else:
+            records = []
+        fresh = not self.path.exists()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = HEADER.size + capacity * self.record.size
+        if fresh:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        if fresh:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.record.size, capacity, 0, 0)
+        self._read_header()
+        for rec in records:
+            self._append_raw(rec)
+
+    def _open_ro(self) -> None:
+        self._fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            os.close(self._fd)
+            raise ValueError("empty file") from None
+        self._read_header()
+
+    def _read_header(self) -> None:
+        if len(self._mm) < HEADER.size:
+            raise ValueError("truncated header")
+        magic, version, rec_size, capacity, _, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rec_size != self.record.size:
+            self.close()
+            raise ValueError("not a metrics file of this version")
+        if len(self._mm) < HEADER.size + capacity * rec_size:
+            self.close()
+            raise ValueError("truncated file")
+        self.capacity = capacity
+
+    def _state(self) -> Tuple[int, int]:
+        """(siguiente posición, número de registros) según la cabecera."""
+        _, _, _, _, nxt, count = HEADER.unpack_from(self._mm, 0)
+        return nxt, count
+
+    def __len__(self) -> int:
+        return self._state()[1]
+
+    # ....................................................................... #
+    def _append_raw(self, data: bytes) -> None:
+        nxt, count = self._state()
+        self._mm[HEADER.size + nxt * self.record.size:
+                 HEADER.size + (nxt + 1) * self.record.size] = data
+        # La cabecera se actualiza después del registro: un lector nunca ve
+        # una posición contada que aún no esté escrita.
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.record.size, self.capacity,
+                         (nxt + 1) % self.capacity, min(count + 1, self.capacity))
+
+    def append(self, *values) -> None:
+        self._append_raw(self.record.pack(*values))
+
+    def _offset(self, i: int, nxt: int, count: int) -> int:
+        """Desplazamiento del registro lógico i (0 = el más antiguo)."""
+        return HEADER.size + ((nxt - count + i) % self.capacity) * self.record.size
+
+    def raw_records(self, start: int, stop: int) -> Iterator[bytes]:
+        nxt, count = self._state()
+        for i in range(max(0, start), min(stop, count)):
+            off = self._offset(i, nxt, count)
+            yield self._mm[off:off + self.record.size]
+
+    def _ts(self, i: int, nxt: int, count: int) -> float:
+        return struct.unpack_from("<d", self._mm, self._offset(i, nxt, count))[0]
+
+    def range(self, since: float = float("-inf"), until: float = float("inf")) -> Iterator[tuple]:
+        """Registros con since <= ts < until, por búsqueda binaria."""
+        nxt, count = self._state()
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts(mid, nxt, count) < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        for i in range(lo, count):
+            rec = self.record.unpack_from(self._mm, self._offset(i, nxt, count))
+            if rec[0] >= until:
+                break
+            yield rec
+
+    def replace_last(self, *values) -> None:
+        """Sobrescribe el registro más reciente (un agregado parcial)."""
+        nxt, count = self._state()
+        if not count:
+            raise IndexError("empty ring")
+        self.record.pack_into(self._mm, self._offset(count - 1, nxt, count), *values)
+
+    def last(self) -> Optional[tuple]:
+        nxt, count = self._state()
+        if not count:
+            return None
+        return self.record.unpack_from(self._mm, self._offset(count - 1, nxt, count))
+
+    def flush(self) -> None:
+        if self._mm is not None and self.writable:
+            self._mm.flush()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self.flush()
+            self._mm.close()
+            self._mm = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+# --------------------------------------------------------------------------- #
+# Agregados
+# --------------------------------------------------------------------------- #
+class _Bucket:
+    """Acumulador de un tramo: cuenta, suma y máximo por campo.
+
+    'stored' indica que su registro parcial ya es el último del archivo y
+    debe sobrescribirse en lugar de añadirse.
+    """
+    __slots__ = ("start", "count", "sums", "maxs", "stored")
+
+    def __init__(self, start: float, stored: bool = False) -> None:
+        self.start = start
+        self.stored = stored
+        self.count = 0
+        self.sums = [0.0] * len(FIELDS)
+        self.maxs = [float("-inf")] * len(FIELDS)
+
+    def add(self, values, count: int = 1, maxs=None) -> None:
+        self.count += count
+        for i, v in enumerate(values):
+            self.sums[i] += v * count
+            self.maxs[i] = max(self.maxs[i], v if maxs is None else maxs[i])
+
+    def record(self) -> tuple:
+        out = [self.start, self.count]
+        for s, m in zip(self.sums, self.maxs):
+            out += [s / self.count, m]
+        return tuple(out)
+
+
+class MetricsStore:
+    """Escritor (desde el monitor) y lector (desde 'query') del histórico."""
+
+    def __init__(self, directory: Optional[Path] = None, max_mb: float = DEFAULT_MAX_MB,
+                 writable: bool = True) -> None:
+        self.directory = Path(directory) if directory else STORE_DIR
+        self.writable = writable
+        self._lock = threading.Lock()
+        raw_capacity = int(max_mb * 1024 * 1024) // RAW.size
+        self.files: Dict[str, RingFile] = {}
+        for level, rec, cap in (("raw", RAW, raw_capacity),
+                                ("1m", ROLLUP, ROLLUP_CAPACITY["1m"]),
+                                ("1h", ROLLUP, ROLLUP_CAPACITY["1h"])):
+            path = self.directory / f"{level}.bin"
+            if not writable and not path.exists():
+                continue
+            self.files[level] = RingFile(path, rec, cap, writable)
+        self._buckets: Dict[str, Optional[_Bucket]] = {"1m": None, "1h": None}
+        if writable:
+            self._resume()
+        self._last_flush = time.monotonic()
+
+    def _resume(self) -> None:
+        """Reconstruye el minuto y la hora en curso de la última ejecución."""
+        last = self.files["raw"].last()
+        if last is None:
+            return
+        minute = last[0] - last[0] % ROLLUP_SECONDS["1m"]
+        hour = minute - minute % ROLLUP_SECONDS["1h"]
+        for level, start in (("1m", minute), ("1h", hour)):
+            rec = self.files[level].last()
+            if rec is not None and rec[0] > start:
+                return  # el reloj fue hacia atrás: no mezclar tramos
+        # El minuto, desde las muestras; la hora, desde los minutos
+        # anteriores (el minuto en curso se le suma al cerrarse).
+        m = _Bucket(minute, self._is_last("1m", minute))
+        for rec in self.files["raw"].range(minute):
+            m.add(rec[1:])
+        h = _Bucket(hour, self._is_last("1h", hour))
+        for rec in self.files["1m"].range(hour, minute):
+            h.add(rec[2::2], rec[1], rec[3::2])
+        self._buckets["1m"] = m if m.count else None
+        self._buckets["1h"] = h if h.count or h.stored else None
+
+    def _is_last(self, level: str, start: float) -> bool:
+        rec = self.files[level].last()
+        return rec is not None and rec[0] == start
+
+    def append(self, ts: float, metrics) -> None:
+        values = [float(getattr(metrics, f)) for f in FIELDS]
+        with self._lock:
+            self.files["raw"].append(ts, *values)
+            self._roll("1m", ts, values, 1, None)
+            if time.monotonic() - self._last_flush > 60:
+                for f in self.files.values():
+                    f.flush()
+                self._last_flush = time.monotonic()
+
+    def _roll(self, level: str, ts: float, values, count: int, maxs) -> None:
+        seconds = ROLLUP_SECONDS[level]
+        start = ts - ts % seconds
+        bucket = self._buckets[level]
+        if bucket is not None and bucket.start != start:
+            self._write(level, bucket)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[level] = _Bucket(start)
+        bucket.add(values, count, maxs)
+
+    def _write(self, level: str, bucket: _Bucket) -> None:
+        """Guarda el registro de un tramo y, si es un minuto, lo suma a su hora."""
+        rec = bucket.record()
+        if bucket.stored:
+            self.files[level].replace_last(*rec)
+        else:
+            self.files[level].append(*rec)
+        if level == "1m":
+            self._roll("1h", rec[0], rec[2::2], rec[1], rec[3::2])
+
+    def query(self, level: str, since: float = float("-inf"),
+              until: float = float("inf")) -> List[tuple]:
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level {level!r}")
+        ring = self.files.get(level)
+        if ring is None:
+            return []
+        wrap = Sample if level == "raw" else Rollup
+        return [wrap(*rec) for rec in ring.range(since, until)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self.writable:
+                # Los tramos en curso se guardan como parciales.
+                for level in ("1m", "1h"):
+                    bucket = self._buckets[level]
+                    if bucket is not None and bucket.count:
+                        self._write(level, bucket)
+                    self._buckets[level] = None
+            for f in self.files.values():
+                f.close()
+
+# --------------------------------------------------------------------------- #
+# Fechas para 'query'
+# --------------------------------------------------------------------------- #
+_RELATIVE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_time(text: str, now: Optional[float] = None) -> float:
+    """'90m', '2h', '7d' (hace tanto) o fecha ISO ('2026-10-17T08:00') -> epoch."""
+    now = time.time() if now is None else now
+    m = _RELATIVE.match(text)
+    if m:
+        return now - float(m.group(1)) * _UNITS[m.group(2)]
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time {text!r} (use 90m, 2h, 7d or an ISO date)") from None
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+log_output.py
+Capa de salida no bloqueante para los scripts que procesan archivo a archivo.
+
+- Los handlers del logger raíz (archivo + consola) pasan a un hilo propio
+  vía QueueHandler/QueueListener: registrar un mensaje solo es encolarlo.
+- El detalle por archivo se registra en DEBUG y solo se escribe con
+  --verbose; comprobarlo cuesta una comparación de nivel.
+- --progress muestra una barra compacta en stderr, refrescada por un hilo
+  cada pocos segundos; mientras tanto la consola solo recibe avisos.
+- --events escribe un registro JSONL legible por máquina (un evento por
+  línea) también desde un hilo en segundo plano.
+
+Uso:
+    output = start_output(verbose=args.verbose, progress=args.progress, events=args.events)
+    try:
+        ...
+        output.progress.update(bytes=size)
+        output.event("moved", src=str(src), dst=str(dst))
+    finally:
+        output.close()
+"""
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+PROGRESS_INTERVAL = 2.0  # segundos entre refrescos de la barra
+BAR_WIDTH = 30
+
+
+class Progress:
+    """Contadores baratos; un hilo los pinta cada 'interval' segundos."""
+
+    def __init__(self, label: str = "archivos", total: int = 0,
+                 interval: float = PROGRESS_INTERVAL, stream=sys.stderr) -> None:
+        self.label = label
+        self.total = total
+        self.count = 0
+        self.bytes = 0
+        self.errors = 0
+        self._interval = interval
+        self._stream = stream
+        self._tty = stream.isatty()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()  # update() llega desde los pools de trabajo
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="progress", daemon=True)
+        self._thread.start()
+
+    def update(self, n: int = 1, bytes: int = 0, error: bool = False) -> None:
+        # '+=' no es atómico entre hilos: sin lock se perderían incrementos.
+        with self._lock:
+            self.count += n
+            self.bytes += bytes
+            if error:
+                self.errors += 1
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self._start
+        rate = self.count / elapsed if elapsed else 0.0
+        text = f"{self.count} {self.label}"
+        if self.total:
+            done = min(self.count / self.total, 1.0)
+            filled = int(done * BAR_WIDTH)
+            text = f"[{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {done:6.1%} {self.count}/{self.total} {self.label}"
+        if self.bytes:
+            text += f", {self.bytes / (1024 * 1024):.1f} MB"
+        text += f", {rate:.0f}/s"
+        if self.errors:
+            text += f", {self.errors} errores"
+        return text
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            self._paint()
+
+    def _paint(self, final: bool = False) -> None:
+        if self._tty:
+            self._stream.write("\r" + self.line() + ("\n" if final else ""))
+        else:
+            self._stream.write(self.line() + "\n")
+        self._stream.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._paint(final=True)
+
+
+class _NullProgress:
+    total = 0
+
+    def update(self, n: int = 1, bytes: int = 0, error: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class _EventQueueHandler(logging.handlers.QueueHandler):
+    """Encola el dict del evento tal cual; el JSON se genera en el hilo escritor."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class Output:
+    def __init__(self, verbose: bool = False, progress: bool = False,
+                 events: Optional[Path] = None, label: str = "archivos") -> None:
+        root = logging.getLogger()
+        handlers = list(root.handlers)
+        self._levels = [(h, h.level) for h in handlers]
+        self._root_level = root.level
+        if progress and not verbose:
+            # La barra ocupa la consola: ahí solo llegan avisos y errores.
+            for h in handlers:
+                if isinstance(h, logging.StreamHandler) and not isinstance(h, logging.FileHandler):
+                    h.setLevel(logging.WARNING)
+        if verbose:
+            root.setLevel(logging.DEBUG)
+        for h in handlers:
+            root.removeHandler(h)
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._queue_handler = logging.handlers.QueueHandler(log_queue)
+        root.addHandler(self._queue_handler)
+        self._listeners = [
+            logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        ]
+
+        self._events: Optional[logging.Logger] = None
+        if events:
+            fh = logging.FileHandler(events, encoding="utf-8")
+            fh.setFormatter(_JsonFormatter())
+            ev_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self._events = logging.getLogger(f"{__name__}.events")
+            self._events.propagate = False
+            self._events.setLevel(logging.INFO)
+            self._events.addHandler(_EventQueueHandler(ev_queue))
+            self._listeners.append(logging.handlers.QueueListener(ev_queue, fh))
+        for listener in self._listeners:
+            listener.start()
+
+        self.progress = Progress(label) if progress else _NullProgress()
+
+    def event(self, kind: str, **fields) -> None:
+        """Añade un evento al JSONL (no hace nada si no se pidió --events)."""
+        if self._events is not None:
+            self._events.info({"ts": time.time(), "event": kind, **fields})
+
+    def close(self) -> None:
+        self.progress.close()
+        for listener in self._listeners:
+            listener.stop()  # vacía la cola antes de volver
+        # Lo que se registre después vuelve a escribirse de forma directa.
+        root = logging.getLogger()
+        root.setLevel(self._root_level)  # --verbose lo bajó a DEBUG
+        root.removeHandler(self._queue_handler)
+        for h, level in self._levels:
+            h.setLevel(level)
+            root.addHandler(h)
+        if self._events is not None:
+            for h in list(self._events.handlers):
+                self._events.removeHandler(h)
+
+
+class _NullOutput:
+    progress = _NullProgress()
+
+    def event(self, kind: str, **fields) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+NULL_OUTPUT = _NullOutput()
+
+
+def start_output(verbose: bool = False, progress: bool = False,
+                 events: Optional[Path] = None, label: str = "archivos") -> Output:
+    return Output(verbose=verbose, progress=progress, events=events, label=label)
+
+
+def add_output_args(parser) -> None:
+    """Añade --verbose / --progress / --events a un parser de argparse."""
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Detalle por archivo en consola y log")
+    parser.add_argument("--progress", action="store_true",
+                        help="Barra de progreso compacta en lugar de líneas por archivo")
+    parser.add_argument("--events", type=Path, metavar="PATH",
+                        help="Registro de eventos JSONL legible por máquina")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+media_dates.py
+Fecha de captura de fotos y videos leyendo solo las cabeceras.
+
+- JPEG: se saltan segmentos con seek hasta el APP1 "Exif" y se lee
+  DateTimeOriginal (o DateTimeDigitized / DateTime).
+- TIFF (y RAW basados en TIFF): se siguen los punteros de los IFD con
+  lecturas puntuales.
+- MP4/MOV/3GP/M4V: se saltan las cajas de primer nivel (incluida 'mdat')
+  hasta 'moov' y se lee creation_time de 'mvhd'.
+
+Nunca se lee el archivo entero. Si no hay metadatos válidos se usa el
+mtime. Los resultados se guardan en una caché SQLite con clave
+(ruta, tamaño, mtime) para no volver a abrir archivos sin cambios.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, NamedTuple, Optional, Set, Tuple
+
+CACHE_DIR = Path.home() / ".cache" / "media_dates"
+CACHE_PATH = CACHE_DIR / "dates.sqlite"
+
+MAX_JPEG_SEGMENTS = 64
+MAX_BOXES = 256
+MAX_IFD_ENTRIES = 512
+
+# Etiquetas EXIF
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+
+class MediaDate(NamedTuple):
+    date: datetime  # hora local, sin zona (como los nombres que se generan)
+    source: str     # "exif", "mvhd" o "mtime"
+
+# --------------------------------------------------------------------------- #
+# EXIF / TIFF
+# --------------------------------------------------------------------------- #
+Reader = Callable[[int, int], bytes]  # (offset, n) -> bytes, relativo al inicio TIFF
+
+
+def parse_exif_datetime(raw: bytes) -> Optional[datetime]:
+    """'2021:07:14 18:03:55' -> datetime; None si está vacío o es inválido."""
+    text = raw.split(b"\0", 1)[0].strip().decode("ascii", "ignore")
+    try:
+        return datetime.strptime(text[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _read_ifd(read: Reader, offset: int, endian: str) -> dict:
+    """Etiquetas de un IFD: tag -> (tipo, cuenta, valor/offset en bruto)."""
+    head = read(offset, 2)
+    if len(head) < 2:
+        return {}
+    count = min(struct.unpack(endian + "H", head)[0], MAX_IFD_ENTRIES)
+    data = read(offset + 2, count * 12)
+    entries = {}
+    for i in range(len(data) // 12):
+        tag, typ, n = struct.unpack_from(endian + "HHI", data, i * 12)
+        entries[tag] = (typ, n, data[i * 12 + 8:i * 12 + 12])
+    return entries
+
+
+def _ascii_value(read: Reader, entry: tuple, endian: str) -> bytes:
+    typ, n, raw = entry
+    if typ != 2:
+        return b""
+    if n <= 4:
+        return raw[:n]
+    return read(struct.unpack(endian + "I", raw)[0], min(n, 64))
+
+
+def tiff_date(read: Reader) -> Optional[datetime]:
+    """Fecha de captura de una estructura TIFF/EXIF."""
+    head = read(0, 8)
+    if head[:4] == b"II*\0":
+        endian = "<"
+    elif head[:4] == b"MM\0*":
+        endian = ">"
+    else:
+        return None
+    ifd0 = _read_ifd(read, struct.unpack(endian + "I", head[4:8])[0], endian)
+    exif_ptr = ifd0.get(TAG_EXIF_IFD)
+    if exif_ptr is not None:
+        exif = _read_ifd(read, struct.unpack(endian + "I", exif_ptr[2])[0], endian)
+        for tag in (TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED):
+            if tag in exif:
+                date = parse_exif_datetime(_ascii_value(read, exif[tag], endian))
+                if date:
+                    return date
+    if TAG_DATETIME in ifd0:
+        return parse_exif_datetime(_ascii_value(read, ifd0[TAG_DATETIME], endian))
+    return None
+
+
+def jpeg_date(f: BinaryIO) -> Optional[datetime]:
+    """Recorre los segmentos JPEG con seek hasta el APP1 Exif."""
+    f.seek(2)  # SOI
+    for _ in range(MAX_JPEG_SEGMENTS):
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return None
+        marker, length = head[1], struct.unpack(">H", head[2:])[0]
+        if marker in (0xDA, 0xD9):  # empiezan los datos de imagen: no hay EXIF
+            return None
+        if marker == 0xE1:
+            segment = f.read(length - 2)
+            if segment[:6] == b"Exif\0\0":
+                tiff = memoryview(segment)[6:]
+                return tiff_date(lambda off, n: bytes(tiff[off:off + n]))
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def tiff_file_date(f: BinaryIO) -> Optional[datetime]:
+    def read(off: int, n: int) -> bytes:
+        f.seek(off)
+        return f.read(n)
+    return tiff_date(read)
+
+# --------------------------------------------------------------------------- #
+# MP4 / MOV
+# --------------------------------------------------------------------------- #
+def _boxes(f: BinaryIO, start: int, end: int):
+    """Genera (tipo, inicio_datos, fin) de las cajas entre start y end."""
+    pos = start
+    for _ in range(MAX_BOXES):
+        if pos + 8 > end:
+            return
+        f.seek(pos)
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        size, kind = struct.unpack(">I4s", head)
+        data = pos + 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            data += 8
+        elif size == 0:
+            size = end - pos  # hasta el final del archivo
+        if size < data - pos:
+            return
+        yield kind, data, pos + size
+        pos += size
+
+
+def mvhd_date(f: BinaryIO, file_size: int) -> Optional[datetime]:
+    """creation_time de moov/mvhd (segundos desde 1904 en UTC)."""
+    for kind, data, end in _boxes(f, 0, file_size):
+        if kind != b"moov":
+            continue
+        for child, cdata, _ in _boxes(f, data, end):
+            if child != b"mvhd":
+                continue
+            f.seek(cdata)
+            version = f.read(4)[:1]
+            raw = f.read(8) if version == b"\x01" else f.read(4)
+            if len(raw) not in (4, 8):
+                return None
+            seconds = int.from_bytes(raw, "big")
+            if not seconds:
+                return None  # muchos programas dejan 0
+            try:
+                utc = MP4_EPOCH + timedelta(seconds=seconds)
+            except OverflowError:
+                return None
+            return utc.astimezone().replace(tzinfo=None)
+        return None
+    return None
+
+# --------------------------------------------------------------------------- #
+# Detección y caché
+# --------------------------------------------------------------------------- #
+def read_media_date(path: str, size: int) -> Tuple[Optional[datetime], str]:
+    """(fecha, origen) de los metadatos; (None, "") si no hay."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+            if head[:3] == b"\xff\xd8\xff":
+                return jpeg_date(f), "exif"
+            if head[:4] in (b"II*\0", b"MM\0*"):
+                return tiff_file_date(f), "exif"
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free"):
+                return mvhd_date(f, size), "mvhd"
+    except (OSError, struct.error, ValueError) as exc:
+        logging.debug("Sin metadatos legibles en %s: %s", path, exc)
+    return None, ""
+
+
+class DateCache:
+    """Caché persistente (ruta, tamaño, mtime_ns) -> fecha de metadatos.
+
+    La clave usa el mtime en nanosegundos (entero): se compara exacto sin
+    los redondeos de un float. close(prune_under=carpeta) borra además las
+    entradas de esa carpeta cuyos archivos ya no existen; el resto de la
+    caché (otras carpetas, discos desmontados) no se toca.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None) -> None:
+        self.db_path = Path(db_path) if db_path else CACHE_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(dates)")}
+        if columns and "mtime_ns" not in columns:
+            # Tabla de una versión que guardaba el mtime como REAL: es una
+            # caché, se descarta y se vuelve a llenar.
+            logging.info("Caché de fechas %s con formato antiguo: se descarta.", self.db_path)
+            self._db.execute("DROP TABLE dates")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dates ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " date TEXT, source TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self.hits = 0
+        self.misses = 0
+        self._seen: Set[str] = set()  # rutas vistas en esta ejecución: existen
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[Tuple[Optional[datetime], str]]:
+        with self._lock:
+            self._seen.add(path)
+            row = self._db.execute(
+                "SELECT size, mtime_ns, date, source FROM dates WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return (datetime.fromisoformat(row[2]) if row[2] else None), row[3]
+
+    def put(self, path: str, size: int, mtime_ns: int, date: Optional[datetime], source: str) -> None:
+        with self._lock:
+            self._seen.add(path)
+            self._db.execute(
+                "INSERT OR REPLACE INTO dates (path, size, mtime_ns, date, source) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, date.isoformat() if date else None, source),
+            )
+
+    def moved(self, old: str, new: str) -> None:
+        """El archivo cambió de ruta (mismo contenido y mtime)."""
+        with self._lock:
+            self._db.execute("DELETE FROM dates WHERE path = ?", (new,))
+            self._db.execute("UPDATE dates SET path = ? WHERE path = ?", (new, old))
+            self._seen.discard(old)
+            self._seen.add(new)
+
+    def prune(self, root: str) -> int:
+        """Borra las entradas bajo 'root' cuyos archivos ya no existen; devuelve cuántas.
+
+        Cuesta un stat por cada entrada de 'root' que no se haya visto en
+        esta ejecución (rango por prefijo, el resto de la caché no se lee).
+        """
+        root = os.path.abspath(root)
+        lo, hi = root + os.sep, root + chr(ord(os.sep) + 1)
+        with self._lock:
+            paths = [row[0] for row in self._db.execute(
+                "SELECT path FROM dates WHERE path = ? OR (path >= ? AND path < ?)", (root, lo, hi))]
+        gone = [(p,) for p in paths if p not in self._seen and not os.path.exists(p)]
+        with self._lock:
+            self._db.executemany("DELETE FROM dates WHERE path = ?", gone)
+        return len(gone)
+
+    def close(self, prune_under: Optional[str] = None) -> None:
+        pruned = self.prune(prune_under) if prune_under else 0
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+        logging.debug("Caché de fechas %s: %d aciertos, %d lecturas, %d entradas obsoletas borradas.",
+                      self.db_path, self.hits, self.misses, pruned)
+
+
+def capture_date(path: str, size: int, mtime_ns: int,
+                 cache: Optional[DateCache] = None) -> MediaDate:
+    """Fecha de captura de 'path' o, si no consta, su fecha de modificación.
+
+    'size' y 'mtime_ns' son los del stat que ya tenga quien llama (p. ej.
+    el de fastwalk). En la caché la ruta se guarda absoluta; sin mtime_ns
+    (0) no se usa la caché y, si hace falta la fecha de modificación, se
+    hace stat del archivo.
+    """
+    key = os.path.abspath(path)
+    use_cache = cache is not None and mtime_ns > 0
+    cached = cache.get(key, size, mtime_ns) if use_cache else None
+    if cached is not None:
+        date, source = cached
+    else:
+        date, source = read_media_date(path, size)
+        if use_cache:
+            cache.put(key, size, mtime_ns, date, source)
+    if date is None:
+        if not mtime_ns:
+            mtime_ns = os.stat(path).st_mtime_ns
+        return MediaDate(datetime.fromtimestamp(mtime_ns / 1e9), "mtime")
+    return MediaDate(date, source)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+media_pipeline.py
+Renombra fotos o videos como AAAAMMDD_HHMMSS.ext y los organiza en
+carpetas por año. renombrar_imagenes.py y organizar_videos.py son atajos
+de este módulo.
+
+- El origen se recorre con fastwalk (un solo stat por archivo, opcionalmente
+  con subcarpetas).
+- La fecha de captura (EXIF / mvhd, ver media_dates) se extrae en un pool
+  de hilos; los resultados se consumen en el orden del recorrido.
+- Un único hilo aplica los movimientos en ese orden, así que los sufijos
+  ante colisiones son deterministas. Las carpetas por año se listan una vez
+  (DestinationIndex) y los duplicados exactos van a la cuarentena.
+
+Uso:
+    python media_pipeline.py --kind images ~/Fotos/importar --dst ~/Fotos
+    python media_pipeline.py --kind videos . --recursive --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from dest_index import DestinationIndex
+from fastwalk import FileEntry, list_dir, walk
+from log_output import NULL_OUTPUT, add_output_args, start_output
+from media_dates import DateCache, MediaDate, capture_date
+from move_executor import MoveExecutor
+from quarantine import QUARANTINE_DIRNAME, Quarantine
+from run_stats import NULL_STATS, from_args as stats_from_args
+
+DEFAULT_WORKERS = 8
+YEAR_DIR = re.compile(r"^\d{4}$")
+
+
+class MediaKind(NamedTuple):
+    extensions: Tuple[str, ...]
+    label: str
+    article: str  # "Las" / "Los", para los mensajes
+    icon: str
+
+
+KINDS: Dict[str, MediaKind] = {
+    "images": MediaKind(
+        ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'),
+        "imágenes", "Las", "📄",
+    ),
+    "videos": MediaKind(
+        ('.mp4', '.mov', '.avi', '.wmv', '.flv', '.webm', '.mkv',
+         '.m4v', '.mpg', '.mpeg', '.3gp', '.3g2', '.mts', '.m2ts',
+         '.vob', '.ogv', '.divx', '.f4v', '.m4p'),
+        "videos", "Los", "🎬",
+    ),
+}
+
+
+def tamano_legible(tamano_bytes: int) -> str:
+    """Tamaño del archivo en formato legible"""
+    if tamano_bytes >= 1024 * 1024 * 1024:
+        return f"{tamano_bytes/(1024*1024*1024):.2f} GB"
+    elif tamano_bytes >= 1024 * 1024:
+        return f"{tamano_bytes/(1024*1024):.2f} MB"
+    elif tamano_bytes >= 1024:
+        return f"{tamano_bytes/1024:.2f} KB"
+    else:
+        return f"{tamano_bytes} bytes"
+
+# --------------------------------------------------------------------------- #
+# Core
+# --------------------------------------------------------------------------- #
+class MediaPipeline:
+    def __init__(
+        self,
+        src: Path,
+        dst: Optional[Path] = None,
+        kind: str = "images",
+        dry_run: bool = False,
+        recursive: bool = False,
+        workers: int = DEFAULT_WORKERS,
+        use_mtime: bool = False,
+        use_cache: bool = True,
+        stats=NULL_STATS,
+        output=NULL_OUTPUT,
+    ) -> None:
+        self.src = Path(src).expanduser().resolve()
+        self.dst = Path(dst).expanduser().resolve() if dst else self.src
+        self._dst = str(self.dst)
+        self.kind = KINDS[kind]
+        self.dry_run = dry_run
+        self.recursive = recursive
+        self.workers = max(1, workers)
+        self.use_mtime = use_mtime
+        self.stats = stats
+        self.output = output
+        self.cache = DateCache() if use_cache and not use_mtime else None
+        self.dest = DestinationIndex(create=not dry_run, stats=stats)
+        self.mover = MoveExecutor(workers=1, stats=stats)
+        # Los duplicados exactos no se borran: van a la cuarentena de file_cleaner
+        self.quarantine = Quarantine(self.src)
+        self.moved = 0
+        self.suffixed = 0
+        self.duplicates = 0
+
+    # ....................................................................... #
+    def iter_sources(self) -> Iterator[FileEntry]:
+        """Archivos del tipo pedido, en orden estable (por carpeta y nombre)."""
+        exts = self.kind.extensions
+        if not self.recursive:
+            listings = [list_dir(str(self.src))]
+        else:
+            listings = walk(str(self.src), skip_paths=self._skip_paths())
+        for listing in listings:
+            self.stats.count("listdir")
+            self.stats.count("stat", len(listing.files))
+            for entry in sorted(listing.files):
+                if entry.name.lower().endswith(exts):
+                    yield entry
+
+    def _skip_paths(self) -> List[str]:
+        """No volver a entrar en lo ya organizado ni en la cuarentena."""
+        skip = [str(self.src / QUARANTINE_DIRNAME)]
+        if self.dst != self.src:
+            skip.append(str(self.dst))
+        else:
+            try:
+                skip += [str(self.dst / d) for d in os.listdir(self.dst) if YEAR_DIR.match(d)]
+            except OSError:
+                pass
+        return skip
+
+    def _date(self, entry: FileEntry) -> MediaDate:
+        if self.use_mtime:
+            return MediaDate(datetime.fromtimestamp(entry.mtime), "mtime")
+        return capture_date(entry.path, entry.size, entry.mtime_ns, self.cache)
+
+    def iter_dated(self) -> Iterator[Tuple[FileEntry, MediaDate]]:
+        """Extrae fechas en paralelo y las entrega en el orden del recorrido.
+
+        Como mucho hay 'workers * 4' lecturas en vuelo: si el mover se
+        atrasa, el recorrido espera en lugar de acumular resultados.
+        """
+        if self.workers <= 1 or self.use_mtime:
+            for entry in self.iter_sources():
+                yield entry, self._date(entry)
+            return
+        window: Deque[Tuple[FileEntry, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media") as pool:
+            for entry in self.iter_sources():
+                window.append((entry, pool.submit(self._date, entry)))
+                if len(window) >= self.workers * 4:
+                    head, fut = window.popleft()
+                    yield head, fut.result()
+            while window:
+                head, fut = window.popleft()
+                yield head, fut.result()
+
+    # ....................................................................... #
+    def run(self) -> None:
+        logging.info("🔍 Buscando %s en %s...", self.kind.label, self.src)
+        if self.use_mtime:
+            logging.info("ℹ️ Se usará la fecha de MODIFICACIÓN del archivo")
+        else:
+            logging.info("ℹ️ Se usará la fecha de captura (EXIF / metadatos) o, si falta, la de modificación")
+        logging.info("ℹ️ %s %s se organizarán en carpetas por año en %s\n",
+                     self.kind.article, self.kind.label, self.dst)
+
+        try:
+            with self.stats.phase("pipeline"):
+                for entry, fecha in self.iter_dated():
+                    self._place(entry, fecha)
+        finally:
+            if self.cache:
+                # En simulación no se borra nada, tampoco de la caché.
+                self.cache.close(prune_under=None if self.dry_run else str(self.src))
+            self.quarantine.close()
+        self.stats.add_files(self.moved + self.duplicates)
+
+        logging.info("¡Finalizado! Se procesaron %d %s.", self.moved, self.kind.label)
+        if self.suffixed:
+            logging.info("Se añadió un sufijo a %d %s cuyo nombre ya existía en destino.",
+                         self.suffixed, self.kind.label)
+        if self.duplicates:
+            logging.info("%d duplicados exactos enviados a %s "
+                         "(recuperables con: file_cleaner.py restore %s)",
+                         self.duplicates, self.quarantine.root, self.src)
+        logging.info("%s %s se han organizado en carpetas por año.", self.kind.article, self.kind.label)
+
+    def _place(self, entry: FileEntry, fecha: MediaDate) -> None:
+        base = fecha.date.strftime("%Y%m%d_%H%M%S")
+        carpeta_año = os.path.join(self._dst, base[:4])
+        ext = os.path.splitext(entry.name)[1].lower()
+        nuevo_nombre = base + ext
+
+        # Si el nombre está ocupado se compara el contenido: un duplicado exacto
+        # no se copia; otro archivo recibe '_1', '_2'...
+        ruta_destino, duplicado = self.dest.place(carpeta_año, nuevo_nombre, entry.path, entry.size)
+        if duplicado:
+            self._quarantine_duplicate(entry, ruta_destino)
+            return
+        if os.path.basename(ruta_destino) != nuevo_nombre:
+            self.suffixed += 1
+            nuevo_nombre = os.path.basename(ruta_destino)
+
+        # Mostrar información (solo con --verbose; si no, solo cuesta la comprobación)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "%s Archivo: %s\n"
+                "   📅 Fecha (%s): %s\n"
+                "   💾 Tamaño: %s\n"
+                "   📁 Carpeta destino: %s/\n"
+                "   🏷️  Nuevo nombre: %s",
+                self.kind.icon, entry.path, fecha.source,
+                fecha.date.strftime("%Y-%m-%d %H:%M:%S"), tamano_legible(entry.size),
+                carpeta_año, nuevo_nombre,
+            )
+
+        if self.dry_run:
+            logging.info("[DRY-RUN] %s -> %s", entry.path, ruta_destino)
+            self.moved += 1
+            return
+
+        try:
+            if self.dest.ensure_dir(carpeta_año):
+                logging.info("📁 Carpeta creada: %s", carpeta_año)
+            while True:
+                try:
+                    self.mover.move(entry.path, ruta_destino)
+                    break
+                except FileExistsError:
+                    # Apareció después de listar el destino: no se pisa.
+                    ocupado = ruta_destino
+                    ruta_destino = self.dest.reserve(carpeta_año, base + ext)
+                    if os.path.basename(ocupado) == base + ext:
+                        self.suffixed += 1
+                    logging.warning("Ya existe %s: se usará %s.", ocupado, ruta_destino)
+            if self.cache:
+                self.cache.moved(entry.path, ruta_destino)
+            logging.debug("   ✅ Movido a: %s\n", ruta_destino)
+            self.moved += 1
+            self.output.progress.update(bytes=entry.size)
+            self.output.event("moved", src=entry.path, dst=ruta_destino)
+        except Exception as e:
+            self.dest.release(ruta_destino)
+            self.stats.error("move")
+            logging.error("   ❌ Error con %s: %s", entry.name, e)
+            self.output.progress.update(error=True)
+            self.output.event("error", src=entry.path, error=str(e))
+
+    def _quarantine_duplicate(self, entry: FileEntry, original: str) -> None:
+        self.duplicates += 1
+        if self.dry_run:
+            logging.info("[DRY-RUN] %s es idéntico a %s: iría a cuarentena", entry.path, original)
+            return
+        try:
+            qid = self.quarantine.put(entry.path, entry.size, entry.mtime)
+        except OSError as e:
+            self.duplicates -= 1
+            self.stats.error("quarantine")
+            logging.error("   ❌ Error con %s: %s", entry.name, e)
+            self.output.progress.update(error=True)
+            self.output.event("error", src=entry.path, error=str(e))
+            return
+        logging.debug("   ♻️  %s es idéntico a %s: enviado a cuarentena\n", entry.name, original)
+        self.output.progress.update(bytes=entry.size)
+        self.output.event("duplicate", src=entry.path, dst=original, id=qid)
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+def build_parser(kind: Optional[str] = None) -> argparse.ArgumentParser:
+    """Parser común; con 'kind' fijo (atajos) no se pide --kind."""
+    if kind:
+        description = f"Renombra y organiza {KINDS[kind].label} por año (por defecto, carpeta actual)."
+    else:
+        description = "Renombra fotos o videos por fecha de captura y los organiza por año."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("src", nargs="?", default=".", help="Carpeta de origen (default: actual)")
+    parser.add_argument("--dst", type=Path, help="Carpeta donde crear las carpetas por año (default: src)")
+    if kind is None:
+        parser.add_argument("--kind", choices=sorted(KINDS), required=True, help="Tipo de archivo")
+    parser.add_argument("--dry-run", action="store_true", help="Simula sin mover nada")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Incluye las subcarpetas del origen")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Hilos para leer metadatos (default {DEFAULT_WORKERS})")
+    parser.add_argument("--mtime", action="store_true",
+                        help="Usar siempre la fecha de modificación en lugar de EXIF/metadatos")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No usar la caché de fechas (~/.cache/media_dates)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Muestra al final el tiempo por fase y las llamadas al sistema")
+    parser.add_argument("--stats-json", type=Path, metavar="PATH",
+                        help="Guarda el informe de métricas en JSON")
+    add_output_args(parser)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, kind: Optional[str] = None) -> None:
+    args = build_parser(kind).parse_args(argv)
+    kind = kind or args.kind
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Primero las métricas: cronometran los handlers reales, que start_output
+    # pasa al hilo de la cola (si no, solo se mediría el encolado).
+    stats = stats_from_args(args.profile, args.stats_json)
+    output = start_output(verbose=args.verbose, progress=args.progress, events=args.events,
+                          label=KINDS[kind].label)
+    pipeline = MediaPipeline(
+        args.src, args.dst, kind=kind, dry_run=args.dry_run, recursive=args.recursive,
+        workers=args.workers, use_mtime=args.mtime, use_cache=not args.no_cache,
+        stats=stats, output=output,
+    )
+    try:
+        pipeline.run()
+    finally:
+        output.close()
+        stats.finish(args.stats_json, args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+move_executor.py
+Movimiento de archivos en paralelo con atajo de os.rename.
+
+- El dispositivo (st_dev) de cada carpeta se consulta una sola vez: si
+  origen y destino coinciden se mueve con os.link + os.unlink, que es
+  instantáneo y, a diferencia de os.rename, nunca pisa un destino creado
+  después de listar la carpeta (FileExistsError). Donde no hay enlaces
+  duros se comprueba el destino justo antes del os.rename.
+- Si no (u os.rename responde EXDEV, como ocurre entre bind mounts del
+  mismo sistema de archivos) se copia con os.copy_file_range o
+  os.sendfile, sin pasar los datos por Python, en tramos de CHUNK_BYTES;
+  después se copian los metadatos y se borra el origen.
+- Los trabajos se agrupan por carpeta destino: cada grupo se procesa en
+  orden en un solo hilo y los grupos van en paralelo, así que dentro de
+  una carpeta el orden y las comprobaciones de conflicto son los de antes.
+"""
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from run_stats import NULL_STATS
+
+DEFAULT_MOVE_WORKERS = 4
+CHUNK_BYTES = 64 * 1024 * 1024   # por llamada a copy_file_range/sendfile
+LARGE_FILE_BYTES = 256 * 1024 * 1024  # a partir de aquí se informa de la velocidad
+
+# Errores con los que la vía sin copia no está disponible y hay que bajar de nivel
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+# Errores de os.link con los que se usa os.rename comprobado: el sistema de
+# archivos no admite enlaces duros (EPERM en FAT, o protected_hardlinks) o
+# el archivo ya tiene demasiados.
+_NO_LINK_ERRNOS = {errno.EPERM, errno.EMLINK, errno.ENOSYS, errno.EOPNOTSUPP,
+                   getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+def _copy_range(src_fd: int, dst_fd: int, chunk: int) -> int:
+    copied = 0
+    while True:
+        n = os.copy_file_range(src_fd, dst_fd, chunk)
+        if n == 0:
+            return copied
+        copied += n
+
+
+def _copy_sendfile(src_fd: int, dst_fd: int, chunk: int) -> int:
+    copied = 0
+    while True:
+        n = os.sendfile(dst_fd, src_fd, copied, chunk)
+        if n == 0:
+            return copied
+        copied += n
+
+
+def _copy_read_write(src_fd: int, dst_fd: int, chunk: int) -> int:
+    copied = 0
+    buf_size = min(chunk, 1024 * 1024)
+    while True:
+        data = os.read(src_fd, buf_size)
+        if not data:
+            return copied
+        view = memoryview(data)
+        while view:
+            written = os.write(dst_fd, view)
+            view = view[written:]
+        copied += len(data)
+
+
+def copy_data(src_fd: int, dst_fd: int, chunk: int = CHUNK_BYTES) -> int:
+    """Copia el contenido de src_fd en dst_fd por la vía más directa disponible."""
+    for copier, name in ((_copy_range, "copy_file_range"), (_copy_sendfile, "sendfile")):
+        if not hasattr(os, name):
+            continue
+        try:
+            return copier(src_fd, dst_fd, chunk)
+        except OSError as exc:
+            # Solo se baja de nivel si aún no se escribió nada.
+            if exc.errno not in _FALLBACK_ERRNOS or os.lseek(dst_fd, 0, os.SEEK_CUR):
+                raise
+    return _copy_read_write(src_fd, dst_fd, chunk)
+
+
+def copy_then_unlink(src: str, dst: str, chunk: int = CHUNK_BYTES) -> int:
+    """Mueve entre dispositivos: copia, metadatos, borrado. Devuelve los bytes copiados.
+
+    El destino se crea con O_EXCL para no pisar nunca un archivo existente;
+    si la copia falla se borra el destino a medias y el origen queda intacto.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        dst_fd = os.open(dst, flags, 0o666)
+        try:
+            copied = copy_data(src_fd, dst_fd, chunk)
+        except BaseException:
+            os.close(dst_fd)
+            os.unlink(dst)
+            raise
+        os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src, dst)
+    os.unlink(src)
+    return copied
+
+
+class MoveExecutor:
+    def __init__(self, workers: int = DEFAULT_MOVE_WORKERS, chunk_bytes: int = CHUNK_BYTES,
+                 stats=NULL_STATS) -> None:
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._devices: Dict[str, int] = {}
+        self._cross: set = set()  # pares (dir_origen, dir_destino) que dieron EXDEV
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.renamed = 0
+        self.copied = 0
+        self.copied_bytes = 0
+        self.copy_seconds = 0.0
+
+    # ....................................................................... #
+    def _device(self, directory: str) -> Optional[int]:
+        dev = self._devices.get(directory)
+        if dev is None:
+            try:
+                dev = os.stat(directory).st_dev
+            except OSError:
+                return None
+            self._devices[directory] = dev
+        return dev
+
+    def same_device(self, src: str, dst: str) -> bool:
+        src_dir, dst_dir = os.path.dirname(src), os.path.dirname(dst)
+        if (src_dir, dst_dir) in self._cross:
+            return False
+        dev = self._device(src_dir)
+        return dev is not None and dev == self._device(dst_dir)
+
+    def rename_noreplace(self, src: str, dst: str) -> None:
+        """os.rename que no pisa dst: FileExistsError si ya existe.
+
+        Se enlaza dst y se borra src; si el sistema de archivos no admite
+        enlaces duros se comprueba dst y se renombra (queda una ventana de
+        una llamada al sistema).
+        """
+        try:
+            os.link(src, dst, follow_symlinks=False)
+        except NotImplementedError:
+            pass
+        except OSError as exc:
+            if exc.errno not in _NO_LINK_ERRNOS:
+                raise
+        else:
+            try:
+                os.unlink(src)
+            except BaseException:
+                os.unlink(dst)
+                raise
+            self.stats.count("link")
+            self.stats.count("unlink")
+            return
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+        os.rename(src, dst)
+        self.stats.count("rename")
+
+    def move(self, src: str, dst: str) -> None:
+        """Mueve src a dst sin pisarlo nunca: FileExistsError si dst ya existe."""
+        if self.same_device(src, dst):
+            try:
+                self.rename_noreplace(src, dst)
+            except OSError as exc:
+                if exc.errno != errno.EXDEV:
+                    raise
+                # Mismo st_dev pero otro punto de montaje (bind mount)
+                self._cross.add((os.path.dirname(src), os.path.dirname(dst)))
+            else:
+                with self._lock:
+                    self.renamed += 1
+                return
+
+        t0 = time.perf_counter()
+        size = copy_then_unlink(src, dst, self.chunk_bytes)
+        elapsed = time.perf_counter() - t0
+        self.stats.count("copy")
+        self.stats.count("unlink")
+        with self._lock:
+            self.copied += 1
+            self.copied_bytes += size
+            self.copy_seconds += elapsed
+        if size >= LARGE_FILE_BYTES:
+            logging.info("Copiado %s (%s) a %.1f MB/s", os.path.basename(src),
+                         _mb(size), size / (1024 * 1024) / elapsed if elapsed else 0.0)
+
+    # ....................................................................... #
+    def run_grouped(self, groups: Iterable[Sequence], func: Callable) -> None:
+        """Aplica func a cada elemento: en orden dentro de un grupo, grupos en paralelo."""
+        def run_group(items: Sequence) -> None:
+            for item in items:
+                func(item)
+
+        groups = list(groups)
+        if self.workers <= 1 or len(groups) <= 1:
+            for items in groups:
+                run_group(items)
+            return
+        # El pool se reutiliza entre llamadas (una por carpeta en modo recursivo).
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="move")
+        for future in [self._pool.submit(run_group, items) for items in groups]:
+            future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def log_summary(self) -> None:
+        if not self.copied:
+            return
+        rate = self.copied_bytes / (1024 * 1024) / self.copy_seconds if self.copy_seconds else 0.0
+        logging.info("Movimientos: %d renombrados, %d copiados entre dispositivos "
+                     "(%s, %.1f MB/s).", self.renamed, self.copied, _mb(self.copied_bytes), rate)
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
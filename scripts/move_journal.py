@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+move_journal.py
+Diario de escritura anticipada (JSONL) para file_organizer.
+
+Antes de mover los archivos de una carpeta se anotan todos sus
+movimientos previstos de una vez (un solo fsync por carpeta); después se
+anota cada movimiento hecho y, al terminar la carpeta, sus subcarpetas:
+
+    {"op": "start", "run": "...", "base": "...", "recursive": true, "ts": ...}
+    {"op": "plan", "src": "...", "dst": "..."}
+    {"op": "done", "src": "...", "dst": "..."}
+    {"op": "dir_done", "dir": "...", "subdirs": ["a", "b"]}
+    {"op": "end", "ts": ...}
+    {"op": "undo", "src": "...", "dst": "..."}
+    {"op": "undo_end", "ts": ...}
+
+Si una ejecución se corta (no hay "end"), la siguiente la reanuda: las
+carpetas con "dir_done" no se vuelven a listar y los "plan" sin "done"
+se comprueban en disco. Si un mismo origen se anota dos veces (su destino
+apareció ocupado y se eligió otro), vale el último "plan". El diario guarda solo la última ejecución, que es
+la que deshace --undo.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+JOURNAL_DIR = Path.home() / ".cache" / "file_organizer"
+
+Move = Tuple[str, str]
+
+
+def default_journal_path(base: Path) -> Path:
+    """Ruta del diario bajo ~/.cache, uno por carpeta organizada."""
+    digest = hashlib.sha1(str(base).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return JOURNAL_DIR / f"journal_{digest}.jsonl"
+
+
+class JournalState(NamedTuple):
+    run_id: str
+    recursive: bool
+    finished: bool
+    undone_all: bool
+    done_dirs: Dict[str, List[str]]
+    moves: List[Move]      # movimientos hechos, en orden
+    pending: List[Move]    # previstos sin confirmar
+    undone: Set[Move]
+
+
+class MoveJournal:
+    def __init__(self, base: Path, path: Optional[Path] = None) -> None:
+        self.base = Path(base)
+        self.path = Path(path) if path else default_journal_path(self.base)
+        self._lock = threading.Lock()
+        self._fh = None
+
+    # ....................................................................... #
+    def load(self) -> Optional[JournalState]:
+        """Reproduce el diario; None si no hay ejecución anotada."""
+        if not self.path.exists():
+            return None
+        state: Optional[JournalState] = None
+        planned: Dict[str, str] = {}  # origen -> destino del último "plan"
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # línea truncada por un corte
+                op = rec.get("op")
+                if op == "start":
+                    state = JournalState(rec["run"], rec.get("recursive", False), False, False,
+                                         {}, [], [], set())
+                    planned = {}
+                elif state is None:
+                    continue
+                elif op == "plan":
+                    planned[rec["src"]] = rec["dst"]
+                elif op == "done":
+                    planned.pop(rec["src"], None)
+                    state.moves.append((rec["src"], rec["dst"]))
+                elif op == "dir_done":
+                    state.done_dirs[rec["dir"]] = rec.get("subdirs", [])
+                elif op == "undo":
+                    state.undone.add((rec["src"], rec["dst"]))
+                elif op == "end":
+                    state = state._replace(finished=True)
+                elif op == "undo_end":
+                    state = state._replace(undone_all=True)
+        if state is None:
+            return None
+        state.pending.extend(planned.items())
+        return state
+
+    def recover(self, state: JournalState) -> int:
+        """Confirma los 'plan' cuyo movimiento llegó a hacerse antes del corte."""
+        recovered = [
+            (src, dst) for src, dst in state.pending
+            if not os.path.lexists(src) and os.path.lexists(dst)
+        ]
+        if recovered:
+            with self._lock:
+                self._append([{"op": "done", "src": s, "dst": d} for s, d in recovered])
+                self._fh.flush()
+            state.moves.extend(recovered)
+        state.pending.clear()
+        return len(recovered)
+
+    def begin(self, recursive: bool) -> Optional[JournalState]:
+        """Empieza una ejecución; si la anterior quedó a medias devuelve su estado."""
+        state = self.load()
+        if state is not None and not state.finished and not state.undone_all:
+            recovered = self.recover(state)
+            logging.info("Reanudando la ejecución %s: %d carpetas terminadas, %d movimientos hechos "
+                         "(%d confirmados ahora).", state.run_id, len(state.done_dirs),
+                         len(state.moves), recovered)
+            return state
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._fh = open(self.path, "w", encoding="utf-8")
+            self._append([{
+                "op": "start", "run": time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}",
+                "base": str(self.base), "recursive": recursive, "ts": time.time(),
+            }])
+            self._sync()
+        return None
+
+    # ....................................................................... #
+    def _append(self, records: Iterable[Dict]) -> None:
+        """Añade registros al diario (llamar con el lock tomado)."""
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records))
+
+    def _sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def plan(self, moves: Iterable[Move]) -> None:
+        """Anota los movimientos de una carpeta y los lleva a disco antes de hacerlos."""
+        with self._lock:
+            self._append({"op": "plan", "src": s, "dst": d} for s, d in moves)
+            self._sync()
+
+    def done(self, src: str, dst: str) -> None:
+        with self._lock:
+            self._append([{"op": "done", "src": src, "dst": dst}])
+
+    def dir_done(self, path: str, subdirs: List[str]) -> None:
+        with self._lock:
+            self._append([{"op": "dir_done", "dir": path, "subdirs": subdirs}])
+            self._fh.flush()
+
+    def undone(self, src: str, dst: str) -> None:
+        with self._lock:
+            self._append([{"op": "undo", "src": src, "dst": dst}])
+
+    def end(self, op: str = "end") -> None:
+        with self._lock:
+            self._append([{"op": op, "ts": time.time()}])
+            self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+quarantine.py
+Cuarentena reversible para file_cleaner.
+
+Los archivos "borrados" se mueven con os.rename (O(1) en el mismo sistema
+de archivos; si no, copia + borrado) a <carpeta>/.file_cleaner_quarantine/
+<run_id>/ y cada operación se anota en un manifiesto JSONL de solo
+escritura al final:
+
+    {"op": "put", "id": "...", "path": "...", "size": 123, "mtime": ..., "ts": ...}
+    {"op": "restore", "id": "...", "ts": ...}
+    {"op": "purge", "id": "...", "ts": ...}
+
+El estado actual se obtiene reproduciendo el manifiesto.
+
+El registro "put" se escribe (y se sincroniza a disco) antes de mover el
+archivo: si el proceso muere a mitad, el manifiesto siempre sabe de dónde
+vino cada archivo guardado. Si el movimiento falla se anota un "abort";
+si se cortó antes de moverlo, restore ve que falta la copia y lo salta.
+
+    {"op": "abort", "id": "...", "ts": ...}
+"""
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+QUARANTINE_DIRNAME = ".file_cleaner_quarantine"
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class QuarantineEntry(NamedTuple):
+    id: str
+    path: str
+    size: int
+    mtime: float
+    ts: float
+
+    @property
+    def run_id(self) -> str:
+        return self.id.split("/", 1)[0]
+
+
+def move(src: str, dst: str) -> None:
+    """os.rename si ambos lados están en el mismo dispositivo; si no, copia."""
+    try:
+        os.rename(src, dst)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+class Quarantine:
+    def __init__(self, base: Path) -> None:
+        self.root = Path(base) / QUARANTINE_DIRNAME
+        self.manifest = self.root / MANIFEST_NAME
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._fh = None
+        self._run_dir: Optional[Path] = None
+
+    # ....................................................................... #
+    def _append(self, records: Iterable[Dict], sync: bool = False) -> None:
+        """Añade registros al manifiesto (llamar con el lock tomado).
+
+        Con sync=True los vuelca y hace fsync antes de volver.
+        """
+        if self._fh is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.manifest, "a", encoding="utf-8")
+        for rec in records:
+            self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        if sync:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def stored_path(self, entry: QuarantineEntry) -> Path:
+        run_id, seq = entry.id.split("/", 1)
+        return self.root / run_id / f"{seq}_{os.path.basename(entry.path)}"
+
+    def put(self, path: str, size: int, mtime: float) -> str:
+        """Mueve 'path' a cuarentena y devuelve su id.
+
+        El registro se escribe antes del movimiento (write-ahead).
+        """
+        with self._lock:
+            if self._run_dir is None:
+                self._run_dir = self.root / self.run_id
+                self._run_dir.mkdir(parents=True, exist_ok=True)
+            seq = f"{self._seq:08d}"
+            self._seq += 1
+            qid = f"{self.run_id}/{seq}"
+            self._append([{
+                "op": "put", "id": qid, "path": path,
+                "size": size, "mtime": mtime, "ts": time.time(),
+            }], sync=True)
+        try:
+            move(path, str(self._run_dir / f"{seq}_{os.path.basename(path)}"))
+        except BaseException:
+            with self._lock:
+                self._append([{"op": "abort", "id": qid, "ts": time.time()}], sync=True)
+            raise
+        return qid
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    # ....................................................................... #
+    def entries(self) -> List[QuarantineEntry]:
+        """Entradas aún en cuarentena, en orden de llegada."""
+        active: Dict[str, QuarantineEntry] = {}
+        if not self.manifest.exists():
+            return []
+        with open(self.manifest, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # línea truncada por un corte
+                if rec.get("op") == "put":
+                    active[rec["id"]] = QuarantineEntry(
+                        rec["id"], rec["path"], rec["size"], rec["mtime"], rec["ts"])
+                else:
+                    active.pop(rec.get("id"), None)
+        return list(active.values())
+
+    def restore(self, entries: List[QuarantineEntry], dry_run: bool = False) -> int:
+        """Devuelve a su sitio las entradas indicadas; no pisa archivos existentes."""
+        done = []
+        made_dirs: set[str] = set()
+        for e in entries:
+            stored = self.stored_path(e)
+            if not os.path.lexists(stored):
+                # Registro sin copia: el proceso se cortó antes de moverlo.
+                logging.warning("No está en cuarentena %s (%s) – se omite.", e.id, e.path)
+                continue
+            if os.path.lexists(e.path):
+                logging.warning("Ya existe %s – no se restaura %s.", e.path, e.id)
+                continue
+            if dry_run:
+                logging.info("[DRY-RUN] %s -> %s", stored, e.path)
+                continue
+            parent = os.path.dirname(e.path)
+            if parent not in made_dirs:
+                os.makedirs(parent, exist_ok=True)
+                made_dirs.add(parent)
+            try:
+                move(str(stored), e.path)
+            except OSError as exc:
+                logging.error("Error al restaurar %s: %s", e.path, exc)
+                continue
+            done.append({"op": "restore", "id": e.id, "ts": time.time()})
+        with self._lock:
+            self._append(done)
+        self.close()
+        self._prune_run_dirs()
+        return len(done)
+
+    def purge(self, entries: List[QuarantineEntry], dry_run: bool = False) -> int:
+        """Elimina definitivamente las entradas indicadas."""
+        done = []
+        for e in entries:
+            stored = self.stored_path(e)
+            if dry_run:
+                logging.info("[DRY-RUN] Purgar %s (%s)", stored, e.path)
+                continue
+            try:
+                stored.unlink()
+            except FileNotFoundError:
+                pass  # ya no estaba: basta con anotarlo
+            except OSError as exc:
+                logging.error("Error al purgar %s: %s", stored, exc)
+                continue
+            done.append({"op": "purge", "id": e.id, "ts": time.time()})
+        with self._lock:
+            self._append(done)
+        self.close()
+        self._prune_run_dirs()
+        if done:
+            self.compact()
+        return len(done)
+
+    def compact(self) -> None:
+        """Reescribe el manifiesto con solo las entradas activas."""
+        active = self.entries()
+        tmp = self.manifest.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in active:
+                f.write(json.dumps({"op": "put", **e._asdict()}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.manifest)
+
+    def _prune_run_dirs(self) -> None:
+        if not self.root.exists():
+            return
+        for d in self.root.iterdir():
+            if d.is_dir():
+                try:
+                    d.rmdir()  # solo si quedó vacía
+                except OSError:
+                    pass
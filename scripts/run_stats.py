@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+run_stats.py
+Instrumentación común de file_cleaner y file_organizer (--profile / --stats-json).
+
+Mide el tiempo de cada fase, cuenta operaciones de sistema de archivos por
+categoría (listdir/stat/rename/link/unlink/mkdir), archivos por segundo, las
+carpetas más lentas de listar y los errores. Desactivada se usa NULL_STATS,
+cuyos métodos no hacen nada; los bucles calientes consultan 'enabled' una
+sola vez y se saltan incluso esas llamadas.
+"""
+from __future__ import annotations
+
+import contextlib
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TOP_DIRS = 10
+
+
+class RunStats:
+    enabled = True
+
+    def __init__(self, top_dirs: int = DEFAULT_TOP_DIRS) -> None:
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.files = 0
+        self._top_dirs = top_dirs
+        self._slow_dirs: List[Tuple[float, str]] = []
+
+    # ....................................................................... #
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, category: str, n: int = 1) -> None:
+        with self._lock:
+            self.calls[category] += n
+
+    def error(self, category: str) -> None:
+        with self._lock:
+            self.errors[category] += 1
+
+    def add_files(self, n: int = 1) -> None:
+        with self._lock:
+            self.files += n
+
+    def dir_time(self, path: str, seconds: float) -> None:
+        """Guarda las 'top_dirs' carpetas más lentas en un heap acotado."""
+        with self._lock:
+            if len(self._slow_dirs) < self._top_dirs:
+                heapq.heappush(self._slow_dirs, (seconds, path))
+            elif seconds > self._slow_dirs[0][0]:
+                heapq.heapreplace(self._slow_dirs, (seconds, path))
+
+    # ....................................................................... #
+    def wrap_lister(self, lister: Callable) -> Callable:
+        """Envuelve un lister de fastwalk para medir cada carpeta."""
+        def timed(path: str):
+            t0 = time.perf_counter()
+            listing = lister(path)
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                if listing.cached:
+                    self.calls["index_hit"] += 1
+                else:
+                    self.calls["listdir"] += 1
+                    self.calls["stat"] += len(listing.files)
+                self.phases["listdir_total"] = self.phases.get("listdir_total", 0.0) + elapsed
+            self.dir_time(path, elapsed)
+            return listing
+        return timed
+
+    def instrument_logging(self) -> None:
+        """Cronometra el tiempo que pasan los handlers del logger raíz.
+
+        Llamar antes de start_output(): los handlers envueltos pasan al hilo
+        de la cola y se mide su trabajo real, no solo el encolado.
+        """
+        for handler in logging.getLogger().handlers:
+            original = handler.handle
+
+            def handle(record, _original=original):
+                t0 = time.perf_counter()
+                try:
+                    return _original(record)
+                finally:
+                    self.add_time("logging", time.perf_counter() - t0)
+            handler.handle = handle
+
+    # ....................................................................... #
+    def report(self) -> Dict:
+        wall = time.perf_counter() - self._start
+        with self._lock:
+            return {
+                "wall_s": round(wall, 4),
+                "files": self.files,
+                "files_per_s": round(self.files / wall, 1) if wall else None,
+                "phases_s": {k: round(v, 4) for k, v in sorted(self.phases.items())},
+                "calls": dict(sorted(self.calls.items())),
+                "errors": dict(sorted(self.errors.items())),
+                "slowest_dirs": [
+                    {"path": p, "seconds": round(s, 4)}
+                    for s, p in sorted(self._slow_dirs, reverse=True)
+                ],
+            }
+
+    def finish(self, json_path: Optional[Path] = None, log_summary: bool = False) -> None:
+        rep = self.report()
+        if json_path:
+            Path(json_path).write_text(json.dumps(rep, indent=2, ensure_ascii=False) + "\n",
+                                       encoding="utf-8")
+            logging.info("Estadísticas guardadas en %s", json_path)
+        if log_summary:
+            logging.info("Perfil: %.2fs, %d archivos (%s/s)", rep["wall_s"], rep["files"],
+                         rep["files_per_s"])
+            for name, secs in rep["phases_s"].items():
+                logging.info("  fase %-14s %8.3fs", name, secs)
+            logging.info("  llamadas: %s", rep["calls"])
+            if rep["errors"]:
+                logging.info("  errores: %s", rep["errors"])
+            for d in rep["slowest_dirs"][:5]:
+                logging.info("  lenta %8.4fs %s", d["seconds"], d["path"])
+
+
+class NullStats:
+    """Mismo interfaz que RunStats sin coste alguno."""
+    enabled = False
+    _null_phase = contextlib.nullcontext()
+
+    def phase(self, name: str):
+        return self._null_phase
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, category: str, n: int = 1) -> None:
+        pass
+
+    def error(self, category: str) -> None:
+        pass
+
+    def add_files(self, n: int = 1) -> None:
+        pass
+
+    def dir_time(self, path: str, seconds: float) -> None:
+        pass
+
+    def wrap_lister(self, lister: Callable) -> Callable:
+        return lister
+
+    def instrument_logging(self) -> None:
+        pass
+
+    def finish(self, json_path: Optional[Path] = None, log_summary: bool = False) -> None:
+        pass
+
+
+NULL_STATS = NullStats()
+
+
+def from_args(profile: bool, stats_json: Optional[Path]):
+    """RunStats si se pidió --profile o --stats-json; si no, NULL_STATS."""
+    if not (profile or stats_json):
+        return NULL_STATS
+    stats = RunStats()
+    stats.instrument_logging()
+    return stats
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+scan_index.py
+Índice persistente (SQLite) para recorridos incrementales de fastwalk.
+
+Guarda el mtime de cada carpeta, sus subcarpetas y (tamaño, mtime) de sus
+archivos. En ejecuciones posteriores solo se vuelven a listar las carpetas
+cuyo mtime cambió; el resto se sirve desde el índice.
+
+Limitación: modificar un archivo en sitio (truncarlo, cambiar su mtime)
+no cambia el mtime de su carpeta, así que el tamaño y el mtime cacheados
+pueden estar desfasados en cualquier sentido. Quien consuma el índice solo
+puede fiarse del nombre: debe volver a hacer stat de las entradas 'cached'
+antes de filtrarlas por tamaño o antigüedad (Cleaner lo hace con todas las
+que pasan los patrones).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from fastwalk import DirListing, FileEntry, list_dir
+
+CACHE_DIR = Path.home() / ".cache" / "file_cleaner"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    subdirs  TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    dir   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    size  INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+"""
+
+# Separador de nombres de subcarpetas: no puede aparecer en un nombre.
+_SEP = "\0"
+
+
+def default_index_path(root: Path) -> Path:
+    """Ruta del índice bajo ~/.cache, una base de datos por carpeta raíz."""
+    digest = hashlib.sha1(str(root).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return CACHE_DIR / f"index_{digest}.sqlite"
+
+
+class ScanIndex:
+    def __init__(self, root: Path, db_path: Optional[Path] = None, full_rescan: bool = False) -> None:
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path else default_index_path(self.root)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Los listados llegan desde los hilos de fastwalk: una conexión
+        # compartida y serializada con un lock.
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        if full_rescan:
+            self._db.execute("DELETE FROM dirs")
+            self._db.execute("DELETE FROM files")
+            logging.info("Índice vaciado: se hará un recorrido completo.")
+        self.hits = 0
+        self.misses = 0
+
+    # ....................................................................... #
+    def lister(self, path: str) -> DirListing:
+        """Sustituto de fastwalk.list_dir que consulta el índice.
+
+        Las entradas servidas desde el índice llevan cached=True: su nombre
+        es fiable, su tamaño y su mtime no (ver la limitación del módulo).
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return list_dir(path)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mtime_ns, subdirs FROM dirs WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None and row[0] == mtime_ns:
+                rows = self._db.execute(
+                    "SELECT name, size, mtime FROM files WHERE dir = ?", (path,)
+                ).fetchall()
+                self.hits += 1
+                files = [
+                    FileEntry(os.path.join(path, name), name, size, mtime, True)
+                    for name, size, mtime in rows
+                ]
+                return DirListing(path, files, row[1].split(_SEP) if row[1] else [], True)
+
+        listing = list_dir(path)
+        self._store(path, mtime_ns, listing, previous=row[1] if row else None)
+        return listing
+
+    def _store(self, path: str, mtime_ns: int, listing: DirListing, previous: Optional[str]) -> None:
+        with self._lock:
+            self.misses += 1
+            if previous:
+                for gone in set(previous.split(_SEP)) - set(listing.subdirs):
+                    self._forget_tree(os.path.join(path, gone))
+            self._db.execute(
+                "INSERT OR REPLACE INTO dirs (path, mtime_ns, subdirs) VALUES (?, ?, ?)",
+                (path, mtime_ns, _SEP.join(listing.subdirs)),
+            )
+            self._db.execute("DELETE FROM files WHERE dir = ?", (path,))
+            self._db.executemany(
+                "INSERT INTO files (dir, name, size, mtime) VALUES (?, ?, ?, ?)",
+                [(path, f.name, f.size, f.mtime) for f in listing.files],
+            )
+
+    def _forget_tree(self, path: str) -> None:
+        """Borra una carpeta y todo lo que cuelga de ella (rango por prefijo)."""
+        lo, hi = path + os.sep, path + chr(ord(os.sep) + 1)
+        self._db.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, lo, hi))
+        self._db.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (path, lo, hi))
+
+    # ....................................................................... #
+    def update_file(self, path: str, size: int, mtime: float) -> None:
+        """Refresca una entrada tras volver a hacer stat."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE files SET size = ?, mtime = ? WHERE dir = ? AND name = ?",
+                (size, mtime, os.path.dirname(path), os.path.basename(path)),
+            )
+
+    def forget_file(self, path: str) -> None:
+        """Elimina un archivo borrado por el propio proceso."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM files WHERE dir = ? AND name = ?",
+                (os.path.dirname(path), os.path.basename(path)),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def close(self) -> None:
+        self.commit()
+        with self._lock:
+            self._db.close()
+        logging.info("Índice %s: %d carpetas reutilizadas, %d relistadas.",
+                     self.db_path, self.hits, self.misses)
@@ -5,18 +5,44 @@ Monitor de salud del sistema con notificaciones y logging opcional.
 Uso:
     python system_health_monitor.py
     python system_health_monitor.py --interval 30 --cpu 70 --memory 70 --disk 85
+    python system_health_monitor.py --mount /data=90 --mount /var=75
+    python system_health_monitor.py query --since 2h --level 1m
+    python system_health_monitor.py --http-port 9101
 """
 import argparse
+import json
 import logging
 import os
+import queue
 import signal
 import sys
 import time
-from typing import NamedTuple
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import psutil
 from plyer import notification
 
+from health_exporter import DEFAULT_HOST, MetricsExporter
+from health_procs import DEFAULT_PROC_INTERVAL, DEFAULT_TOP, ProcessTracker
+from health_rules import (
+    MOUNT_PREFIX,
+    RATE_METRICS,
+    AlertEvent,
+    Rule,
+    RuleEngine,
+    default_rules,
+    load_rules,
+)
+from health_sampler import (
+    DEFAULT_HISTORY,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_SAMPLE_INTERVAL,
+    Sampler,
+)
+from health_store import DEFAULT_MAX_MB, LEVELS, STORE_DIR, MetricsStore, parse_time
+
 __version__ = "2.0.0"
 
 # --------------------------------------------------------------------------- #
@@ -25,6 +51,12 @@ __version__ = "2.0.0"
 LOG_FILE = os.path.expanduser("~/.system_health_monitor.log")
 DEFAULT_INTERVAL = 60
 DEFAULT_THRESHOLDS = {"cpu": 80, "memory": 80, "disk": 80}
+METRIC_LABELS = {"cpu": "CPU", "memory": "Memory", "disk": "Disk",
+                 "disk_read": "Disk read", "disk_write": "Disk write",
+                 "net_recv": "Network in", "net_sent": "Network out"}
+NOTIFY_TOP = 3  # procesos que caben en la notificación de escritorio
+MOUNTS_REFRESH = 60.0  # segundos entre relecturas de los puntos de montaje
+SKIP_FSTYPES = {"squashfs", "iso9660", "udf"}  # imágenes de solo lectura: siempre al 100 %
 
 # Configuración del logger
 logging.basicConfig(
@@ -39,24 +71,140 @@ logging.basicConfig(
 # --------------------------------------------------------------------------- #
 # Modelo de datos
 # --------------------------------------------------------------------------- #
-class Metrics(NamedTuple):
-    cpu: float
-    memory: float
-    disk: float
+class Metrics:
+    """Una muestra. Con __slots__ no lleva __dict__ por instancia; el histórico
+    en memoria no guarda estos objetos sino sus valores (RingBuffer)."""
+    __slots__ = ("cpu", "memory", "disk", "disk_read", "disk_write",
+                 "net_recv", "net_sent", "cores", "mounts")
+
+    def __init__(self, cpu: float, memory: float, disk: float,
+                 disk_read: float = 0.0, disk_write: float = 0.0,
+                 net_recv: float = 0.0, net_sent: float = 0.0,
+                 cores: Tuple[float, ...] = (),
+                 mounts: Tuple[Tuple[str, float], ...] = ()) -> None:
+        self.cpu = cpu
+        self.memory = memory
+        self.disk = disk                # uso de "/" (%)
+        self.disk_read = disk_read      # bytes/s
+        self.disk_write = disk_write
+        self.net_recv = net_recv
+        self.net_sent = net_sent
+        self.cores = cores              # CPU por núcleo (solo con --per-core)
+        self.mounts = mounts            # (punto de montaje, uso %)
+
+    def __repr__(self) -> str:
+        rates = ", ".join(f"{name}={tamano_legible(getattr(self, name))}/s" for name in RATE_METRICS)
+        mounts = ", ".join(f"{path}={pct:.1f}%" for path, pct in self.mounts)
+        cores = f", cores=[{', '.join(f'{c:.0f}' for c in self.cores)}]" if self.cores else ""
+        return (f"Metrics(cpu={self.cpu:.1f}%, memory={self.memory:.1f}%, disk={self.disk:.1f}%, "
+                f"{rates}, mounts=[{mounts}]{cores})")
 
 
 # --------------------------------------------------------------------------- #
 # Utilidades
 # --------------------------------------------------------------------------- #
-def get_metrics() -> Metrics:
-    """Obtiene los tres indicadores clave."""
-    # cpu_percent requiere un “primer tick” para ser preciso
-    psutil.cpu_percent(interval=None)
-    time.sleep(0.5)
-    cpu = psutil.cpu_percent(interval=None)
+_primed = set()  # modos de cpu_percent (total / por núcleo) ya cebados
+_mounts: Tuple[float, Tuple[str, ...]] = (float("-inf"), ())  # (instante, montajes)
+_requested_mounts: Set[str] = set()  # pedidos con --mount: ganan a los demás de su dispositivo
+
+
+def tamano_legible(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def request_mounts(paths: Iterable[str]) -> None:
+    """Montajes pedidos explícitamente (--mount): se prefieren a los bind mounts de su dispositivo."""
+    global _mounts
+    _requested_mounts.update(paths)
+    _mounts = (float("-inf"), ())
+
+
+def list_mounts() -> Tuple[str, ...]:
+    """Puntos de montaje reales, uno por dispositivo; la lista se relee cada minuto.
+
+    disk_partitions(all=False) ya descarta los sistemas virtuales (proc,
+    tmpfs, nfs...); aquí se quitan además las imágenes de solo lectura y
+    los bind mounts del mismo dispositivo: de cada dispositivo queda el
+    punto de montaje más corto, salvo que se pidiera otro con --mount.
+    "/" siempre está.
+    """
+    global _mounts
+    now = time.monotonic()
+    if now - _mounts[0] < MOUNTS_REFRESH:
+        return _mounts[1]
+    by_device: Dict[str, List[str]] = {}
+    for part in psutil.disk_partitions(all=False):
+        if part.fstype in SKIP_FSTYPES or part.mountpoint.startswith("/snap/"):
+            continue
+        by_device.setdefault(part.device, []).append(part.mountpoint)
+    chosen = {"/"}
+    for points in by_device.values():
+        requested = [p for p in points if p in _requested_mounts]
+        chosen.update(requested or [min(points, key=len)])
+    _mounts = (now, tuple(sorted(chosen)))
+    return _mounts[1]
+
+
+class _Rates:
+    """Bytes/s de disco y de red: diferencia de contadores entre dos lecturas."""
+
+    def __init__(self) -> None:
+        self._ts: Optional[float] = None
+        self._prev = (0, 0, 0, 0)
+
+    def update(self) -> Tuple[float, float, float, float]:
+        now = time.monotonic()
+        io = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        counters = (io.read_bytes if io else 0, io.write_bytes if io else 0,
+                    net.bytes_recv if net else 0, net.bytes_sent if net else 0)
+        last, prev = self._ts, self._prev
+        self._ts, self._prev = now, counters
+        if last is None or now <= last:
+            return (0.0, 0.0, 0.0, 0.0)  # primera lectura: aún no hay diferencia
+        elapsed = now - last
+        # Un contador que baja (disco retirado, interfaz reiniciada) cuenta como 0.
+        return tuple(max(0, c - p) / elapsed for c, p in zip(counters, prev))
+
+
+_rates = _Rates()
+
+
+def read_metrics(per_core: bool = False) -> Metrics:
+    """Lee los indicadores sin esperar.
+
+    La CPU y las tasas de E/S son medias desde la llamada anterior: quien
+    llama (Sampler) se encarga de que haya una.
+    """
+    if per_core:
+        cores = tuple(psutil.cpu_percent(interval=None, percpu=True))
+        cpu = sum(cores) / len(cores) if cores else 0.0
+    else:
+        cores = ()
+        cpu = psutil.cpu_percent(interval=None)
     memory = psutil.virtual_memory().percent
-    disk = psutil.disk_usage("/").percent
-    return Metrics(cpu=cpu, memory=memory, disk=disk)
+    mounts = []
+    for path in list_mounts():
+        try:
+            mounts.append((path, psutil.disk_usage(path).percent))
+        except OSError:
+            continue  # desmontado o sin permiso desde la última relectura
+    disk = next((pct for path, pct in mounts if path == "/"), 0.0)
+    return Metrics(cpu, memory, disk, *_rates.update(), cores=cores, mounts=tuple(mounts))
+
+
+def get_metrics(per_core: bool = False) -> Metrics:
+    """Lectura puntual; solo la primera llamada espera 0.5 s para cebar CPU y contadores."""
+    if per_core not in _primed:
+        # cpu_percent y las tasas de E/S requieren un “primer tick” para ser precisos
+        read_metrics(per_core)
+        time.sleep(0.5)
+        _primed.add(per_core)
+    return read_metrics(per_core)
 
 
 def send_notification(title: str, message: str) -> None:
@@ -72,31 +220,62 @@ def send_notification(title: str, message: str) -> None:
         logging.warning("No se pudo mostrar notificación: %s", exc)
 
 
-def check_thresholds(m: Metrics, thresholds: dict[str, int]) -> None:
-    """Compara métricas con umbrales y alerta si es necesario."""
-    alerts = []
-    if m.cpu > thresholds["cpu"]:
-        alerts.append(f"CPU ({m.cpu:.1f}%)")
-    if m.memory > thresholds["memory"]:
-        alerts.append(f"Memory ({m.memory:.1f}%)")
-    if m.disk > thresholds["disk"]:
-        alerts.append(f"Disk ({m.disk:.1f}%)")
-
-    if alerts:
-        msg = "High usage detected: " + ", ".join(alerts)
-        logging.warning(msg)
-        send_notification("System Health Alert", msg)
-    else:
-        logging.info("All metrics within normal range.")
+def metric_label(metric: str) -> str:
+    if metric.startswith(MOUNT_PREFIX):
+        return f"Disk {metric[len(MOUNT_PREFIX):]}"
+    return METRIC_LABELS.get(metric, metric)
+
+
+def format_value(metric: str, value: float) -> str:
+    """Porcentaje, o bytes/s para las tasas de E/S."""
+    return f"{tamano_legible(value)}/s" if metric in RATE_METRICS else f"{value:.1f}%"
+
+
+def report_alerts(events: List[AlertEvent]) -> None:
+    """Registra y notifica las alertas que empiezan o terminan."""
+    fired = []
+    for e in events:
+        metric = e.rule.metric
+        level = f"{e.rule.describe()} = {format_value(metric, e.value)}"
+        if e.firing:
+            logging.warning("Alert: %s (enter %s)", level, format_value(metric, e.rule.enter))
+            for i, proc in enumerate(e.top, 1):
+                logging.warning("  top %d: %s", i, proc)
+            culprits = f" – {', '.join(e.top[:NOTIFY_TOP])}" if e.top else ""
+            fired.append(f"{metric_label(metric)} ({e.rule.stat} {format_value(metric, e.value)})"
+                         f"{culprits}")
+        else:
+            logging.info("Resolved: %s (exit %s)", level, format_value(metric, e.rule.exit_level))
+    if fired:
+        send_notification("System Health Alert", "High usage detected: " + ", ".join(fired))
 
 
 # --------------------------------------------------------------------------- #
 # Loop principal
 # --------------------------------------------------------------------------- #
 class Monitor:
-    def __init__(self, interval: int, thresholds: dict[str, int]) -> None:
+    def __init__(self, interval: float, thresholds: dict[str, int],
+                 sampler: Optional[Sampler] = None,
+                 rules: Optional[List[Rule]] = None,
+                 store: Optional[MetricsStore] = None,
+                 procs: Optional[ProcessTracker] = None,
+                 http_port: Optional[int] = None, http_host: str = DEFAULT_HOST,
+                 mount_threshold: Optional[float] = None) -> None:
         self.interval = interval
+        self.store = store
+        self.procs = procs
         self.thresholds = thresholds
+        self.rules = RuleEngine(rules if rules is not None else default_rules(thresholds))
+        # Umbral de los montajes que aparezcan después de arrancar (None: sin regla).
+        self.mount_threshold = mount_threshold if rules is None else None
+        self.sampler = sampler or Sampler(read_metrics, min(interval, DEFAULT_SAMPLE_INTERVAL))
+        # Las reglas se evalúan con cada muestra, en el hilo de muestreo;
+        # las alertas se notifican desde el hilo principal.
+        self.sampler.on_sample = self._on_sample
+        self._alerts: "queue.SimpleQueue[AlertEvent]" = queue.SimpleQueue()
+        # Endpoint HTTP opcional: responde desde la última muestra del sampler.
+        self.exporter = (MetricsExporter(self.sampler, http_host, http_port, self.rules)
+                         if http_port is not None else None)
         self.running = True
         # Capturar SIGINT (Ctrl+C) y SIGTERM para apagado elegante
         signal.signal(signal.SIGINT, self._stop)
@@ -105,40 +284,155 @@ class Monitor:
     def _stop(self, signum, frame):
         logging.info("Received signal %s – shutting down gracefully...", signum)
         self.running = False
+        self.sampler.stop()
+
+    def _on_sample(self, ts: float, metrics: Metrics) -> None:
+        if self.store is not None:
+            self.store.append(ts, metrics)
+        if self.mount_threshold is not None:
+            for path, _ in metrics.mounts:
+                metric = MOUNT_PREFIX + path
+                if metric not in self.thresholds:
+                    self.thresholds[metric] = self.mount_threshold
+                    rule = Rule(metric, enter=float(self.mount_threshold))
+                    self.rules.add(rule)
+                    logging.info("New mount %s: rule %s enter>=%.1f", path,
+                                 rule.describe(), rule.enter)
+        for event in self.rules.update(ts, metrics):
+            if event.firing and self.procs is not None:
+                event = event._replace(top=tuple(self.procs.for_metric(event.rule.metric)))
+            self._alerts.put(event)
+
+    def _drain_alerts(self) -> None:
+        events = []
+        while not self._alerts.empty():
+            events.append(self._alerts.get())
+        if events:
+            report_alerts(events)
 
     def run(self) -> None:
-        logging.info("Starting monitor (interval=%ss, thresholds=%s)", self.interval, self.thresholds)
+        logging.info("Starting monitor (interval=%ss, sample=%ss, rules=%d)",
+                     self.interval, self.sampler.interval, len(self.rules.rules))
+        for rule in self.rules.rules:
+            logging.info("Rule: %s enter>=%.1f exit<%.1f for=%gs cooldown=%gs", rule.describe(),
+                         rule.enter, rule.exit_level, rule.duration, rule.cooldown)
+        if self.exporter is not None:
+            try:
+                self.exporter.start()
+            except OSError as exc:
+                logging.error("Cannot start the HTTP exporter on %s:%s: %s",
+                              self.exporter.host, self.exporter.port, exc)
+                sys.exit(1)
+        if self.procs is not None:
+            self.procs.start()
+        self.sampler.start()
+        seq, metrics = 0, None
+        next_report = time.monotonic()
         while self.running:
+            # Se despierta con cada muestra nueva o al llegar la hora del informe.
+            timeout = None if metrics is None else max(0.0, next_report - time.monotonic())
+            seq, metrics = self.sampler.wait(seq, timeout)
             try:
-                metrics = get_metrics()
-                logging.info("Metrics: %s", metrics)
-                check_thresholds(metrics, self.thresholds)
+                self._drain_alerts()
             except Exception as e:
-                logging.exception("Error while sampling metrics: %s", e)
-
-            # Esperar con posibilidad de salida inmediata
-            for _ in range(self.interval):
-                if not self.running:
-                    break
-                time.sleep(1)
+                logging.exception("Error while reporting alerts: %s", e)
+            if metrics is None or time.monotonic() < next_report:
+                continue
+            next_report += self.interval
+            if next_report < time.monotonic():  # tras una pausa larga, no acumular informes
+                next_report = time.monotonic() + self.interval
+            # Con histórico, las métricas ya están en disco: el log solo las
+            # repite en modo detallado y no crece sin límite.
+            logging.log(logging.DEBUG if self.store else logging.INFO, "Metrics: %s", metrics)
+            active = self.rules.active()
+            if active:
+                logging.warning("Active alerts: %s", ", ".join(r.describe() for r in active))
+            else:
+                logging.info("All metrics within normal range.")
+        self.sampler.join()
+        if self.procs is not None:
+            self.procs.stop()
+        if self.exporter is not None:
+            self.exporter.stop()
         logging.info("Monitor stopped.")
 
 
 # --------------------------------------------------------------------------- #
 # CLI
 # --------------------------------------------------------------------------- #
-def parse_args():
+COMMANDS = ("monitor", "query")
+
+
+def mount_threshold(text: str) -> Tuple[str, float]:
+    """'/data=90' -> ('/data', 90.0) para --mount."""
+    path, sep, level = text.rpartition("=")
+    try:
+        if not sep or not path:
+            raise ValueError
+        return os.path.normpath(path), float(level)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PATH=PCT, got {text!r}") from None
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Compatibilidad: sin subcomando explícito se asume "monitor".
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help", "--version")):
+        argv = ["monitor", *argv]
+
     parser = argparse.ArgumentParser(description="System Health Monitor")
-    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL,
-                        help="Sampling interval in seconds")
-    parser.add_argument("--cpu", type=int, default=DEFAULT_THRESHOLDS["cpu"],
-                        help="CPU usage threshold (%)")
-    parser.add_argument("--memory", type=int, default=DEFAULT_THRESHOLDS["memory"],
-                        help="Memory usage threshold (%)")
-    parser.add_argument("--disk", type=int, default=DEFAULT_THRESHOLDS["disk"],
-                        help="Disk usage threshold (%)")
     parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
-    return parser.parse_args()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    mon = sub.add_parser("monitor", help="Sample, store and alert (default)")
+    mon.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                     help="Reporting interval in seconds")
+    mon.add_argument("--sample", type=float,
+                     help=f"Background sampling interval in seconds, fractions allowed "
+                          f"(default: min(interval, {DEFAULT_SAMPLE_INTERVAL}))")
+    mon.add_argument("--adaptive", action="store_true",
+                     help="Sample faster as CPU or memory approach their thresholds")
+    mon.add_argument("--min-sample", type=float, default=DEFAULT_MIN_INTERVAL,
+                     help=f"Fastest adaptive sampling interval (default {DEFAULT_MIN_INTERVAL})")
+    mon.add_argument("--per-core", action="store_true", help="Also sample CPU usage per core")
+    mon.add_argument("--history", type=int, default=DEFAULT_HISTORY,
+                     help=f"Samples kept in memory (default {DEFAULT_HISTORY})")
+    mon.add_argument("--cpu", type=int, default=DEFAULT_THRESHOLDS["cpu"],
+                     help="CPU usage threshold (%%)")
+    mon.add_argument("--memory", type=int, default=DEFAULT_THRESHOLDS["memory"],
+                     help="Memory usage threshold (%%)")
+    mon.add_argument("--disk", type=int, default=DEFAULT_THRESHOLDS["disk"],
+                     help="Disk usage threshold for every mount (%%)")
+    mon.add_argument("--mount", type=mount_threshold, action="append", default=[],
+                     metavar="PATH=PCT",
+                     help="Usage threshold for one mount, e.g. /data=90 (repeatable)")
+    mon.add_argument("--config", type=Path,
+                     help="JSON file with windowed alert rules (see configs/config_health.json)")
+    mon.add_argument("--top-procs", type=int, default=DEFAULT_TOP,
+                     help=f"Top processes attached to each alert, 0 to disable (default {DEFAULT_TOP})")
+    mon.add_argument("--proc-interval", type=float, default=DEFAULT_PROC_INTERVAL,
+                     help=f"Seconds between process scans (default {DEFAULT_PROC_INTERVAL:g})")
+    mon.add_argument("--http-port", type=int, metavar="PORT",
+                     help="Serve /metrics (Prometheus) and /metrics.json on this port, 0 = any free port")
+    mon.add_argument("--http-host", default=DEFAULT_HOST,
+                     help=f"Address for --http-port (default {DEFAULT_HOST})")
+    mon.add_argument("--store-dir", type=Path, default=STORE_DIR,
+                     help=f"Metrics history directory (default {STORE_DIR})")
+    mon.add_argument("--store-max-mb", type=float, default=DEFAULT_MAX_MB,
+                     help=f"Size cap of the raw samples file in MB (default {DEFAULT_MAX_MB})")
+    mon.add_argument("--no-store", action="store_true",
+                     help="Do not keep a history; log every report line instead")
+
+    query = sub.add_parser("query", help="Read the stored metrics history")
+    query.add_argument("--since", default="1h",
+                       help="Start: 90m, 2h, 7d... ago or an ISO date (default 1h)")
+    query.add_argument("--until", help="End, same formats (default: now)")
+    query.add_argument("--level", choices=("auto",) + LEVELS, default="auto",
+                       help="raw samples or 1m / 1h rollups (auto: by range length)")
+    query.add_argument("--store-dir", type=Path, default=STORE_DIR,
+                       help=f"Metrics history directory (default {STORE_DIR})")
+    query.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    return parser.parse_args(argv)
 
 
 # --------------------------------------------------------------------------- #
@@ -146,9 +440,84 @@ def parse_args():
 # --------------------------------------------------------------------------- #
 def main():
     args = parse_args()
-    thresholds = {"cpu": args.cpu, "memory": args.memory, "disk": args.disk}
-    monitor = Monitor(interval=args.interval, thresholds=thresholds)
-    monitor.run()
+    if args.command == "query":
+        query_main(args)
+    else:
+        monitor_main(args)
+
+
+def monitor_main(args):
+    # Un umbral por punto de montaje: --disk para todos, --mount para uno.
+    request_mounts(path for path, _ in args.mount)
+    mounts = list_mounts()
+    thresholds = {"cpu": args.cpu, "memory": args.memory}
+    thresholds.update((MOUNT_PREFIX + path, args.disk) for path in mounts)
+    for path, level in args.mount:
+        if path not in mounts:
+            logging.warning("%s is not a mounted filesystem (yet); watching it anyway", path)
+        thresholds[MOUNT_PREFIX + path] = level
+    rules = None
+    if args.config:
+        try:
+            rules = load_rules(args.config)
+        except (OSError, ValueError) as exc:
+            logging.error("Error reading config: %s", exc)
+            sys.exit(1)
+        # El muestreo adaptativo se acelera hacia el umbral más bajo de cada métrica.
+        for rule in rules:
+            if rule.metric in thresholds:
+                thresholds[rule.metric] = min(thresholds[rule.metric], rule.enter)
+    sampler = Sampler(
+        read_metrics,
+        interval=args.sample or min(args.interval, DEFAULT_SAMPLE_INTERVAL),
+        history=args.history,
+        per_core=args.per_core,
+        thresholds=thresholds if args.adaptive else None,
+        min_interval=args.min_sample,
+        mounts=mounts,
+    )
+    store = None if args.no_store else MetricsStore(args.store_dir, args.store_max_mb)
+    procs = ProcessTracker(args.top_procs, args.proc_interval) if args.top_procs > 0 else None
+    monitor = Monitor(interval=args.interval, thresholds=thresholds, sampler=sampler,
+                      rules=rules, store=store, procs=procs,
+                      http_port=args.http_port, http_host=args.http_host,
+                      mount_threshold=args.disk)
+    try:
+        monitor.run()
+    finally:
+        if store:
+            store.close()
+
+
+def query_main(args):
+    try:
+        until = parse_time(args.until) if args.until else time.time()
+        since = parse_time(args.since)
+    except ValueError as exc:
+        logging.error("%s", exc)
+        sys.exit(1)
+    level = args.level
+    if level == "auto":
+        span = until - since
+        level = "raw" if span <= 6 * 3600 else "1m" if span <= 7 * 86400 else "1h"
+    store = MetricsStore(args.store_dir, writable=False)
+    try:
+        rows = store.query(level, since, until)
+    finally:
+        store.close()
+
+    if args.json:
+        print(json.dumps([r._asdict() for r in rows]))
+        return
+    if not rows:
+        print(f"No {level} data between {datetime.fromtimestamp(since):%Y-%m-%d %H:%M:%S} "
+              f"and {datetime.fromtimestamp(until):%Y-%m-%d %H:%M:%S}.")
+        return
+    print("  ".join(f"{name:>11}" if i else f"{name:<19}" for i, name in enumerate(rows[0]._fields)))
+    for r in rows:
+        cells = [f"{datetime.fromtimestamp(r[0]):%Y-%m-%d %H:%M:%S}"]
+        cells += [f"{v:>11d}" if isinstance(v, int) else f"{v:>11.1f}" for v in r[1:]]
+        print("  ".join(cells))
 
 
 if __name__ == "__main__":
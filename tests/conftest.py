@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Los scripts se importan como módulos sueltos, igual que al ejecutarlos.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+# Los módulos fijan al importarse rutas bajo ~ (logs, cachés): que no
+# toquen el HOME real.
+os.environ["HOME"] = tempfile.mkdtemp(prefix="tests_home_")
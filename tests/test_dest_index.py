@@ -0,0 +1,38 @@
+"""Las colisiones se comparan por contenido sin bloquear el índice."""
+import dest_index
+from dest_index import DestinationIndex
+from run_stats import RunStats
+
+
+def test_small_duplicate_is_hashed_once_per_file(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"same")
+    src = tmp_path / "incoming.jpg"
+    src.write_bytes(b"same")
+    stats = RunStats()
+    index = DestinationIndex(stats=stats)
+
+    path, duplicate = index.place(str(tmp_path), "a.jpg", str(src), 4)
+
+    assert duplicate and path == str(tmp_path / "a.jpg")
+    assert stats.calls["hash"] == 2  # el parcial ya es el completo
+    # El nombre libre que se llegó a reservar queda liberado.
+    assert index.reserve(str(tmp_path), "a_1.jpg") == str(tmp_path / "a_1.jpg")
+
+
+def test_hashing_happens_outside_the_lock(tmp_path, monkeypatch):
+    (tmp_path / "a.jpg").write_bytes(b"one")
+    src = tmp_path / "incoming.jpg"
+    src.write_bytes(b"two")
+    index = DestinationIndex()
+    held = []
+    real = dest_index.partial_hash
+
+    def partial_hash(task):
+        held.append(index._lock.locked())
+        return real(task)
+
+    monkeypatch.setattr(dest_index, "partial_hash", partial_hash)
+    path, duplicate = index.place(str(tmp_path), "a.jpg", str(src), 3)
+
+    assert not duplicate and path == str(tmp_path / "a_1.jpg")
+    assert held == [False, False]
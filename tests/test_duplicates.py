@@ -0,0 +1,22 @@
+"""Los enlaces duros no son duplicados: no se agrupan ni cuentan como recuperables."""
+import os
+
+from duplicates import find_duplicates
+from fastwalk import iter_files
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    data = b"x" * 1000
+    (tmp_path / "a.bin").write_bytes(data)
+    os.link(tmp_path / "a.bin", tmp_path / "a_link.bin")
+    (tmp_path / "only.bin").write_bytes(b"y" * 500)
+    os.link(tmp_path / "only.bin", tmp_path / "only_link.bin")
+    (tmp_path / "copy.bin").write_bytes(data)
+
+    groups = find_duplicates(iter_files(str(tmp_path)), procs=1)
+
+    assert len(groups) == 1
+    group = groups[0]
+    assert group.reclaimable == len(data)
+    names = sorted(os.path.basename(e.path) for e in group.files)
+    assert len(names) == 2 and "copy.bin" in names
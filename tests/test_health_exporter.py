@@ -0,0 +1,65 @@
+"""El exporter responde en localhost desde la última muestra del Sampler."""
+import json
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from health_exporter import MetricsExporter  # noqa: E402
+from health_rules import Rule, RuleEngine  # noqa: E402
+from health_sampler import Sampler  # noqa: E402
+
+
+def _sample(cpu):
+    return SimpleNamespace(cpu=cpu, memory=50.0, disk=10.0, disk_read=1.0, disk_write=2.0,
+                           net_recv=3.0, net_sent=4.0, cores=(), mounts=(("/", 10.0),))
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return resp.status, resp.headers["Content-Type"], resp.read().decode("utf-8")
+
+
+@pytest.fixture
+def served():
+    rules = RuleEngine([Rule("cpu", window=1, enter=90, cooldown=0)])
+    sampler = Sampler(lambda per_core=False: _sample(0.0), mounts=("/",))
+    for ts, cpu in ((0.0, 95.0), (0.5, 97.0)):
+        m = _sample(cpu)
+        rules.update(ts, m)
+        sampler._store(m)
+    exporter = MetricsExporter(sampler, port=0, rules=rules).start()
+    try:
+        yield exporter
+    finally:
+        exporter.stop()
+
+
+def test_scrape_metrics(served):
+    status, ctype, body = _get(served.url + "/metrics")
+    assert status == 200 and ctype.startswith("text/plain")
+    assert "system_health_samples_total 2\n" in body
+    assert "system_health_cpu_percent 97.0\n" in body
+    assert 'system_health_mount_used_percent{mount="/"} 10.0\n' in body
+    assert 'system_health_alert_active{metric="cpu",stat="mean",window="1"} 1\n' in body
+
+
+def test_scrape_json_with_history(served):
+    status, ctype, body = _get(served.url + "/metrics.json?history=5")
+    data = json.loads(body)
+    assert status == 200 and ctype == "application/json"
+    assert data["metrics"]["cpu"] == 97.0
+    assert data["alerts"] == ["cpu mean over 1s"]
+    assert data["history"]["columns"][-1] == "disk:/"
+    assert [row[1] for row in data["history"]["rows"]] == [95.0, 97.0]
+
+
+def test_unknown_path_and_bad_query(served):
+    for path, code in (("/nope", 404), ("/metrics.json?history=x", 400)):
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(served.url + path)
+        assert exc.value.code == code
+
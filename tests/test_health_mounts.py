@@ -0,0 +1,51 @@
+"""Los montajes que aparecen tras arrancar se muestrean y vigilan."""
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psutil")
+pytest.importorskip("plyer")
+
+import system_health  # noqa: E402
+from health_sampler import Sampler  # noqa: E402
+
+Part = namedtuple("Part", "device mountpoint fstype opts")
+
+
+def _sample(**mounts):
+    return SimpleNamespace(cpu=1.0, memory=2.0, disk=3.0, disk_read=0.0, disk_write=0.0,
+                           net_recv=0.0, net_sent=0.0, cores=(), mounts=tuple(mounts.items()))
+
+
+def test_sampler_adds_a_column_for_a_new_mount():
+    sampler = Sampler(lambda per_core=False: _sample(), mounts=("/",))
+    sampler._store(_sample(**{"/": 10.0}))
+    sampler._store(_sample(**{"/": 11.0, "/data": 50.0}))
+
+    columns, rows = sampler.table()
+    assert columns[-2:] == ("disk:/", "disk:/data")
+    assert [r[-2:] for r in rows] == [(10.0, 0.0), (11.0, 50.0)]
+
+
+def test_monitor_adds_a_rule_for_a_new_mount(monkeypatch):
+    monkeypatch.setattr(system_health.signal, "signal", lambda *args: None)
+    sampler = Sampler(lambda per_core=False: _sample(), mounts=("/",))
+    monitor = system_health.Monitor(60, {"cpu": 90, "disk:/": 80}, sampler=sampler,
+                                    mount_threshold=80)
+    sampler._store(_sample(**{"/": 10.0, "/data": 95.0}))
+
+    assert [r.metric for r in monitor.rules.rules] == ["cpu", "disk:/", "disk:/data"]
+    assert [r.metric for r in monitor.rules.active()] == ["disk:/data"]
+
+
+def test_requested_bind_mount_wins_over_shorter_one(monkeypatch):
+    parts = [Part("/dev/sdb1", "/srv", "ext4", ""), Part("/dev/sdb1", "/srv/share/data", "ext4", ""),
+             Part("/dev/sda1", "/", "ext4", "")]
+    monkeypatch.setattr(system_health.psutil, "disk_partitions", lambda all=False: parts)
+    monkeypatch.setattr(system_health, "_requested_mounts", set())
+
+    system_health.request_mounts([])
+    assert system_health.list_mounts() == ("/", "/srv")
+    system_health.request_mounts(["/srv/share/data"])
+    assert system_health.list_mounts() == ("/", "/srv/share/data")
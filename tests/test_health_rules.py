@@ -0,0 +1,26 @@
+"""El nivel de salida por defecto permite que toda alerta se resuelva."""
+from types import SimpleNamespace
+
+from health_rules import Rule, RuleEngine
+
+
+def test_default_exit_level():
+    assert Rule("cpu", enter=80).exit_level == 75
+    assert Rule("cpu", enter=1).exit_level == 0.8        # nunca negativo
+    assert Rule("net_recv", enter=1e6).exit_level == 8e5  # relativo en tasas
+    assert Rule("cpu", enter=90, exit=70).exit_level == 70
+
+
+def test_low_threshold_alert_resolves():
+    engine = RuleEngine([Rule("cpu", window=1, enter=1, cooldown=0)])
+    fired = engine.update(0.0, SimpleNamespace(cpu=50.0))
+    resolved = engine.update(2.0, SimpleNamespace(cpu=0.5))
+    assert [e.firing for e in fired + resolved] == [True, False]
+
+
+def test_active_is_an_immutable_snapshot():
+    engine = RuleEngine([Rule("cpu", window=1, enter=90, cooldown=0)])
+    engine.update(0.0, SimpleNamespace(cpu=95.0))
+    active = engine.active()
+    engine.update(5.0, SimpleNamespace(cpu=10.0))
+    assert [r.metric for r in active] == ["cpu"] and engine.active() == ()
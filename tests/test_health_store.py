@@ -0,0 +1,51 @@
+"""Reiniciar el monitor dentro del mismo minuto u hora no duplica agregados."""
+from types import SimpleNamespace
+
+from health_store import MetricsStore
+
+
+def _sample(cpu):
+    return SimpleNamespace(cpu=cpu, memory=50.0, disk=10.0)
+
+
+def _run(directory, samples):
+    store = MetricsStore(directory, max_mb=1)
+    for ts, cpu in samples:
+        store.append(ts, _sample(cpu))
+    store.close()
+
+
+def _rows(directory, level):
+    store = MetricsStore(directory, writable=False)
+    try:
+        return store.query(level)
+    finally:
+        store.close()
+
+
+def test_restart_within_the_same_minute_and_hour(tmp_path):
+    _run(tmp_path, [(0.0, 10.0), (10.0, 20.0)])
+    _run(tmp_path, [(20.0, 30.0), (70.0, 40.0)])   # mismo minuto, luego el siguiente
+    _run(tmp_path, [(80.0, 50.0)])                 # mismo minuto que la anterior
+
+    minutes = _rows(tmp_path, "1m")
+    assert [(r.ts, r.count) for r in minutes] == [(0.0, 3), (60.0, 2)]
+    assert minutes[0].cpu_mean == 20.0 and minutes[0].cpu_max == 30.0
+
+    hours = _rows(tmp_path, "1h")
+    assert [(r.ts, r.count) for r in hours] == [(0.0, 5)]
+    assert hours[0].cpu_mean == 30.0 and hours[0].cpu_max == 50.0
+
+
+def test_resume_after_a_crash_rebuilds_from_samples(tmp_path):
+    store = MetricsStore(tmp_path, max_mb=1)
+    for ts, cpu in [(0.0, 10.0), (60.0, 20.0), (70.0, 30.0)]:
+        store.append(ts, _sample(cpu))
+    for ring in store.files.values():  # sin close(): el minuto 60 y la hora se pierden
+        ring.close()
+    store = MetricsStore(tmp_path, max_mb=1)
+    store.append(130.0, _sample(40.0))
+    store.close()
+
+    assert [(r.ts, r.count) for r in _rows(tmp_path, "1m")] == [(0.0, 1), (60.0, 2), (120.0, 1)]
+    assert [(r.ts, r.count) for r in _rows(tmp_path, "1h")] == [(0.0, 4)]
@@ -0,0 +1,53 @@
+"""La capa de salida cuenta bien desde varios hilos y deja el logging como estaba."""
+import logging
+import threading
+import time
+
+from log_output import Progress, start_output
+from run_stats import RunStats
+
+
+def test_progress_update_is_thread_safe():
+    progress = Progress(interval=3600)
+    try:
+        def work():
+            for _ in range(20000):
+                progress.update(bytes=2)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        progress._stop.set()
+    assert progress.count == 160000
+    assert progress.bytes == 320000
+
+
+def test_verbose_restores_root_level():
+    root = logging.getLogger()
+    before = root.level
+    root.setLevel(logging.INFO)
+    try:
+        output = start_output(verbose=True)
+        assert root.level == logging.DEBUG
+        output.close()
+        assert root.level == logging.INFO
+    finally:
+        root.setLevel(before)
+
+
+def test_stats_time_the_real_handlers_behind_the_queue():
+    root = logging.getLogger()
+    slow = logging.Handler()
+    slow.emit = lambda record: time.sleep(0.05)
+    root.addHandler(slow)
+    try:
+        stats = RunStats()
+        stats.instrument_logging()
+        output = start_output()
+        logging.warning("mensaje")
+        output.close()
+    finally:
+        root.removeHandler(slow)
+    assert stats.phases["logging"] >= 0.05
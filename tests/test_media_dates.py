@@ -0,0 +1,33 @@
+"""La caché de fechas solo se poda bajo la carpeta recorrida."""
+import os
+from datetime import datetime
+
+from media_dates import DateCache, capture_date
+
+
+def test_prune_is_limited_to_the_walked_tree(tmp_path):
+    walked, other = tmp_path / "walked", tmp_path / "walked_other"
+    walked.mkdir()
+    other.mkdir()
+    cache = DateCache(tmp_path / "dates.sqlite")
+    for d in (walked, other):
+        cache.put(str(d / "gone.jpg"), 1, 1, None, "")
+    cache.close()
+    # Ejecución siguiente: ninguno de los dos archivos se ve ya.
+    DateCache(tmp_path / "dates.sqlite").close(prune_under=str(walked))
+
+    cache = DateCache(tmp_path / "dates.sqlite")
+    assert cache.get(str(walked / "gone.jpg"), 1, 1) is None
+    assert cache.get(str(other / "gone.jpg"), 1, 1) is not None
+    cache.close()
+
+
+def test_unknown_mtime_falls_back_to_stat(tmp_path):
+    path = tmp_path / "plain.jpg"
+    path.write_bytes(b"no metadata")
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+
+    date = capture_date(str(path), path.stat().st_size, 0)
+
+    assert date.source == "mtime"
+    assert date.date == datetime.fromtimestamp(1_600_000_000)
@@ -0,0 +1,47 @@
+"""Mover nunca pisa un destino que apareció después de listar la carpeta."""
+import errno
+import os
+
+import pytest
+
+from move_executor import MoveExecutor
+from move_journal import MoveJournal
+
+
+def _pair(tmp_path):
+    src, dst = tmp_path / "src.txt", tmp_path / "dst.txt"
+    src.write_text("mine")
+    dst.write_text("theirs")
+    return src, dst
+
+
+def test_move_refuses_to_replace(tmp_path):
+    src, dst = _pair(tmp_path)
+    with pytest.raises(FileExistsError):
+        MoveExecutor(workers=1).move(str(src), str(dst))
+    assert src.read_text() == "mine" and dst.read_text() == "theirs"
+
+
+def test_move_without_hard_links_still_refuses(tmp_path, monkeypatch):
+    def no_link(*args, **kwargs):
+        raise OSError(errno.EPERM, "no hard links here")
+
+    monkeypatch.setattr(os, "link", no_link)
+    src, dst = _pair(tmp_path)
+    with pytest.raises(FileExistsError):
+        MoveExecutor(workers=1).move(str(src), str(dst))
+    assert dst.read_text() == "theirs"
+
+    dst.unlink()
+    MoveExecutor(workers=1).move(str(src), str(dst))
+    assert dst.read_text() == "mine" and not src.exists()
+
+
+def test_last_plan_for_a_source_wins(tmp_path):
+    journal = MoveJournal(tmp_path, tmp_path / "journal.jsonl")
+    journal.begin(recursive=False)
+    journal.plan([("/a/x", "/b/x")])
+    journal.plan([("/a/x", "/b/x_1")])
+    journal.close()
+
+    assert journal.load().pending == [("/a/x", "/b/x_1")]
@@ -0,0 +1,49 @@
+"""La cuarentena anota cada archivo antes de moverlo: un corte no lo pierde."""
+import json
+
+import pytest
+
+import quarantine as quarantine_mod
+from quarantine import Quarantine
+
+
+def _records(q):
+    return [json.loads(line) for line in q.manifest.read_text(encoding="utf-8").splitlines()]
+
+
+def test_put_record_is_on_disk_before_the_move(tmp_path, monkeypatch):
+    src = tmp_path / "a.tmp"
+    src.write_bytes(b"data")
+    q = Quarantine(tmp_path)
+    seen = []
+
+    def move(a, b):
+        # El manifiesto ya debe tener el registro sin esperar a close().
+        seen.extend(_records(q))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(quarantine_mod, "move", move)
+    with pytest.raises(KeyboardInterrupt):
+        q.put(str(src), 4, 0.0)
+    q.close()
+
+    assert [r["op"] for r in seen] == ["put"] and seen[0]["path"] == str(src)
+    assert [r["op"] for r in _records(q)] == ["put", "abort"]
+    assert Quarantine(tmp_path).entries() == []
+    assert src.exists()
+
+
+def test_restore_skips_entries_whose_copy_is_missing(tmp_path):
+    kept, lost = tmp_path / "kept.tmp", tmp_path / "lost.tmp"
+    kept.write_bytes(b"k")
+    lost.write_bytes(b"l")
+    q = Quarantine(tmp_path)
+    q.put(str(kept), 1, 0.0)
+    lost_id = q.put(str(lost), 1, 0.0)
+    q.close()
+    # Como si el proceso hubiera muerto entre el registro y el movimiento.
+    entries = q.entries()
+    q.stored_path(next(e for e in entries if e.id == lost_id)).rename(lost)
+
+    assert q.restore(entries) == 1
+    assert kept.read_bytes() == b"k" and lost.read_bytes() == b"l"
@@ -0,0 +1,60 @@
+"""Con índice, la selección de candidatos debe ser la misma que sin él."""
+import os
+import time
+
+from file_cleaner import Cleaner
+from scan_index import ScanIndex
+
+OLD = time.time() - 30 * 86400
+
+
+def _candidates(folder, db, **kwargs):
+    index = ScanIndex(folder, db)
+    try:
+        cleaner = Cleaner(folder, patterns=["*.log"], min_days=7, index=index, **kwargs)
+        cleaner.scan()
+    finally:
+        index.close()
+    return sorted(e.path for e in cleaner.to_delete)
+
+
+def _touch_dir_back(folder, st):
+    # Modificar un archivo en sitio no cambia su carpeta; se fija por si acaso.
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_truncated_below_max_size_is_rechecked(tmp_path):
+    folder = tmp_path / "t"
+    folder.mkdir()
+    big = folder / "a.log"
+    big.write_bytes(b"x" * 4096)
+    os.utime(big, (OLD, OLD))
+    db = tmp_path / "index.sqlite"
+    assert _candidates(folder, db, max_size_kb=1) == []
+
+    st = folder.stat()
+    with open(big, "r+b") as f:
+        f.truncate(10)
+    os.utime(big, (OLD, OLD))
+    _touch_dir_back(folder, st)
+
+    expected = [str(big)]
+    assert _candidates(folder, db, max_size_kb=1) == expected
+    assert _candidates(folder, tmp_path / "fresh.sqlite", max_size_kb=1) == expected
+
+
+def test_mtime_set_backwards_is_rechecked(tmp_path):
+    folder = tmp_path / "t"
+    folder.mkdir()
+    recent = folder / "b.log"
+    recent.write_text("log")
+    db = tmp_path / "index.sqlite"
+    assert _candidates(folder, db) == []
+
+    st = folder.stat()
+    os.utime(recent, (OLD, OLD))  # como touch -d o rsync -t
+    _touch_dir_back(folder, st)
+
+    expected = [str(recent)]
+    assert _candidates(folder, db) == expected
+    assert _candidates(folder, tmp_path / "fresh.sqlite") == expected
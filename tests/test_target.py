@@ -0,0 +1,40 @@
+"""--target-size borra lo más antiguo primero, sea cual sea el orden del recorrido."""
+import os
+import time
+
+from fastwalk import FileEntry
+from file_cleaner import Cleaner
+
+DAY = 86400
+
+
+def _make(folder, name, size, days_ago):
+    path = folder / name
+    path.write_bytes(b"x" * size)
+    ts = time.time() - days_ago * DAY
+    os.utime(path, (ts, ts))
+    return str(path)
+
+
+def test_target_size_is_oldest_first(tmp_path):
+    # El recorrido entrega A, B y después C, el más antiguo.
+    a = FileEntry("/x/a.log", "a.log", 6, 5.0)
+    b = FileEntry("/x/b.log", "b.log", 6, 6.0)
+    c = FileEntry("/x/c.log", "c.log", 4, 1.0)
+    cleaner = Cleaner(tmp_path, patterns=["*.log"], min_days=7, target_size=10)
+    cleaner._iter_classified = lambda: iter([(a, True), (b, True), (c, True)])
+    assert cleaner.select_target() == [c, a]
+
+
+def test_target_size_counts_non_candidates(tmp_path):
+    _make(tmp_path, "keep.dat", 8, 90)   # no candidato: ocupa presupuesto
+    old = _make(tmp_path, "old.log", 4, 30)
+    _make(tmp_path, "new.log", 4, 10)
+    cleaner = Cleaner(tmp_path, patterns=["*.log"], min_days=7, target_size=12)
+    assert [e.path for e in cleaner.select_target()] == [old]
+
+
+def test_target_size_already_met(tmp_path):
+    _make(tmp_path, "a.log", 4, 30)
+    cleaner = Cleaner(tmp_path, patterns=["*.log"], min_days=7, target_size=100)
+    assert cleaner.select_target() == []